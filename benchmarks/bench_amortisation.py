@@ -0,0 +1,57 @@
+"""Batched amortisation vs one amortise() call per loan.
+
+Loans mix IO periods, fixed terms reverting to variable, a two-step rate-change
+schedule, extra repayments and offsets.
+
+    python -m benchmarks.bench_amortisation --loans 10000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from calculators.amortisation import amortise, rate_path
+
+
+def book(loans: int, seed: int = 5) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "loan": rng.uniform(200_000, 2_000_000, loans).round(-3),
+        "rates": rate_path(rng.uniform(0.055, 0.07, loans), 360, rng.uniform(0.05, 0.06, loans),
+                           rng.integers(0, 6, loans), changes=[(24, 0.0725), (48, 0.0675)]),
+        "years": rng.integers(15, 31, loans),
+        "io": rng.integers(0, 6, loans) * (rng.random(loans) < 0.3),
+        "extra": rng.choice([0.0, 200.0, 1000.0], loans),
+        "offset": rng.uniform(0, 150_000, loans) * (rng.random(loans) < 0.4),
+    }
+
+
+def run(loans: int = 10_000, per_loan_sample: int = 500) -> dict:
+    b = book(loans)
+    t0 = time.perf_counter()
+    amortise(b["loan"], b["rates"], b["years"], b["io"], b["extra"], b["offset"])
+    batch = time.perf_counter() - t0
+    n = min(loans, per_loan_sample)
+    t0 = time.perf_counter()
+    for i in range(n):
+        amortise(b["loan"][i], b["rates"][i:i + 1], b["years"][i], b["io"][i], b["extra"][i], b["offset"][i])
+    single = (time.perf_counter() - t0) / n
+    return {
+        "loans": loans,
+        "batch_sec": round(batch, 3),
+        "batch_loans_per_sec": int(loans / batch),
+        "per_loan_calls_sec_est": round(single * loans, 2),
+        "speedup": round(single * loans / batch, 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--loans", type=int, default=10_000)
+    args = ap.parse_args()
+    print(json.dumps(run(args.loans), indent=2))
+
+
+if __name__ == "__main__":
+    main()
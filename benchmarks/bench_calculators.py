@@ -0,0 +1,86 @@
+"""Scalar loop vs NumPy batch calculators over a synthetic portfolio.
+
+Times the full property calculation (stamp duty, repayments, council rates,
+insurance premium, monthly cashflow) both ways and checks the results agree (to the ulp, since NumPy's
+vectorised pow is not libm's).
+
+    python -m benchmarks.bench_calculators --rows 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from calculators.cashflow import calc_cashflow, calc_cashflow_batch
+from calculators.council_rates import calc_council_rates, calc_council_rates_batch
+from calculators.insurance import estimate_sum_insured, estimate_sum_insured_batch, premium_from_risk, premium_from_risk_batch
+from calculators.repayments import calc_repayments, calc_repayments_batch
+from calculators.stamp_duty import calc_stamp_duty, calc_stamp_duty_batch
+
+LGAS = ["City of Sydney", "North Sydney", "Parramatta", "Blacktown", "Penrith"]
+
+
+def portfolio(rows: int, seed: int = 11) -> dict:
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(300_000, 3_000_000, rows).round(-3)
+    return {
+        "price": price,
+        "state": rng.choice(["NSW", "VIC", "QLD"], rows),
+        "loan": price * 0.8,
+        "rate": rng.uniform(0.05, 0.075, rows).round(4),
+        "years": np.full(rows, 30),
+        "type": rng.choice(["P&I", "IO"], rows, p=[0.8, 0.2]),
+        "lga": rng.choice(LGAS, rows),
+        "land": rng.uniform(150, 1200, rows).round(),
+        "build": rng.uniform(80, 400, rows).round(),
+        "rent": price * rng.uniform(0.03, 0.045, rows) / 12,
+    }
+
+
+def scalar(p: dict) -> np.ndarray:
+    out = np.empty((len(p["price"]), 3))
+    cols = [p[k].tolist() for k in ("price", "state", "loan", "rate", "years", "type", "lga", "land", "build", "rent")]
+    for i, (price, state, loan, rate, years, kind, lga, land, build, rent) in enumerate(zip(*cols)):
+        duty = calc_stamp_duty(price, state)
+        repay = calc_repayments(loan, rate, years, kind)
+        council = calc_council_rates(lga, land)
+        ins = premium_from_risk(estimate_sum_insured(build), "medium")
+        out[i] = duty, repay, calc_cashflow(rent, repay, (council + ins) / 12.0)
+    return out
+
+
+def batch(p: dict) -> np.ndarray:
+    duty = calc_stamp_duty_batch(p["price"], p["state"])
+    repay = calc_repayments_batch(p["loan"], p["rate"], p["years"], p["type"])
+    council = calc_council_rates_batch(p["lga"], p["land"])
+    ins = premium_from_risk_batch(estimate_sum_insured_batch(p["build"]), "medium")
+    return np.column_stack([duty, repay, calc_cashflow_batch(p["rent"], repay, (council + ins) / 12.0)])
+
+
+def run(rows: int = 1_000_000) -> dict:
+    p = portfolio(rows)
+    t0 = time.perf_counter()
+    s = scalar(p)
+    t1 = time.perf_counter()
+    b = batch(p)
+    t2 = time.perf_counter()
+    assert np.allclose(s, b, rtol=1e-12, atol=1e-9)
+    return {
+        "rows": rows,
+        "scalar_sec": round(t1 - t0, 3),
+        "batch_sec": round(t2 - t1, 3),
+        "speedup": round((t1 - t0) / (t2 - t1), 1),
+        "batch_rows_per_sec": int(rows / (t2 - t1)),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
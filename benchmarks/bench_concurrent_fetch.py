@@ -0,0 +1,76 @@
+"""Sequential vs concurrent candidate-page fetching against local stub hosts.
+
+    python -m benchmarks.bench_concurrent_fetch --hosts 6 --latency 0.4
+"""
+import argparse
+import contextlib
+import json
+import time
+
+from benchmarks.stub_server import StubServer
+from core import rate_limit
+from providers.jsonld_extractor import extract_first_schema_org, extract_schema_org
+
+LISTING_JSONLD = {"@type": "House", "numberOfBedrooms": 4, "numberOfBathroomsTotal": 2}
+
+
+def _page(with_jsonld: bool) -> bytes:
+    head = ""
+    if with_jsonld:
+        head = f'<script type="application/ld+json">{json.dumps(LISTING_JSONLD)}</script>'
+    return f"<html><head>{head}</head><body>{'<p>listing</p>' * 500}</body></html>".encode()
+
+
+def _reset_caches() -> None:
+    rate_limit.get_cache().clear()
+    rate_limit.get_robots().clear()
+    rate_limit.get_limiter().reset()
+
+
+def sequential(urls):
+    # The loop streamlit_app.py used before the concurrent engine
+    for u in urls:
+        data, allowed, fetched = extract_schema_org(u)
+        if data:
+            return data
+    return None
+
+
+def concurrent(urls):
+    data, _ = extract_first_schema_org(urls)
+    return data
+
+
+def run(hosts: int = 6, latency: float = 0.4, repeat: int = 3) -> dict:
+    with contextlib.ExitStack() as stack:
+        servers = []
+        for i in range(hosts):
+            # Only the last host carries JSON-LD, the worst case for the sequential loop
+            routes = {"/listing": (200, "text/html", _page(i == hosts - 1))}
+            servers.append(stack.enter_context(StubServer(routes, latency=latency)))
+        urls = [s.url("/listing") for s in servers]
+
+        out = {"hosts": hosts, "latency_sec": latency}
+        for name, fn in (("sequential", sequential), ("concurrent", concurrent)):
+            best = float("inf")
+            for _ in range(repeat):
+                _reset_caches()
+                t0 = time.perf_counter()
+                assert fn(urls) == LISTING_JSONLD
+                best = min(best, time.perf_counter() - t0)
+            out[f"{name}_sec"] = round(best, 4)
+        out["speedup"] = round(out["sequential_sec"] / out["concurrent_sec"], 2)
+        return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--hosts", type=int, default=6)
+    ap.add_argument("--latency", type=float, default=0.4)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    print(json.dumps(run(args.hosts, args.latency, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Memory and throughput of PropertyFacts models vs the columnar PropertyFactsTable.
+
+Measures bytes per property held as pydantic models and as a table (tracemalloc),
+build and round-trip time, and a portfolio pass of the batch calculators reading
+the table's columns directly.
+
+    python -m benchmarks.bench_facts_table --rows 100000
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from calculators.council_rates import calc_council_rates_batch
+from calculators.stamp_duty import calc_stamp_duty_batch
+from core.normalise import merge_facts
+from models.facts import AddressResolved, FieldValue
+from models.facts_table import PropertyFactsTable
+
+STATES = ["NSW", "VIC", "QLD"]
+LGAS = ["City of Sydney", "Parramatta", "Blacktown", "Penrith"]
+
+
+def models(rows: int, seed: int = 5) -> list:
+    rng = np.random.default_rng(seed)
+    beds = rng.integers(1, 6, rows).tolist()
+    land = rng.uniform(150, 1200, rows).round().tolist()
+    out = []
+    for i in range(rows):
+        addr = AddressResolved(query=f"{i} Example St", display_name=f"{i} Example St, Suburb {i % 500} NSW",
+                               lat=-33.8 + i * 1e-6, lon=151.0, suburb=f"Suburb {i % 500}", state=STATES[i % 3],
+                               postcode=str(2000 + i % 500), lga=LGAS[i % 4])
+        jsonld = {"beds": FieldValue(value=beds[i], source="jsonld", confidence=0.9, provenance=[f"https://portal.example/{i}"]),
+                  "dwelling_type": FieldValue(value="House", source="jsonld", confidence=0.85)}
+        out.append(merge_facts(address=addr, jsonld_map=jsonld, open_data={"land_sqm": land[i]}, estimated_map={},
+                               source_urls=[f"https://portal.example/{i} [robots: allowed]"]))
+    return out
+
+
+def _held(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return obj, size
+
+
+def run(rows: int = 100_000) -> dict:
+    facts, model_bytes = _held(lambda: models(rows))
+    t0 = time.perf_counter()
+    table, table_bytes = _held(lambda: PropertyFactsTable.from_models(facts))
+    build = time.perf_counter() - t0
+
+    prices = np.full(rows, 900_000.0)
+    t0 = time.perf_counter()
+    duty = calc_stamp_duty_batch(prices, table.column("state"))
+    council = calc_council_rates_batch(table.column("lga"), table.column("land_sqm"))
+    calc = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as d:
+        table.save(d)
+        t0 = time.perf_counter()
+        loaded = PropertyFactsTable.load(d)
+        load = time.perf_counter() - t0
+        sample = np.linspace(0, rows - 1, 100).astype(int)
+        assert all(loaded[int(i)].to_model() == facts[i] for i in sample)
+        t0 = time.perf_counter()
+        for i in sample:
+            loaded[int(i)].to_model()
+        to_model = (time.perf_counter() - t0) / len(sample)
+    return {
+        "rows": rows,
+        "model_bytes_per_row": round(model_bytes / rows),
+        "table_bytes_per_row": round(table_bytes / rows),
+        "build_sec": round(build, 3),
+        "calculators_sec": round(calc, 4),
+        "load_mmap_sec": round(load, 4),
+        "row_to_model_us": round(to_model * 1e6, 1),
+        "checksum": round(float(duty.sum() + council.sum())),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=100_000)
+    args = ap.parse_args()
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
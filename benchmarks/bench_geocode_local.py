@@ -0,0 +1,77 @@
+"""Build the offline address index over synthetic addresses and time lookups.
+
+    python -m benchmarks.bench_geocode_local --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from providers.geocode_local import LocalAddressIndex, build_index
+
+STREETS = ["Alex", "George", "Victoria", "Albert", "Church", "Station", "Park", "Railway", "Elizabeth", "King",
+           "Queen", "William", "High", "Bridge", "Hill", "Forest", "Ocean", "River", "Wattle", "Banksia"]
+TYPES = ["Street", "Avenue", "Road", "Parade", "Crescent", "Close", "Lane", "Drive", "Place", "Way"]
+STATES = ["NSW", "VIC", "QLD", "SA", "WA", "TAS"]
+
+
+def synthetic_rows(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    suburbs = [(f"Suburb{i}", rng.choice(STATES), str(2000 + i % 8000)) for i in range(4000)]
+    streets = [f"{rng.choice(STREETS)}{rng.randint(1, 400)} {rng.choice(TYPES)}" for _ in range(20000)]
+    for _ in range(n):
+        sub, state, pc = rng.choice(suburbs)
+        name = f"{rng.randint(1, 400)} {rng.choice(streets)}, {sub} {state} {pc}"
+        yield name, rng.uniform(-43, -10), rng.uniform(113, 153), sub, state, pc, None
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+def run(rows: int = 1_000_000, queries: int = 300) -> dict:
+    sample = [r[0] for r in synthetic_rows(min(rows, 5000), seed=7)]
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "addresses.sqlite")
+        t0 = time.perf_counter()
+        build_index("", path, rows=synthetic_rows(rows))
+        build_sec = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        idx = LocalAddressIndex(path)
+        idx.search("1 warm up")
+        open_ms = (time.perf_counter() - t0) * 1000
+
+        rng = random.Random(1)
+        kinds = {"prefix": [], "full": [], "fuzzy": []}
+        for _ in range(queries):
+            full = rng.choice(sample)
+            cut = full[: rng.randint(8, len(full) - 1)]
+            words = full.split()
+            typo = words[1][:2] + words[1][3:] if len(words[1]) > 4 else words[1]
+            for kind, q in (("prefix", cut), ("full", full), ("fuzzy", " ".join([words[0], typo] + words[2:]))):
+                t = time.perf_counter()
+                idx.search(q)
+                kinds[kind].append((time.perf_counter() - t) * 1000)
+        out = {"rows": rows, "build_sec": round(build_sec, 1), "index_mb": round(os.path.getsize(path) / 1e6, 1),
+               "open_ms": round(open_ms, 2)}
+        for kind, xs in kinds.items():
+            out[f"{kind}_p50_ms"] = round(statistics.median(xs), 3)
+            out[f"{kind}_p95_ms"] = round(_pct(xs, 0.95), 3)
+        return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--queries", type=int, default=300)
+    args = ap.parse_args()
+    print(json.dumps(run(args.rows, args.queries), indent=2))
+
+
+if __name__ == "__main__":
+    main()
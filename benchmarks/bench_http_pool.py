@@ -0,0 +1,62 @@
+"""Per-request latency with a fresh TLS connection vs the pooled keep-alive client.
+
+    python -m benchmarks.bench_http_pool --requests 50
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import requests
+
+from benchmarks.stub_server import StubServer, self_signed_cert
+from core.http_client import HttpClient
+
+# Roughly the shape of one lookup: a search, a robots.txt and a few pages per host
+BODY = b"<html>" + b"x" * 20_000 + b"</html>"
+
+
+def _time(fn, n: int) -> list[float]:
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def run(n: int = 50) -> dict:
+    with tempfile.TemporaryDirectory() as d:
+        cert, key = self_signed_cert(d)
+        with StubServer({"/page": (200, "text/html", BODY)}, tls=(cert, key)) as srv:
+            url = srv.url("/page")
+            fresh = _time(lambda: requests.get(url, verify=cert, timeout=10).content, n)
+            fresh_conns = srv.connections
+
+            client = HttpClient()
+            pooled = _time(lambda: client.get(url, verify=cert).content, n)
+            pooled_conns = srv.connections - fresh_conns
+            client.close()
+
+    fresh_ms = statistics.median(fresh) * 1000
+    pooled_ms = statistics.median(pooled) * 1000
+    return {
+        "requests": n,
+        "fresh_median_ms": round(fresh_ms, 3),
+        "pooled_median_ms": round(pooled_ms, 3),
+        "saved_per_request_ms": round(fresh_ms - pooled_ms, 3),
+        "fresh_connections": fresh_conns,
+        "pooled_connections": pooled_conns,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--requests", type=int, default=50)
+    args = ap.parse_args()
+    print(json.dumps(run(args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
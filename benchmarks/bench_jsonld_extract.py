@@ -0,0 +1,79 @@
+"""BeautifulSoup vs byte-scanner JSON-LD extraction over the saved HTML fixtures.
+
+Each fixture is padded at its <!--PAD--> marker with listing-page filler (cards,
+inline SVG, base64 thumbnails) up to --size bytes, the size of a heavy portal page.
+Peak memory is the Python heap from tracemalloc; lxml's own C allocations are not
+traced, so the soup figures understate its real footprint.
+
+    python -m benchmarks.bench_jsonld_extract --size 2000000
+"""
+import argparse
+import base64
+import json
+import os
+import time
+import tracemalloc
+
+from providers.jsonld_extractor import _first_jsonld_block, _first_jsonld_block_soup
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+_CARD = (
+    '<div class="card"><img alt="photo" src="data:image/jpeg;base64,{img}">'
+    '<svg viewBox="0 0 24 24"><path d="M12 2L2 7l10 5 10-5-10-5z"/></svg>'
+    '<p class="feature">Open plan living, ducted air, double garage.</p></div>\n'
+)
+
+
+def load_corpus(size: int) -> dict[str, bytes]:
+    card = _CARD.format(img=base64.b64encode(os.urandom(3000)).decode()).encode()
+    out = {}
+    for name in sorted(os.listdir(FIXTURES)):
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            page = f.read()
+        pad = card * max(0, (size - len(page)) // len(card))
+        out[name] = page.replace(b"<!--PAD-->", pad)
+    return out
+
+
+def _measure(fn, page: bytes, repeat: int) -> tuple[float, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(page)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run(size: int = 2_000_000, repeat: int = 3) -> dict:
+    soup = lambda b: _first_jsonld_block_soup(b.decode("utf-8", errors="replace"))
+    results = {}
+    for name, page in load_corpus(size).items():
+        assert soup(page) == _first_jsonld_block(page)
+        s_t, s_m = _measure(soup, page, repeat)
+        f_t, f_m = _measure(_first_jsonld_block, page, repeat)
+        results[name] = {
+            "bytes": len(page),
+            "soup_ms": round(s_t * 1000, 2),
+            "scan_ms": round(f_t * 1000, 2),
+            "speedup": round(s_t / f_t, 1),
+            "soup_peak_mb": round(s_m / 1e6, 2),
+            "scan_peak_mb": round(f_m / 1e6, 2),
+        }
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--size", type=int, default=2_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    print(json.dumps(run(args.size, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Batch LGA resolution over synthetic boundaries.
+
+Builds a jittered lattice of LGAs whose shared borders are wiggly polylines (so
+vertex counts look like generalised ABS boundaries), resolves random points in
+batch and checks a sample against brute-force ray casting.
+
+    python -m benchmarks.bench_lga_resolver --lgas 128 --vertices-per-side 200 --points 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from providers.lga_resolver import LgaIndex
+
+BBOX = (141.0, -37.5, 153.6, -28.2)  # roughly NSW
+
+
+def synthetic_lgas(cols: int, rows: int, per_side: int, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    min_x, min_y, max_x, max_y = BBOX
+    gx = np.linspace(min_x, max_x, cols + 1)
+    gy = np.linspace(min_y, max_y, rows + 1)
+    lattice = np.stack(np.meshgrid(gx, gy), axis=-1)
+    jitter = (max_x - min_x) / cols * 0.25
+    lattice[1:-1, 1:-1] += rng.uniform(-jitter, jitter, lattice[1:-1, 1:-1].shape)
+
+    def wiggle(a, b):
+        t = np.linspace(0, 1, per_side + 1)[:, None]
+        line = a + (b - a) * t
+        normal = np.array([-(b - a)[1], (b - a)[0]])
+        amp = rng.normal(0, 0.02, per_side + 1)
+        amp[[0, -1]] = 0
+        return line + amp[:, None] * normal
+
+    horiz = {(i, j): wiggle(lattice[i, j], lattice[i, j + 1]) for i in range(rows + 1) for j in range(cols)}
+    vert = {(i, j): wiggle(lattice[i, j], lattice[i + 1, j]) for i in range(rows) for j in range(cols + 1)}
+    names, rings = [], []
+    for i in range(rows):
+        for j in range(cols):
+            ring = np.vstack([horiz[i, j][:-1], vert[i, j + 1][:-1], horiz[i + 1, j][::-1][:-1], vert[i, j][::-1][:-1]])
+            names.append(f"LGA {i:02d}-{j:02d}")
+            rings.append([ring])
+    return names, rings
+
+
+def brute_force(rings, x: float, y: float) -> int:
+    for fid, feature in enumerate(rings):
+        inside = False
+        for r in feature:
+            x0, y0 = r[:, 0], r[:, 1]
+            x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                c = ((y0 > y) != (y1 > y)) & (x < x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+            inside ^= bool(c.sum() & 1)
+        if inside:
+            return fid
+    return -1
+
+
+def run(lgas: int = 128, per_side: int = 200, points: int = 1_000_000, check: int = 300) -> dict:
+    cols = int(np.sqrt(lgas))
+    rows = -(-lgas // cols)
+    names, rings = synthetic_lgas(cols, rows, per_side)
+    t0 = time.perf_counter()
+    index = LgaIndex.from_rings(names, rings)
+    build = time.perf_counter() - t0
+
+    rng = np.random.default_rng(1)
+    lon = rng.uniform(BBOX[0], BBOX[2], points)
+    lat = rng.uniform(BBOX[1], BBOX[3], points)
+    index.lookup_ids(lat[:1000], lon[:1000])
+    t0 = time.perf_counter()
+    ids = index.lookup_ids(lat, lon)
+    dt = time.perf_counter() - t0
+    sample = rng.choice(points, min(check, points), replace=False)
+    wrong = sum(brute_force(rings, lon[i], lat[i]) != ids[i] for i in sample)
+    return {
+        "lgas": len(names),
+        "edges": int(len(index.edges)),
+        "grid": list(index.shape),
+        "boundary_cells": round(float((index.cell_owner == -2).mean()), 3),
+        "build_sec": round(build, 2),
+        "points": points,
+        "lookup_sec": round(dt, 3),
+        "points_per_sec": int(points / dt),
+        "checked": len(sample),
+        "mismatches": int(wrong),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--lgas", type=int, default=128)
+    ap.add_argument("--vertices-per-side", type=int, default=200)
+    ap.add_argument("--points", type=int, default=1_000_000)
+    args = ap.parse_args()
+    print(json.dumps(run(args.lgas, args.vertices_per_side, args.points), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Pages per second for summary PDF reports.
+
+- naive: the old export, one canvas per report drawn from scratch and saved
+  to a file;
+- per_report: render_pdf to bytes, one report per call;
+- multi_page: every report as a page of one PDF, with the static template
+  drawn once as a form;
+- zip_pool: one PDF per report, rendered across a process pool into a zip.
+
+    python -m benchmarks.bench_pdf_reports --reports 5000 --workers 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from benchmarks.bench_facts_table import models
+from models.facts_table import PropertyFactsTable
+from utils.pdf_export import (COST_LINES, DISCLAIMER, PROPERTY_LINES, portfolio_costs, render_batch, render_pages,
+                              render_pdf, report_values, table_pages)
+
+
+def naive(path: str, v: dict) -> None:
+    c = canvas.Canvas(path, pagesize=A4)
+    _, height = A4
+    y = height - 50
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(40, y, "PropLens Summary")
+    y -= 30
+    c.setFont("Helvetica", 10)
+    c.drawString(40, y, f"Address: {v['address']}")
+    y -= 15
+    c.drawString(40, y, f"Suburb: {v['suburb']}  State: {v['state']}  Postcode: {v['postcode']}")
+    y -= 25
+    for key, label in PROPERTY_LINES + COST_LINES:
+        c.drawString(40, y, f"{label}: {v[key]}")
+        y -= 15
+    c.setFont("Helvetica", 8)
+    c.drawString(40, y - 20, DISCLAIMER)
+    c.showPage()
+    c.save()
+
+
+def _rate(n: int, sec: float) -> float:
+    return round(n / sec, 1)
+
+
+def run(reports: int = 2000, workers: int = os.cpu_count() or 1) -> dict:
+    table = PropertyFactsTable.from_models(models(reports))
+    costs = portfolio_costs(table)
+    pages = list(table_pages(table, costs))
+    sample = min(reports, 500)
+    out = {"reports": reports, "workers": workers}
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "proplens_summary.pdf")
+        t0 = time.perf_counter()
+        for v in pages[:sample]:
+            naive(path, v)
+        out["naive_pages_per_sec"] = _rate(sample, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        for v in pages[:sample]:
+            render_pages([v])
+        out["per_report_pages_per_sec"] = _rate(sample, time.perf_counter() - t0)
+
+        out["multi_page_pages_per_sec"] = render_batch(table, costs, os.path.join(d, "all.pdf"), workers=1)["pages_per_sec"]
+        out["zip_pool_pages_per_sec"] = render_batch(table, costs, os.path.join(d, "all.zip"), workers=workers)["pages_per_sec"]
+        out["multi_page_bytes_per_page"] = round(os.path.getsize(os.path.join(d, "all.pdf")) / reports)
+    first = [float(costs[k][0]) for k in ("stamp_duty", "council", "premium", "monthly_repay")]
+    assert render_pdf(table[0], *first)[:4] == b"%PDF" and report_values(table[0], *first) == pages[0]
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reports", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+    print(json.dumps(run(args.reports, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Monte Carlo scenario throughput, serial and across a process pool.
+
+Simulates a 30-year investment loan with a two-year fixed period over the full
+term and reports paths per second and peak chunk memory.
+
+    python -m benchmarks.bench_scenarios --paths 100000 --workers 4
+"""
+import argparse
+import json
+import os
+import time
+
+from calculators.scenarios import CHUNK_PATHS, simulate
+from models.scenario import ScenarioInputs
+
+INPUTS = ScenarioInputs(price=950_000, rent_week=680, outgoings_month=380, fixed_rate=0.0585, fixed_years=2)
+
+
+def _run(paths: int, chunk: int, workers: int) -> dict:
+    t0 = time.perf_counter()
+    res = simulate(INPUTS, paths=paths, chunk=chunk, workers=workers)
+    dt = time.perf_counter() - t0
+    return {
+        "workers": workers,
+        "sec": round(dt, 2),
+        "paths_per_sec": int(paths / dt),
+        "median_cost": res.summary()["cumulative_cost"][50],
+    }
+
+
+def run(paths: int = 100_000, chunk: int = CHUNK_PATHS, workers: int = 0) -> dict:
+    workers = workers or os.cpu_count() or 1
+    months = INPUTS.years * 12
+    return {
+        "paths": paths,
+        "months": months,
+        "chunk": chunk,
+        # float64 (paths, months) working arrays held at once inside one chunk
+        "chunk_mb_est": round(chunk * months * 8 * 8 / 1e6, 1),
+        "result_mb": round(paths * (INPUTS.years + 2) * 4 / 1e6, 1),
+        "serial": _run(paths, chunk, 1),
+        "pool": _run(paths, chunk, workers),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--paths", type=int, default=100_000)
+    ap.add_argument("--chunk", type=int, default=CHUNK_PATHS)
+    ap.add_argument("--workers", type=int, default=0, help="pool size (default: all cores)")
+    args = ap.parse_args()
+    print(json.dumps(run(args.paths, args.chunk, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Per-call cost of core.tracing: a bare function, the same function traced with
+tracing off and on, and span() blocks off and on.
+
+    python -m benchmarks.bench_tracing --calls 1000000
+"""
+import argparse
+import json
+import time
+
+from core import tracing
+
+
+def bare(x):
+    return x + 1
+
+
+traced = tracing.traced("bench")(bare)
+
+
+def _ns(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def _span(i):
+    with tracing.span("bench.span"):
+        return i + 1
+
+
+def run(calls: int = 1_000_000) -> dict:
+    was = tracing.enabled()
+    try:
+        tracing.enable(False)
+        out = {"calls": calls, "bare_ns": _ns(bare, calls), "traced_off_ns": _ns(traced, calls),
+               "span_off_ns": _ns(_span, calls)}
+        tracing.enable()
+        out["traced_on_ns"] = _ns(traced, calls)
+        out["span_on_ns"] = _ns(_span, calls)
+        assert {r["stage"]: r["count"] for r in tracing.snapshot()} == {"bench": calls, "bench.span": calls}
+    finally:
+        tracing.enable(was)
+        tracing.reset()
+    out["off_overhead_ns"] = out["traced_off_ns"] - out["bare_ns"]
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in out.items()}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=1_000_000)
+    args = ap.parse_args()
+    print(json.dumps(run(args.calls), indent=2))
+
+
+if __name__ == "__main__":
+    main()
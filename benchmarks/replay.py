@@ -0,0 +1,97 @@
+"""Recorded HTTP responses replayed from local stub servers, so a lookup runs end
+to end with no network.
+
+A recording (fixtures/http/recording.json) maps real URLs to fixture files. Each
+recorded host gets its own StubServer, so the per-host limiter and the robots
+cache still see separate hosts. https://host/path is served at
+http://127.0.0.1:port/host/path, which keeps the portal's domain in the URL for
+find_candidate_urls' site filter; robots.txt stays at the root, where robots
+checks look for it. Absolute links to recorded hosts in the bodies are rewritten
+to the local addresses.
+
+Inside the context the page cache, robots cache and host limiter are private
+in-memory instances, so a replay never reads or clears the shared stores under
+PROPLENS_CACHE_DIR. The originals are put back on exit.
+
+    with Replay() as replay:
+        address = search_addresses(replay.query)[0]
+"""
+import contextlib
+import json
+import os
+import urllib.parse
+from typing import Dict
+
+from benchmarks.stub_server import Routes, StubServer
+from core import rate_limit, store
+from core.http_cache import MemoryLRUCache
+from core.robots import RobotsCache
+from providers import geocode_osm, portal_finders
+
+RECORDING = os.path.join(os.path.dirname(__file__), "fixtures", "http", "recording.json")
+
+
+class Replay:
+    def __init__(self, recording: str = RECORDING, latency: float = 0.0):
+        with open(recording, encoding="utf-8") as f:
+            rec = json.load(f)
+        self.query: str = rec["query"]
+        self.latency = latency
+        self.servers: Dict[str, StubServer] = {}
+        self._responses: Dict[str, dict] = rec["responses"]
+        self._dir = os.path.dirname(recording)
+        self._stack = contextlib.ExitStack()
+        self._saved = None
+        self.cache = MemoryLRUCache()
+        self.robots = RobotsCache(store.MEMORY)
+        self.limiter = rate_limit.HostLimiter(rate=1.0 / rate_limit.MIN_DELAY_SEC, burst=1.0,
+                                              store=rate_limit.MemoryBucketStore())
+
+    def url(self, real: str) -> str:
+        """Local address of a recorded URL."""
+        parts = urllib.parse.urlsplit(real)
+        path = parts.path if parts.path == "/robots.txt" else f"/{parts.netloc}{parts.path}"
+        return self.servers[parts.netloc].url(path) + (f"?{parts.query}" if parts.query else "")
+
+    def reset(self, caches: bool = True) -> None:
+        """Forget the replay's limiter state and, with caches, its cached pages and robots files too."""
+        if caches:
+            self.cache.clear()
+            self.robots.clear()
+        self.limiter.reset()
+
+    def __enter__(self) -> "Replay":
+        routes: Dict[str, Routes] = {}
+        for real in self._responses:
+            host = urllib.parse.urlsplit(real).netloc
+            if host not in routes:
+                routes[host] = {}
+                self.servers[host] = self._stack.enter_context(StubServer(routes[host], latency=self.latency))
+        links = [(f"https://{h}".encode(), f"{s.base_url}/{h}".encode()) for h, s in self.servers.items()]
+        for real, spec in self._responses.items():
+            with open(os.path.join(self._dir, spec["file"]), "rb") as f:
+                body = f.read()
+            for recorded, local in links:
+                body = body.replace(recorded, local)
+            path = urllib.parse.urlsplit(self.url(real)).path
+            routes[urllib.parse.urlsplit(real).netloc][path] = (spec.get("status", 200), spec["type"], body)
+
+        self._saved = (geocode_osm.OSM_URL, geocode_osm.OSM_HOST, portal_finders._default_backend,
+                       rate_limit.get_cache(), rate_limit.get_robots(), rate_limit.get_limiter())
+        osm_url, osm_rate = self.url(geocode_osm.OSM_URL), rate_limit.HOST_RATES[geocode_osm.OSM_HOST]
+        geocode_osm.OSM_URL, geocode_osm.OSM_HOST = osm_url, urllib.parse.urlsplit(osm_url).netloc
+        self.limiter.host_rates[geocode_osm.OSM_HOST] = osm_rate
+        portal_finders.set_search_backend(portal_finders.DuckDuckGoBackend(self.url(portal_finders.DUCK_URL)))
+        rate_limit.set_cache(self.cache)
+        rate_limit.set_robots(self.robots)
+        rate_limit.set_limiter(self.limiter)
+        self.reset()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        geocode_osm.OSM_URL, geocode_osm.OSM_HOST, backend, cache, robots, limiter = self._saved
+        portal_finders.set_search_backend(backend)
+        rate_limit.set_cache(cache)
+        rate_limit.set_robots(robots)
+        rate_limit.set_limiter(limiter)
+        self._stack.close()
@@ -0,0 +1,220 @@
+"""Benchmark suite for regression checks, with no network.
+
+- lookup: geocode, portal search, page fetches, fusion and the expenses graph for
+  the recorded address, replayed from local servers (benchmarks.replay). Cold
+  lookups start with empty page and robots caches, warm ones reuse them. The
+  limiter is reset before each lookup, so pacing between lookups is not counted.
+- extract: JSON-LD extraction from padded listing pages, and normalisation.
+- calculators: the full per-property calculation through the scalar functions,
+  and through the batch functions at 1, 1,000 and 100,000 rows.
+
+Results are written as JSON: metadata about the run, and every metric with its
+unit and whether lower or higher is better. Comparing two results files flags
+any metric that moved the wrong way by more than --threshold, and exits 1.
+
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run -o new.json --baseline results.json
+    python -m benchmarks.run compare results.json new.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.bench_calculators import batch, portfolio, scalar
+from benchmarks.bench_jsonld_extract import load_corpus
+from benchmarks.replay import Replay
+from calculators.expenses import expenses_graph
+from core.enrich import enrich_address
+from core.normalise import normalise_jsonld
+from models.facts import PropertyFacts
+from providers.geocode_osm import search_addresses
+from providers.jsonld_extractor import _first_jsonld_block
+
+SUITES = ("lookup", "extract", "calculators")
+THRESHOLD = 0.15  # relative change counted as a regression
+BATCH_SIZES = (1, 1_000, 100_000)
+
+Metrics = Dict[str, Dict[str, object]]
+
+
+def _metric(value: float, unit: str, better: str) -> Dict[str, object]:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _expenses(facts: PropertyFacts) -> float:
+    """Every node of the expenses panel for facts, with the app's default settings."""
+    g = expenses_graph()
+    price = float(facts.last_sold_price.value if facts.last_sold_price else 0.0)
+    g.set(price=price, state="NSW", owner_occ=True, first_home=False, foreign=False,
+          lga=facts.address.lga or "Default LGA", land_sqm=float(facts.land_sqm.value or 0),
+          build_sqm=float(facts.build_sqm.value or 180.0), risk="medium", deposit_pct=20,
+          variable_rate=0.0625, fixed_rate=0.0585, fixed=False, fixed_years=0, years=30, io_years=0,
+          extra_monthly=0.0, offset=0.0, rent_week=price * 0.04 / 52, pm_fee_pct=6.0)
+    return g["cashflow"]
+
+
+def bench_lookup(repeat: int = 20, latency: float = 0.0) -> Metrics:
+    out: Metrics = {}
+    with Replay(latency=latency) as replay:
+        def lookup() -> PropertyFacts:
+            facts = enrich_address(search_addresses(replay.query)[0])
+            _expenses(facts)
+            return facts
+
+        facts = lookup()
+        # The recording is fixed, so the answer is too; a change here is a behaviour change, not noise
+        assert (facts.beds.value, facts.baths.value, facts.cars.value) == (4, 2, 2), facts
+        for mode in ("cold", "warm"):
+            ms: List[float] = []
+            for _ in range(repeat):
+                replay.reset(caches=mode == "cold")
+                t0 = time.perf_counter()
+                lookup()
+                ms.append((time.perf_counter() - t0) * 1000)
+            ms.sort()
+            out[f"lookup.{mode}.p50"] = _metric(statistics.median(ms), "ms", "lower")
+            out[f"lookup.{mode}.p95"] = _metric(ms[min(len(ms) - 1, int(0.95 * len(ms)))], "ms", "lower")
+    return out
+
+
+def bench_extract(page_bytes: int = 500_000, repeat: int = 5) -> Metrics:
+    pages = list(load_corpus(page_bytes).values())
+    found = [d for d in (_first_jsonld_block(p) for p in pages) if d]
+    sec = _best(lambda: [_first_jsonld_block(p) for p in pages], repeat)
+    n = 1000
+    norm = _best(lambda: [normalise_jsonld(d) for _ in range(n) for d in found], repeat)
+    return {
+        "extract.pages_per_sec": _metric(len(pages) / sec, "pages/s", "higher"),
+        "extract.mb_per_sec": _metric(sum(map(len, pages)) / sec / 1e6, "MB/s", "higher"),
+        "normalise.per_sec": _metric(n * len(found) / norm, "blocks/s", "higher"),
+    }
+
+
+def bench_calculators(scalar_rows: int = 5_000, repeat: int = 5) -> Metrics:
+    out: Metrics = {}
+    p = portfolio(scalar_rows)
+    out["calc.scalar.rows_per_sec"] = _metric(scalar_rows / _best(lambda: scalar(p), repeat), "rows/s", "higher")
+    for rows in BATCH_SIZES:
+        p = portfolio(rows)
+        out[f"calc.batch_{rows}.rows_per_sec"] = _metric(rows / _best(lambda: batch(p), repeat), "rows/s", "higher")
+    return out
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(suites: Sequence[str] = SUITES, quick: bool = False, latency: float = 0.0) -> dict:
+    metrics: Metrics = {}
+    if "lookup" in suites:
+        metrics.update(bench_lookup(repeat=10 if quick else 20, latency=latency))
+    if "extract" in suites:
+        metrics.update(bench_extract(page_bytes=100_000 if quick else 500_000, repeat=2 if quick else 5))
+    if "calculators" in suites:
+        metrics.update(bench_calculators(scalar_rows=500 if quick else 5_000, repeat=2 if quick else 5))
+    return {
+        "meta": {
+            "git": _git_rev(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+            "latency_sec": latency,
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(base: dict, new: dict, threshold: float = THRESHOLD) -> List[dict]:
+    """One row per metric in both results: relative change, and whether it is a
+    regression (worse by more than threshold)."""
+    rows = []
+    for name, b in base["metrics"].items():
+        n = new["metrics"].get(name)
+        if n is None or not b["value"]:
+            continue
+        change = (n["value"] - b["value"]) / b["value"]
+        worse = change if b["better"] == "lower" else -change
+        rows.append({"metric": name, "base": b["value"], "new": n["value"], "unit": b["unit"],
+                     "change": round(change, 4), "regressed": worse > threshold})
+    return rows
+
+
+def _report(base: dict, new: dict, threshold: float) -> int:
+    rows = compare(base, new, threshold)
+    for key in ("cpus", "python", "platform", "quick", "latency_sec"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"note: {key} differs ({base['meta'].get(key)} vs {new['meta'].get(key)}); numbers may not compare")
+    width = max((len(r["metric"]) for r in rows), default=6)
+    for r in rows:
+        flag = "REGRESSED" if r["regressed"] else ""
+        print(f"{r['metric']:<{width}}  {r['base']:>14,.3f}  {r['new']:>14,.3f} {r['unit']:<8} {r['change']:+8.1%}  {flag}")
+    bad = [r["metric"] for r in rows if r["regressed"]]
+    print(f"{len(bad)} of {len(rows)} metrics regressed by more than {threshold:.0%}" + (f": {', '.join(bad)}" if bad else ""))
+    return 1 if bad else 0
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["compare"]:
+        ap = argparse.ArgumentParser(prog="python -m benchmarks.run compare", description="Compare two results files.")
+        ap.add_argument("base")
+        ap.add_argument("new")
+        ap.add_argument("--threshold", type=float, default=THRESHOLD)
+        args = ap.parse_args(argv[1:])
+        return _report(_load(args.base), _load(args.new), args.threshold)
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-o", "--output", help="write results JSON here (default: print it)")
+    ap.add_argument("--only", default=",".join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    ap.add_argument("--quick", action="store_true", help="smaller sizes and fewer repeats, for CI smoke runs")
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds each replayed response is delayed")
+    ap.add_argument("--baseline", help="results JSON to compare this run against")
+    ap.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = ap.parse_args(argv)
+
+    suites = [s for s in args.only.split(",") if s]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        ap.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    results = run_suite(suites, args.quick, args.latency)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    if args.baseline:
+        return _report(_load(args.baseline), results, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
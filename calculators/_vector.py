@@ -0,0 +1,36 @@
+import numpy as np
+
+# Past this many distinct labels a sort-based np.unique beats repeated masking
+MASK_LABELS = 16
+
+
+def by_label(labels, fn, dtype=float) -> np.ndarray:
+    """Map fn over an array of string labels, calling it once per distinct label.
+
+    Batch inputs such as state, LGA or repayment type repeat a handful of values
+    across many rows, so applying the scalar rule per distinct value and scattering
+    it back is far cheaper than np.char ops over every element. Labels are peeled
+    off with equality masks, which for a few categories is several times faster
+    than sorting the whole column in np.unique. A coded column (anything with
+    `codes` and `vocab`, such as models.facts_table.Labels) skips even that: fn
+    runs once per vocabulary entry and the codes index the results.
+    """
+    if hasattr(labels, "codes") and hasattr(labels, "vocab"):
+        # Code -1 (None) picks the trailing entry
+        return np.array([fn(v) for v in labels.vocab] + [fn(None)], dtype=dtype)[labels.codes]
+    arr = np.asarray(labels)
+    if arr.ndim == 0:
+        return np.asarray(fn(arr.item()), dtype=dtype)
+    out = np.empty(arr.size, dtype=dtype)
+    rest, pos = arr.ravel(), np.arange(arr.size)
+    for _ in range(MASK_LABELS):
+        if not rest.size:
+            break
+        first = rest[0]
+        hit = rest == first
+        out[pos[hit]] = fn(first.item() if isinstance(first, np.generic) else first)  # object arrays hold str / None
+        rest, pos = rest[~hit], pos[~hit]
+    if rest.size:
+        names, inv = np.unique(rest, return_inverse=True)
+        out[pos] = np.array([fn(n) for n in names.tolist()], dtype=dtype)[inv]
+    return out.reshape(arr.shape)
@@ -0,0 +1,123 @@
+from typing import Optional
+
+import numpy as np
+
+from calculators.repayments import _pni_payment_batch
+
+SCHEDULE_DTYPE = np.dtype([("balance", "f8"), ("interest", "f8"), ("principal", "f8")])
+# Half the size, to the cent on balances up to about $100k and to a few cents beyond
+COMPACT_DTYPE = np.dtype([("balance", "f4"), ("interest", "f4"), ("principal", "f4")])
+
+
+def _per_loan(x, loans: int, dtype=float) -> np.ndarray:
+    return np.broadcast_to(np.asarray(x, dtype=dtype).reshape(-1), (loans,))
+
+
+def _per_month(x, loans: int, months: int) -> np.ndarray:
+    """Scalar, one value per loan, or a (loans | 1, months) matrix -> (loans, months).
+
+    A matrix shorter than the schedule holds its last column to the end."""
+    a = np.asarray(x, dtype=float)
+    if a.ndim < 2:
+        return np.broadcast_to(a.reshape(-1, 1), (loans, months))
+    if a.shape[1] < months:
+        a = np.concatenate([a, np.repeat(a[:, -1:], months - a.shape[1], axis=1)], axis=1)
+    return np.broadcast_to(a[:, :months], (loans, months))
+
+
+def rate_path(variable_rate, months: int, fixed_rate=None, fixed_years=0, changes=()) -> np.ndarray:
+    """Annual rate per loan and month, shape (loans, months).
+
+    changes is a sequence of (month, annual_rate) steps to the variable rate, each
+    holding from that month (0-based) on; the rate may be a scalar or one per loan.
+    If fixed_rate is given, it overrides the first fixed_years of each loan, after
+    which the loan reverts to the variable path.
+    """
+    var = np.asarray(variable_rate, dtype=float)
+    loans = max(var.shape[0] if var.ndim == 2 else var.size,
+                np.size(fixed_rate) if fixed_rate is not None else 1, np.size(fixed_years))
+    path = np.array(_per_month(var, loans, months))
+    for month, rate in sorted(changes, key=lambda c: c[0]):
+        path[:, month:] = _per_loan(rate, loans)[:, None]
+    if fixed_rate is not None:
+        fixed_months = _per_loan(fixed_years, loans, int) * 12
+        in_fixed = np.arange(months)[None, :] < fixed_months[:, None]
+        path = np.where(in_fixed, _per_loan(fixed_rate, loans)[:, None], path)
+    return path
+
+
+def amortise(
+    loan_amount,
+    rates,
+    years,
+    interest_only_years=0,
+    extra_monthly=0.0,
+    offset=0.0,
+    dtype: np.dtype = SCHEDULE_DTYPE,
+    months: Optional[int] = None,
+) -> np.ndarray:
+    """Monthly schedule for one or many loans, shape (loans, months) of `dtype`.
+
+    rates are annual: a scalar, one per loan, or a (loans, months) matrix such as
+    rate_path() builds. Months inside the interest-only period pay interest only;
+    after it the P&I payment is set by _pni_monthly over the remaining term and
+    reset whenever the rate changes. Interest accrues on the balance less the
+    offset, and extra repayments (per loan, or per loan and month) go straight to
+    principal without lowering the scheduled payment, so the loan finishes early.
+    Balances are closing balances; interest and principal are zero once a loan is
+    paid off or past its term. months, if given, stops the schedule early; payments
+    are still sized to each loan's full term.
+
+    The month recurrence is a Python loop over months, with each step computed
+    for every loan at once, so cost grows with the term, not the number of loans.
+    """
+    loan = np.atleast_1d(np.asarray(loan_amount, dtype=float))
+    loans = max(loan.size, np.size(years), np.size(interest_only_years), np.shape(rates)[0] if np.ndim(rates) else 1)
+    term = _per_loan(years, loans, int) * 12
+    io_end = np.minimum(_per_loan(interest_only_years, loans, int) * 12, term)
+    if months is None:
+        months = int(term.max(initial=0))
+    r_all = _per_month(rates, loans, months) / 12.0
+    extra = _per_month(extra_monthly, loans, months)
+    off = _per_month(offset, loans, months)
+
+    out = np.zeros((loans, months), dtype=dtype)
+    bal = np.array(_per_loan(loan, loans))
+    bal[bal < 0] = 0.0
+    pay = np.zeros(loans)
+    prev_r = np.full(loans, np.nan)
+    for m in range(months):
+        r = r_all[:, m]
+        remaining = term - m
+        recalc = (r != prev_r) | (m == io_end)
+        if recalc.any():
+            pay = np.where(recalc, _pni_payment_batch(bal, r, remaining), pay)
+        prev_r = r
+        interest = np.maximum(bal - off[:, m], 0.0) * r
+        due = np.where(m < io_end, interest, pay)
+        principal = np.clip(due - interest + extra[:, m], 0.0, bal)
+        # Settle the float residue on the last P&I month; IO-to-term loans keep theirs
+        principal = np.where((remaining == 1) & (m >= io_end) & (io_end < term), bal, principal)
+        live = remaining > 0
+        interest = np.where(live, interest, 0.0)
+        principal = np.where(live, principal, 0.0)
+        bal = bal - principal
+        row = out[:, m]
+        row["balance"] = bal
+        row["interest"] = interest
+        row["principal"] = principal
+    return out
+
+
+def summarise(schedule: np.ndarray) -> dict:
+    """Per-loan totals for a schedule from amortise(), as arrays of length loans."""
+    interest = schedule["interest"].astype(float)
+    payment = interest + schedule["principal"]
+    paying = payment > 0
+    return {
+        "total_interest": interest.sum(axis=1),
+        "total_paid": payment.sum(axis=1),
+        "first_payment": payment[:, 0] if payment.shape[1] else np.zeros(len(payment)),
+        "peak_payment": payment.max(axis=1, initial=0.0),
+        "months": np.where(paying.any(axis=1), payment.shape[1] - np.argmax(paying[:, ::-1], axis=1), 0),
+    }
@@ -1,2 +1,9 @@
+import numpy as np
+
+
 def calc_cashflow(inflow_month: float, repayment_month: float, outgoings_month: float) -> float:
-    return float(inflow_month) - float(repayment_month) - float(outgoings_month)
\ No newline at end of file
+    return float(inflow_month) - float(repayment_month) - float(outgoings_month)
+
+
+def calc_cashflow_batch(inflow_month, repayment_month, outgoings_month) -> np.ndarray:
+    return np.asarray(inflow_month, dtype=float) - np.asarray(repayment_month, dtype=float) - np.asarray(outgoings_month, dtype=float)
@@ -1,8 +1,19 @@
-# Very simple council rate estimator based on land size
+# Council rate estimator: a base charge plus a charge per sqm of land over a
+# free area, with both set per LGA
+import numpy as np
+
+from calculators.lga_tables import LGA_COLUMNS, lga_row, lga_rows_batch
+
 
 def calc_council_rates(lga: str, land_sqm: float) -> float:
-    base = 1200.0
-    var = 0.5 * max(0.0, land_sqm - 300)  # 50 cents per sqm over 300
-    # crude LGA modifier
-    mod = 1.1 if lga and "Sydney" in lga else 1.0
-    return (base + var) * mod
\ No newline at end of file
+    i = lga_row(lga)
+    base = LGA_COLUMNS["council_base"][i]
+    var = LGA_COLUMNS["council_per_sqm"][i] * max(0.0, land_sqm - LGA_COLUMNS["council_free_sqm"][i])
+    return float(base + var)
+
+
+def calc_council_rates_batch(lga, land_sqm) -> np.ndarray:
+    land = np.asarray(land_sqm, dtype=float)
+    i = lga_rows_batch(lga)
+    over = land - LGA_COLUMNS["council_free_sqm"][i]
+    return LGA_COLUMNS["council_base"][i] + LGA_COLUMNS["council_per_sqm"][i] * np.where(over > 0.0, over, 0.0)
@@ -0,0 +1,46 @@
+"""Expenses and cashflow panel as a ComputeGraph.
+
+Inputs (set by the app each rerun): price, state, owner_occ, first_home, foreign, lga, land_sqm,
+build_sqm, risk, deposit_pct, variable_rate, fixed_rate, fixed, fixed_years,
+years, io_years, extra_monthly, offset, rent_week, pm_fee_pct.
+"""
+from calculators.amortisation import amortise, rate_path, summarise
+from calculators.cashflow import calc_cashflow
+from calculators.council_rates import calc_council_rates
+from calculators.insurance import estimate_sum_insured, premium_from_risk
+from calculators.stamp_duty import calc_stamp_duty
+from core.graph import ComputeGraph
+
+
+def expenses_graph() -> ComputeGraph:
+    g = ComputeGraph()
+    g.add(
+        "stamp_duty",
+        lambda price, state, owner_occ, first_home, foreign: calc_stamp_duty(
+            price, state=state, owner_occ=owner_occ, first_home=first_home, foreign=foreign
+        ),
+        "price", "state", "owner_occ", "first_home", "foreign",
+    )
+    g.add("council", calc_council_rates, "lga", "land_sqm")
+    g.add("sum_insured", estimate_sum_insured, "build_sqm")
+    g.add("premium", premium_from_risk, "sum_insured", "risk")
+    g.add("loan", lambda price, deposit_pct: max(0.0, price * (1 - deposit_pct / 100)), "price", "deposit_pct")
+    g.add(
+        "rates",
+        # A fixed loan with no fixed period set is fixed for the whole term
+        lambda var, fixed_rate, fixed, fixed_years, years: rate_path(
+            var, years * 12, fixed_rate=(fixed_rate if fixed else None), fixed_years=(fixed_years or years)
+        ),
+        "variable_rate", "fixed_rate", "fixed", "fixed_years", "years",
+    )
+    g.add("schedule", amortise, "loan", "rates", "years", "io_years", "extra_monthly", "offset")
+    g.add("loan_summary", lambda s: {k: float(v[0]) for k, v in summarise(s).items()}, "schedule")
+    g.add("monthly_repay", lambda summary: summary["first_payment"], "loan_summary")
+    g.add("outgoings_month", lambda council, premium: council / 12.0 + premium / 12.0, "council", "premium")
+    g.add(
+        "inflow_month",
+        lambda owner_occ, rent_week, pm_fee_pct: 0 if owner_occ else rent_week * 52 / 12 * (1 - pm_fee_pct / 100),
+        "owner_occ", "rent_week", "pm_fee_pct",
+    )
+    g.add("cashflow", calc_cashflow, "inflow_month", "monthly_repay", "outgoings_month")
+    return g
@@ -1,11 +1,18 @@
 import json
 import os
 
+import numpy as np
+
+from calculators._vector import by_label
+
 DATA = os.path.join(os.path.dirname(__file__), "..", "data", "stamp_duty_rules", "insurance_cost_per_sqm.json")
 with open(os.path.abspath(DATA), "r", encoding="utf-8") as f:
     COSTS = json.load(f)
 
 
+RISK_MULT = {"low": 0.9, "medium": 1.0, "high": 1.2}
+
+
 def estimate_sum_insured(build_sqm: float) -> float:
     cost = COSTS.get("default_cost_per_sqm", 2500)
     return max(0.0, build_sqm) * cost
@@ -13,5 +20,16 @@ def estimate_sum_insured(build_sqm: float) -> float:
 
 def premium_from_risk(sum_insured: float, risk: str) -> float:
     base_rate = 0.0035  # 0.35 percent of sum insured
-    mult = {"low": 0.9, "medium": 1.0, "high": 1.2}.get(risk, 1.0)
-    return sum_insured * base_rate * mult
\ No newline at end of file
+    mult = RISK_MULT.get(risk, 1.0)
+    return sum_insured * base_rate * mult
+
+
+def estimate_sum_insured_batch(build_sqm) -> np.ndarray:
+    cost = COSTS.get("default_cost_per_sqm", 2500)
+    b = np.asarray(build_sqm, dtype=float)
+    return np.where(b > 0.0, b, 0.0) * cost
+
+
+def premium_from_risk_batch(sum_insured, risk) -> np.ndarray:
+    mult = by_label(risk, lambda r: RISK_MULT.get(r, 1.0))
+    return np.asarray(sum_insured, dtype=float) * 0.0035 * mult
@@ -0,0 +1,64 @@
+"""Per-LGA council rate and rental yield parameters.
+
+Loaded once from data/stamp_duty_rules/lga_defaults.json into columnar arrays
+with a dict from normalised LGA name to row, so scalar lookups are one dict hit
+and batch lookups gather whole columns by row index. Row 0 is the default used
+for unknown or missing LGAs.
+"""
+import json
+import os
+import re
+from typing import Dict, Optional
+
+import numpy as np
+
+from calculators._vector import by_label
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data", "stamp_duty_rules", "lga_defaults.json")
+FIELDS = ("council_base", "council_per_sqm", "council_free_sqm", "yield")
+
+# ABS names carry a status suffix such as "Blacktown (C)"; councils are often
+# written "City of Sydney" or "Penrith City Council"
+_PAREN = re.compile(r"\s*\([^)]*\)")
+_AFFIX = re.compile(r"^(city|shire|municipality) of |( city)? council$|( city)$")
+
+
+def normalise_lga(name: Optional[str]) -> str:
+    n = _PAREN.sub("", (name or "").strip().lower())
+    n = _AFFIX.sub("", n).strip()
+    return re.sub(r"\s+", " ", n)
+
+
+def _load() -> tuple:
+    with open(os.path.abspath(DATA), "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    default = raw["default"]
+    names = ["default"] + list(raw["lgas"])
+    rows = [default] + [{**default, **v} for v in raw["lgas"].values()]
+    cols = {k: np.array([float(r[k]) for r in rows]) for k in FIELDS}
+    index = {normalise_lga(n): i for i, n in enumerate(names) if i}
+    return names, cols, index
+
+
+LGA_NAMES, LGA_COLUMNS, _INDEX = _load()
+
+
+def lga_row(lga: Optional[str]) -> int:
+    return _INDEX.get(normalise_lga(lga), 0)
+
+
+def lga_params(lga: Optional[str]) -> Dict[str, float]:
+    i = lga_row(lga)
+    return {k: float(LGA_COLUMNS[k][i]) for k in FIELDS}
+
+
+def lga_rows_batch(lga) -> np.ndarray:
+    return by_label(lga, lambda n: lga_row(n), dtype=np.intp)
+
+
+def yield_for(lga: Optional[str]) -> float:
+    return float(LGA_COLUMNS["yield"][lga_row(lga)])
+
+
+def yield_batch(lga) -> np.ndarray:
+    return LGA_COLUMNS["yield"][lga_rows_batch(lga)]
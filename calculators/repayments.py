@@ -1,3 +1,8 @@
+import numpy as np
+
+from calculators._vector import by_label
+
+
 def _pni_monthly(loan_amount: float, annual_rate: float, years: int) -> float:
     if loan_amount <= 0 or years <= 0:
         return 0.0
@@ -15,10 +20,13 @@ def calc_repayments(
     repayment_type: str = "P&I",
     interest_only_years: int = 0
 ) -> float:
-    if loan_amount <= 0:
+    """First month's repayment, as amortise() schedules it. Interest only inside an
+    interest-only period (interest_only_years, or the whole term for an "IO" loan
+    without one), otherwise P&I over the full term. amortise() has the later months."""
+    if loan_amount <= 0 or years <= 0:
         return 0.0
     repayment_type = (repayment_type or "P&I").upper()
-    if repayment_type.startswith("I"):  # "IO"
+    if repayment_type.startswith("I") or interest_only_years > 0:  # "IO"
         return loan_amount * (annual_rate / 12.0)
     return float(_pni_monthly(loan_amount, annual_rate, years))
 
@@ -27,9 +35,39 @@ def pick_active_rate(
     rate_type: str,
     variable_rate_pct: float,
     fixed_rate_pct: float,
-    fixed_years: int
+    fixed_years: int,
+    month: int = 0
 ) -> float:
+    """Annual rate in force in `month` (0-based), as rate_path() builds it: a fixed
+    loan pays the fixed rate for its first fixed_years (the whole term when 0) and
+    the variable rate after that."""
     rate_type = (rate_type or "Variable").lower()
-    if rate_type.startswith("fixed"):
+    if rate_type.startswith("fixed") and (fixed_years <= 0 or month < fixed_years * 12):
         return fixed_rate_pct / 100.0
     return variable_rate_pct / 100.0
+
+
+def _pni_payment_batch(loan, r, n) -> np.ndarray:
+    # _pni_monthly over arrays, taking the monthly rate and a count of months
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        f = (1 + r) ** n
+        pmt = loan * (r * f) / (f - 1)
+        flat = loan / n
+    pmt = np.where(r == 0, flat, pmt)
+    return np.where((loan <= 0) | (n <= 0), 0.0, pmt)
+
+
+def _pni_monthly_batch(loan_amount, annual_rate, years) -> np.ndarray:
+    loan = np.asarray(loan_amount, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 12.0
+    return _pni_payment_batch(loan, r, np.asarray(years) * 12)
+
+
+def calc_repayments_batch(loan_amount, annual_rate, years, repayment_type="P&I", interest_only_years=0) -> np.ndarray:
+    """Array version of calc_repayments; every argument may be a scalar or an array."""
+    loan = np.asarray(loan_amount, dtype=float)
+    rate = np.asarray(annual_rate, dtype=float)
+    io = by_label(repayment_type, lambda t: (t or "P&I").upper().startswith("I"), dtype=bool)
+    io = io | (np.asarray(interest_only_years) > 0)
+    out = np.where(io, loan * (rate / 12.0), _pni_monthly_batch(loan, rate, years))
+    return np.where((loan <= 0) | (np.asarray(years) <= 0), 0.0, out)
@@ -1,25 +1,271 @@
+import bisect
+import datetime as dt
+import glob
 import json
 import os
+from typing import Dict, List, Optional, Tuple
 
-DATA = os.path.join(os.path.dirname(__file__), "..", "data", "stamp_duty_rules", "nsw.json")
+import numpy as np
 
-with open(os.path.abspath(DATA), "r", encoding="utf-8") as f:
-    NSW_RULES = json.load(f)
+from calculators._vector import by_label
+from core import store
+from models.facts import state_code
 
+RULES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "stamp_duty_rules"))
+# Rule files are the upper-case state code in lower case; the other JSON here is not duty
+RULE_FILES = ("act", "nsw", "nt", "qld", "sa", "tas", "vic", "wa")
+COMPILED_NAME = "stamp_duty.compiled.npz"
+COMPILED_VERSION = 2
 
-def calc_stamp_duty(price: float, state: str = "NSW", owner_occ: bool = True) -> float:
-    if state.upper() != "NSW":
+FALLBACK_RATE = 0.045  # states without a rules file
+
+
+class Schedule:
+    """One state's duty rules from an effective date, compiled for lookup.
+
+    Bands are held both as Python lists, for bisect in the scalar path, and as
+    NumPy arrays for searchsorted in the batch path. Bands are contiguous with
+    inclusive upper edges, so the band for a price is the first whose high is
+    >= price.
+    """
+
+    __slots__ = ("state", "effective_from", "bands", "oo_bands", "oo_discount",
+                 "fhb_exempt", "fhb_limit", "fhb_phase", "fhb_rate", "foreign")
+
+    def __init__(self, state: str, raw: dict):
+        self.state = state
+        self.effective_from = dt.date.fromisoformat(raw["effective_from"])
+        self.bands = _compile_bands(raw["bands"])
+        self.oo_bands = _compile_bands(raw["owner_occ_bands"]) if raw.get("owner_occ_bands") else None
+        self.oo_discount = float(raw.get("owner_occ_discount_pct") or 0.0)
+        fhb = raw.get("first_home") or {}
+        self.fhb_exempt = float(fhb.get("exempt_up_to", 0.0))
+        self.fhb_limit = float(fhb.get("concession_up_to", self.fhb_exempt))
+        self.fhb_phase = fhb.get("phase", "proportional")
+        self.fhb_rate = float(fhb.get("rate", 0.0))
+        self.foreign = float(raw.get("foreign_surcharge") or 0.0)
+
+    @classmethod
+    def from_compiled(cls, state: str, scalars: dict, bands: np.ndarray, oo_bands: Optional[np.ndarray]) -> "Schedule":
+        s = cls.__new__(cls)
+        s.state = state
+        s.effective_from = dt.date.fromisoformat(scalars["effective_from"])
+        s.bands = _bands_from_array(bands)
+        s.oo_bands = _bands_from_array(oo_bands) if oo_bands is not None else None
+        for k in _SCALARS:
+            setattr(s, k, scalars[k])
+        return s
+
+    def scalars(self) -> dict:
+        out = {k: getattr(self, k) for k in _SCALARS}
+        out["effective_from"] = self.effective_from.isoformat()
+        return out
+
+
+_SCALARS = ("oo_discount", "fhb_exempt", "fhb_limit", "fhb_phase", "fhb_rate", "foreign")
+
+Bands = Tuple[List[float], List[float], List[float], List[float], np.ndarray]
+
+
+def _compile_bands(bands: List[dict]) -> Bands:
+    bands = sorted(bands, key=lambda b: b["low"])
+    for prev, cur in zip(bands, bands[1:]):
+        if prev["high"] != cur["low"]:
+            raise ValueError(f"bands not contiguous at {prev['high']} / {cur['low']}")
+    lows = [float(b["low"]) for b in bands]
+    highs = [float("inf") if b["high"] is None else float(b["high"]) for b in bands]
+    rates = [float(b["rate"]) for b in bands]
+    bases = [float(b.get("base", 0.0)) for b in bands]
+    return lows, highs, rates, bases, np.array([lows, highs, rates, bases])
+
+
+def _bands_from_array(arr: np.ndarray) -> Bands:
+    lows, highs, rates, bases = arr.tolist()
+    return lows, highs, rates, bases, arr
+
+
+def compile_rules(rules_dir: str = RULES_DIR) -> Dict[str, Tuple[List[dt.date], List[Schedule]]]:
+    """Parse every state's JSON into schedules sorted by effective date."""
+    tables = {}
+    for name in RULE_FILES:
+        path = os.path.join(rules_dir, f"{name}.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        state = raw.get("state", name.upper())
+        schedules = sorted((Schedule(state, s) for s in raw["schedules"]), key=lambda s: s.effective_from)
+        tables[state] = ([s.effective_from for s in schedules], schedules)
+    return tables
+
+
+def _fingerprint(rules_dir: str) -> str:
+    files = sorted(glob.glob(os.path.join(rules_dir, "*.json")))
+    return json.dumps([COMPILED_VERSION] + [[os.path.basename(p), os.stat(p).st_mtime_ns, os.stat(p).st_size]
+                                            for p in files])
+
+
+def _save_compiled(path: str, fp: str, tables) -> None:
+    # Arrays plus a JSON header in an .npz: loading it never unpickles anything
+    meta: Dict[str, object] = {"fingerprint": fp, "states": {}}
+    arrays = {}
+    for state, (_, schedules) in tables.items():
+        for i, s in enumerate(schedules):
+            arrays[f"{state}.{i}.bands"] = s.bands[4]
+            if s.oo_bands is not None:
+                arrays[f"{state}.{i}.oo_bands"] = s.oo_bands[4]
+        meta["states"][state] = [s.scalars() for s in schedules]
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp, path)
+
+
+def _load_compiled(path: str, fp: str):
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"]))
+        if meta["fingerprint"] != fp:
+            return None
+        tables = {}
+        for state, rows in meta["states"].items():
+            schedules = [Schedule.from_compiled(state, row, z[f"{state}.{i}.bands"],
+                                                z[f"{state}.{i}.oo_bands"] if f"{state}.{i}.oo_bands" in z.files else None)
+                         for i, row in enumerate(rows)]
+            tables[state] = ([s.effective_from for s in schedules], schedules)
+    return tables
+
+
+def load_rules(rules_dir: str = RULES_DIR, cache_dir: Optional[str] = None):
+    """Compiled tables from the .npz artefact in cache_dir (default PROPLENS_CACHE_DIR)
+    if it matches the JSON on disk (by name, size and mtime, so no JSON is read),
+    else compile and rewrite it. Without a cache dir, compile per process."""
+    cache_dir = cache_dir or store.CACHE_DIR
+    if not cache_dir:
+        return compile_rules(rules_dir)
+    artefact = os.path.join(cache_dir, COMPILED_NAME)
+    fp = _fingerprint(rules_dir)
+    try:
+        tables = _load_compiled(artefact, fp)
+        if tables is not None:
+            return tables
+    except (OSError, KeyError, ValueError):
+        pass
+    tables = compile_rules(rules_dir)
+    try:
+        _save_compiled(artefact, fp, tables)
+    except OSError:
+        pass  # read-only cache dir: compile per process
+    return tables
+
+
+RULES = load_rules()
+
+
+def _as_date(on) -> dt.date:
+    if on is None:
+        return dt.date.today()
+    if isinstance(on, str):
+        return dt.date.fromisoformat(on)
+    if isinstance(on, dt.datetime):
+        return on.date()
+    return on
+
+
+def schedule_for(state: str, on=None) -> Optional[Schedule]:
+    """Rules in force for state (a code or full name) on a date (default today), or None
+    if the state has no rules file. Dates before the first schedule use the earliest one."""
+    table = RULES.get(state_code(state) or "")
+    if table is None:
+        return None
+    dates, schedules = table
+    return schedules[max(0, bisect.bisect_right(dates, _as_date(on)) - 1)]
+
+
+def _band_duty(bands: Bands, price: float) -> float:
+    lows, highs, rates, bases, _ = bands
+    if not price >= lows[0]:
+        return 0.0
+    i = min(bisect.bisect_left(highs, price), len(highs) - 1)
+    return bases[i] + (price - lows[i]) * rates[i]
+
+
+def _fhb(s: Schedule, price: float, duty: float) -> float:
+    if price <= s.fhb_exempt:
+        return 0.0
+    if price >= s.fhb_limit:
+        return duty
+    if s.fhb_phase == "excess_rate":
+        return min(duty, (price - s.fhb_exempt) * s.fhb_rate)
+    return duty * (price - s.fhb_exempt) / (s.fhb_limit - s.fhb_exempt)
+
+
+def calc_stamp_duty(price: float, state: str = "NSW", owner_occ: bool = True,
+                    first_home: bool = False, foreign: bool = False, on=None) -> float:
+    """Transfer duty on a residential purchase under the rules in force on `on`.
+
+    Owner occupiers use the state's home concession bands where it has them.
+    First home buyer exemptions and concessions apply to owner occupiers who are
+    not foreign purchasers. Foreign purchasers pay the state surcharge on the price.
+    """
+    s = schedule_for(state, on)
+    if s is None:
         # Fallback simple percent
-        return price * 0.045
-    duty = 0.0
-    for band in NSW_RULES["bands"]:
-        low = band["low"]
-        high = band["high"]
-        rate = band["rate"]
-        base = band.get("base", 0.0)
-        if price >= low and (high is None or price <= high):
-            duty = base + (price - low) * rate
-            break
-    if owner_occ and NSW_RULES.get("owner_occ_discount_pct"):
-        duty = max(0.0, duty * (1 - NSW_RULES["owner_occ_discount_pct"]))
-    return duty
\ No newline at end of file
+        return price * FALLBACK_RATE
+    duty = _band_duty(s.oo_bands if owner_occ and s.oo_bands else s.bands, price)
+    if owner_occ and s.oo_discount:
+        duty = max(0.0, duty * (1 - s.oo_discount))
+    if first_home and owner_occ and not foreign and s.fhb_limit:
+        duty = _fhb(s, price, duty)
+    if foreign and s.foreign and price > 0:
+        duty += price * s.foreign
+    return duty
+
+
+def _pos(x: np.ndarray) -> np.ndarray:
+    # max(0.0, x) with the scalar semantics, NaN included
+    return np.where(x > 0.0, x, 0.0)
+
+
+def _band_duty_batch(bands: Bands, prices: np.ndarray) -> np.ndarray:
+    lows, highs, rates, bases = bands[4]
+    idx = np.minimum(np.searchsorted(highs, prices, side="left"), len(highs) - 1)
+    duty = bases[idx] + (prices - lows[idx]) * rates[idx]
+    return np.where(prices >= lows[0], duty, 0.0)
+
+
+def _schedule_batch(s: Schedule, prices, owner_occ, first_home, foreign) -> np.ndarray:
+    duty = _band_duty_batch(s.bands, prices)
+    if s.oo_bands:
+        duty = np.where(owner_occ, _band_duty_batch(s.oo_bands, prices), duty)
+    if s.oo_discount:
+        duty = np.where(owner_occ, _pos(duty * (1 - s.oo_discount)), duty)
+    if s.fhb_limit:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if s.fhb_phase == "excess_rate":
+                phased = np.minimum(duty, (prices - s.fhb_exempt) * s.fhb_rate)
+            else:
+                phased = duty * (prices - s.fhb_exempt) / (s.fhb_limit - s.fhb_exempt)
+        conc = np.where(prices <= s.fhb_exempt, 0.0, np.where(prices >= s.fhb_limit, duty, phased))
+        duty = np.where(first_home & owner_occ & ~foreign, conc, duty)
+    if s.foreign:
+        duty = np.where(foreign & (prices > 0), duty + prices * s.foreign, duty)
+    return duty
+
+
+def calc_stamp_duty_batch(prices, state="NSW", owner_occ=True, first_home=False, foreign=False, on=None) -> np.ndarray:
+    """Array version of calc_stamp_duty. Every argument but `on` may be a scalar or an array."""
+    prices = np.asarray(prices, dtype=float)
+    shape = np.broadcast_shapes(prices.shape, np.shape(state), np.shape(owner_occ), np.shape(first_home), np.shape(foreign))
+    prices = np.broadcast_to(prices, shape)
+    flags = [np.broadcast_to(np.asarray(f, dtype=bool), shape) for f in (owner_occ, first_home, foreign)]
+    states = sorted(RULES)
+    idx = np.broadcast_to(by_label(state, lambda s: states.index(state_code(s)) if state_code(s) in RULES else -1, dtype=int), shape)
+    out = prices * FALLBACK_RATE
+    for i, code in enumerate(states):
+        mask = idx == i
+        if not mask.any():
+            continue
+        duty = _schedule_batch(schedule_for(code, on), prices, *flags)
+        if mask.all():
+            return duty
+        out = np.where(mask, duty, out)
+    return out
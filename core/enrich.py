@@ -0,0 +1,95 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.estimator import estimate_facts
+from core.facts_cache import FACTS
+from core.fetch_pool import Attempt
+from core.fusion import PageFacts, fuse_pages, with_provenance
+from core.normalise import merge_facts, normalise_jsonld
+from models.facts import AddressResolved, FieldValue, PropertyFacts
+from providers.jsonld_extractor import extract_schema_org
+from providers.nsw_open_data import try_open_parcel
+from providers.portal_finders import find_candidate_urls
+
+# Seconds an interactive lookup waits for candidate pages before answering with what it has
+FUSION_BUDGET_SEC = float(os.getenv("PROPLENS_FUSION_BUDGET_SEC", "5"))
+
+
+def format_source(url: str, allowed: bool, fetched: bool, fetched_at: float) -> str:
+    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(fetched_at))
+    if allowed and fetched:
+        return f"{url} [robots: allowed] [ts: {ts}]"
+    if not allowed:
+        return f"{url} [robots: disallowed] [ts: {ts}]"
+    return f"{url} [robots: allowed, no JSON-LD] [ts: {ts}]"
+
+
+def page_facts(url: str) -> PageFacts:
+    """One candidate page's normalised fields, each tagged with the page URL."""
+    data, allowed, fetched = extract_schema_org(url)
+    return (with_provenance(normalise_jsonld(data), url) if data else {}), allowed, fetched
+
+
+def _sources(attempts: List[Attempt]) -> List[str]:
+    out = []
+    for a in attempts:
+        if a.error is not None:
+            out.append(format_source(a.url, True, False, a.ts))
+        else:
+            _, allowed, fetched = a.result
+            out.append(format_source(a.url, allowed, fetched, a.ts))
+    return out
+
+
+def extract_jsonld(
+    urls: List[str],
+    budget_sec: Optional[float] = None,
+    on_refined: Optional[Callable[[Dict[str, FieldValue], List[str]], None]] = None,
+) -> Tuple[Dict[str, FieldValue], List[str]]:
+    """Fields fused across every candidate page, and a source line per page tried.
+    With a budget, see core.fusion.fuse_pages for the early return and refinement."""
+    refined = (lambda fused, attempts: on_refined(fused, _sources(attempts))) if on_refined else None
+    fused, attempts, _ = fuse_pages(urls, page_facts, budget_sec, refined)
+    return fused, _sources(attempts)
+
+
+def fetch_jsonld(address: AddressResolved, budget_sec: Optional[float] = None,
+                 on_refined: Optional[Callable[[Dict[str, FieldValue], List[str]], None]] = None
+                 ) -> Tuple[Dict[str, FieldValue], List[str]]:
+    """Portal search, concurrent page fetches and fusion for one address."""
+    return extract_jsonld(find_candidate_urls(address), budget_sec, on_refined)
+
+
+def build_facts(address: AddressResolved, jsonld_map: Optional[Dict[str, FieldValue]], source_urls: List[str]) -> PropertyFacts:
+    open_parcel = try_open_parcel(address)
+    land_hint = float(open_parcel["land_sqm"]) if open_parcel and open_parcel.get("land_sqm") else None
+    est = estimate_facts(address, land_hint)
+    return merge_facts(
+        address=address,
+        jsonld_map=jsonld_map,
+        open_data=open_parcel,
+        estimated_map=est,
+        source_urls=source_urls,
+    )
+
+
+def enrich_address(address: AddressResolved, allow_web_fetch: bool = True, budget_sec: Optional[float] = None,
+                   on_refined: Optional[Callable[[PropertyFacts], None]] = None) -> PropertyFacts:
+    """Facts for one address. With budget_sec, returns what the pages fetched by then
+    agree on; on_refined then gets the facts over every page if the rest changed them."""
+    if not allow_web_fetch:
+        return build_facts(address, {}, [])
+    refined = (lambda fused, sources: on_refined(build_facts(address, fused, sources))) if on_refined else None
+    jsonld_map, sources = fetch_jsonld(address, budget_sec, refined)
+    return build_facts(address, jsonld_map, sources)
+
+
+def enrich_address_cached(address: AddressResolved) -> Tuple[PropertyFacts, str, float]:
+    """enrich_address with web fetch under FUSION_BUDGET_SEC, served from the shared
+    facts cache. Returns (facts, status, fetched_at); stale entries are refreshed in
+    the background, and pages that land after the budget update the cached entry."""
+    def enrich(a: AddressResolved) -> PropertyFacts:
+        return enrich_address(a, budget_sec=FUSION_BUDGET_SEC, on_refined=lambda facts: FACTS.put(a, facts))
+
+    return FACTS.get(address, enrich)
@@ -0,0 +1,381 @@
+"""Per-locality distributions of property facts, for filling fields no page gave us.
+
+Observed facts (anything not itself an estimate) are counted into fixed-bin
+histograms per row, where a row is a locality (suburb, postcode, state or the
+whole country) crossed with a condition (dwelling class, land size band, or any).
+Histograms add, so new facts only bump counts; the history is never re-read.
+
+From the counts we derive a quantile table per row: median, p10, p90, the
+calibrated confidence that the median is right (probability mass on the median
+bin, or within BUILD_TOL of it for build size, shrunk towards the national
+distribution for thin rows) and the sample count. Counts and table are .npy files
+memory-mapped at load, and a row index maps keys to rows, so a lookup is a dict
+get and an array read.
+
+    python -m core.estimator update facts.jsonl
+    python -m core.estimator query 2000 "Surry Hills" NSW --land 120
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core import store
+from core.normalise import estimate_from_heuristics
+from models.facts import AddressResolved, FieldValue, PropertyFacts, state_code
+
+ESTIMATOR_DIR = os.getenv("PROPLENS_ESTIMATOR_DIR") or (os.path.join(store.CACHE_DIR, "estimator") if store.CACHE_DIR else None)
+RELOAD_SEC = 60.0  # how often a served estimator checks for a newer table
+TABLE_VERSION = 2  # 2: state keys are codes (state_code), not the state as written
+
+MIN_SAMPLES = 5  # fewer observations than this and the next coarser locality is used
+PRIOR_WEIGHT = 10.0  # pseudo-observations of the national distribution in every row
+BUILD_TOL = 0.2  # a build size estimate counts as right within +-20%
+
+COUNT_BINS = {"beds": 9, "baths": 6, "cars": 6}  # values 0..n-1, the last bin is "n-1 or more"
+BUILD_EDGES = np.geomspace(30.0, 1200.0, 33)
+BUILD_CENTRES = np.sqrt(BUILD_EDGES[:-1] * BUILD_EDGES[1:])
+DWELLING_CLASSES = ("House", "Apartment")
+HOUSE_TYPES = {"house", "singlefamilyresidence", "residence", "townhouse", "duplex", "villa", "semi-detached"}
+UNIT_TYPES = {"apartment", "unit", "flat", "studio", "condominium", "apartmentcomplex"}
+LAND_BANDS = (250.0, 450.0, 700.0)
+
+FIELDS = ("dwelling_type", "beds", "baths", "cars", "build_sqm")
+STATS = ("value", "p10", "p90", "confidence", "n")
+
+
+def _layout() -> Dict[str, slice]:
+    widths = {"dwelling_type": len(DWELLING_CLASSES), **COUNT_BINS, "build_sqm": len(BUILD_CENTRES)}
+    out, start = {}, 0
+    for f in FIELDS:
+        out[f] = slice(start, start + widths[f])
+        start += widths[f]
+    return out
+
+
+COLUMNS = _layout()
+N_COLUMNS = COLUMNS[FIELDS[-1]].stop
+
+
+def _bin_values(field: str) -> np.ndarray:
+    if field == "build_sqm":
+        return BUILD_CENTRES
+    return np.arange(COLUMNS[field].stop - COLUMNS[field].start, dtype=float)
+
+
+def _hit_window(field: str) -> np.ndarray:
+    """(bins, bins) bool: which bins count as a correct estimate when the median is bin i."""
+    centres = _bin_values(field)
+    if field != "build_sqm":
+        return np.eye(len(centres), dtype=bool)
+    return np.abs(np.log(centres[None, :] / centres[:, None])) <= np.log1p(BUILD_TOL)
+
+
+WINDOWS = {f: _hit_window(f) for f in FIELDS}
+
+
+# --- keys --------------------------------------------------------------------------
+
+def _clean(s: Optional[str]) -> str:
+    return " ".join((s or "").upper().split())
+
+
+def localities(address: AddressResolved) -> List[str]:
+    """Most to least specific. The state is keyed by its code, so training rows with
+    "NSW" and geocoded addresses with "New South Wales" share rows."""
+    state = state_code(address.state) or ""
+    out = []
+    if address.suburb and state:
+        out.append(f"sub:{state}:{_clean(address.suburb)}")
+    if address.postcode:
+        out.append(f"pc:{_clean(address.postcode)}")
+    if state:
+        out.append(f"st:{state}")
+    out.append("*")
+    return out
+
+
+def dwelling_class(value) -> Optional[int]:
+    t = str(value or "").strip().lower()
+    if t in HOUSE_TYPES:
+        return 0
+    if t in UNIT_TYPES:
+        return 1
+    return None
+
+
+def land_band(land_sqm: Optional[float]) -> Optional[int]:
+    if not land_sqm or land_sqm <= 0:
+        return None
+    return int(np.searchsorted(LAND_BANDS, land_sqm, side="right"))
+
+
+def _observed(fv: Optional[FieldValue]):
+    if fv is None or fv.value is None or fv.source == "estimated":
+        return None
+    return fv.value
+
+
+def _num(value) -> Optional[float]:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if np.isfinite(v) and v >= 0 else None
+
+
+def observation(facts: PropertyFacts) -> Tuple[List[str], List[int]]:
+    """(row keys, histogram columns) one PropertyFacts contributes to."""
+    cols = []
+    dclass = dwelling_class(_observed(facts.dwelling_type))
+    if dclass is not None:
+        cols.append(COLUMNS["dwelling_type"].start + dclass)
+    for field, bins in COUNT_BINS.items():
+        v = _num(_observed(getattr(facts, field)))
+        if v is not None:
+            cols.append(COLUMNS[field].start + min(int(round(v)), bins - 1))
+    build = _num(_observed(facts.build_sqm))
+    if build:
+        b = int(np.clip(np.searchsorted(BUILD_EDGES, build, side="right") - 1, 0, len(BUILD_CENTRES) - 1))
+        cols.append(COLUMNS["build_sqm"].start + b)
+    if not cols:
+        return [], []
+    conds = ["*"]
+    if dclass is not None:
+        conds.append(DWELLING_CLASSES[dclass])
+    band = land_band(_num(_observed(facts.land_sqm)))
+    if band is not None:
+        conds.append(f"land{band}")
+    return [f"{loc}|{c}" for loc in localities(facts.address) for c in conds], cols
+
+
+# --- table -------------------------------------------------------------------------
+
+def quantile_table(counts: np.ndarray) -> np.ndarray:
+    """(rows, len(FIELDS), len(STATS)) float32 from (rows, N_COLUMNS) counts.
+    Row 0 must be the national row, which is every other row's prior."""
+    table = np.zeros((len(counts), len(FIELDS), len(STATS)), dtype=np.float32)
+    for j, field in enumerate(FIELDS):
+        h = counts[:, COLUMNS[field]].astype(np.float64)
+        n = h.sum(axis=1)
+        safe = np.maximum(n, 1.0)[:, None]
+        cdf = np.cumsum(h, axis=1) / safe
+        values = _bin_values(field)
+        med = np.argmax(cdf >= 0.5, axis=1)
+        if field == "dwelling_type":
+            med = np.argmax(h, axis=1)  # a mode, the two classes having no order
+        window = WINDOWS[field][med]
+        hit = (h * window).sum(axis=1)
+        g = h[0] if len(h) else np.zeros(h.shape[1])
+        prior = (window * g).sum(axis=1) / max(g.sum(), 1.0)
+        table[:, j, 0] = values[med]
+        table[:, j, 1] = values[np.argmax(cdf >= 0.1, axis=1)]
+        table[:, j, 2] = values[np.argmax(cdf >= 0.9, axis=1)]
+        table[:, j, 3] = (hit + PRIOR_WEIGHT * prior) / (n + PRIOR_WEIGHT)
+        table[:, j, 4] = n
+    return table
+
+
+class LocalityEstimator:
+    """Counts, quantile table and row index in one directory.
+
+    Reading is lock-free over memory-mapped arrays. add() and ingest_jsonl() copy
+    the counts into memory on first use and save() writes all three files back;
+    one process should own updates.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.keys: List[str] = ["*|*"]
+        self.rows: Dict[str, int] = {"*|*": 0}
+        self.sources: Dict[str, int] = {}  # JSONL path -> bytes already counted
+        self.counts = np.zeros((1, N_COLUMNS), dtype=np.uint32)
+        self.table = quantile_table(self.counts)
+        if path and os.path.exists(os.path.join(path, "index.json")):
+            self._load()
+
+    # --- persistence ---
+
+    def _load(self) -> None:
+        with open(os.path.join(self.path, "index.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != TABLE_VERSION:
+            return
+        # Files are replaced counts, table, index; rows are only appended, so an
+        # index read before the arrays still lines up with them
+        self.counts = np.load(os.path.join(self.path, "counts.npy"), mmap_mode="r")
+        self.table = np.load(os.path.join(self.path, "table.npy"), mmap_mode="r")
+        self.keys = meta["keys"]
+        self.rows = {k: i for i, k in enumerate(self.keys)}
+        self.sources = meta.get("sources", {})
+
+    def save(self) -> None:
+        if not self.path:
+            raise ValueError("estimator has no directory")
+        os.makedirs(self.path, exist_ok=True)
+        for name, arr in (("counts", self.counts), ("table", self.table)):
+            tmp = os.path.join(self.path, f"{name}.{os.getpid()}.tmp.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(self.path, f"{name}.npy"))
+        tmp = os.path.join(self.path, f"index.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": TABLE_VERSION, "keys": self.keys, "sources": self.sources}, f)
+        os.replace(tmp, os.path.join(self.path, "index.json"))
+
+    # --- updates ---
+
+    def add(self, facts: Iterable[PropertyFacts]) -> int:
+        """Count observed fields of each PropertyFacts. Returns how many contributed."""
+        row_ids, col_ids, used = [], [], 0
+        for f in facts:
+            keys, cols = observation(f)
+            if not cols:
+                continue
+            used += 1
+            for k in keys:
+                r = self.rows.get(k)
+                if r is None:
+                    r = self.rows[k] = len(self.keys)
+                    self.keys.append(k)
+                row_ids.extend([r] * len(cols))
+                col_ids.extend(cols)
+        if not used:
+            return 0
+        counts = np.array(self.counts)  # off the memory map
+        if len(self.keys) > len(counts):
+            counts = np.vstack([counts, np.zeros((len(self.keys) - len(counts), N_COLUMNS), dtype=counts.dtype)])
+        np.add.at(counts, (np.asarray(row_ids), np.asarray(col_ids)), 1)
+        self.counts = counts
+        self.table = quantile_table(counts)
+        return used
+
+    def ingest_jsonl(self, path: str) -> int:
+        """Count the facts appended to a pipeline JSONL output since the last call.
+        Only complete lines are consumed, so a file still being written is safe."""
+        key = os.path.abspath(path)
+        offset = self.sources.get(key, 0)
+        if os.path.getsize(path) < offset:
+            offset = 0  # replaced or truncated: a new file
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        facts = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                d = json.loads(line)
+                d.pop("key", None)
+                facts.append(PropertyFacts.model_validate(d))
+            except ValueError:
+                continue
+        used = self.add(facts)
+        self.sources[key] = offset + end
+        return used
+
+    # --- lookup ---
+
+    def stats(self, key: str, field: str) -> Optional[Dict[str, float]]:
+        r = self.rows.get(key)
+        if r is None or r >= len(self.table):
+            return None
+        return dict(zip(STATS, self.table[r, FIELDS.index(field)].tolist()))
+
+    def _best(self, locs: Sequence[str], conds: Sequence[str], field: str) -> Optional[np.ndarray]:
+        j = FIELDS.index(field)
+        for loc in locs:
+            for cond in conds:
+                r = self.rows.get(f"{loc}|{cond}")
+                if r is not None and r < len(self.table) and self.table[r, j, 4] >= MIN_SAMPLES:
+                    return self.table[r, j]
+        return None
+
+    def estimate(self, address: AddressResolved, land_sqm: Optional[float]) -> Dict[str, FieldValue]:
+        """Same shape as estimate_from_heuristics. Fields without enough local data
+        keep the heuristic guess."""
+        out = estimate_from_heuristics(address, land_sqm)
+        locs = localities(address)
+        band = land_band(land_sqm)
+        row = self._best(locs, ([f"land{band}"] if band is not None else []) + ["*"], "dwelling_type")
+        if row is not None:
+            dclass = int(row[0])
+            out["dwelling_type"] = FieldValue(value=DWELLING_CLASSES[dclass], source="estimated",
+                                              confidence=round(float(row[3]), 3))
+        else:
+            dclass = dwelling_class(out["dwelling_type"].value)
+        conds = [DWELLING_CLASSES[dclass], "*"] if dclass is not None else ["*"]
+        for field in ("beds", "baths", "cars", "build_sqm"):
+            row = self._best(locs, conds, field)
+            if row is None:
+                continue
+            value = round(float(row[0]), 0) if field == "build_sqm" else int(row[0])
+            out[field] = FieldValue(value=value, source="estimated", confidence=round(float(row[3]), 3))
+        return out
+
+
+_estimator: Optional[LocalityEstimator] = None
+_checked_at = 0.0
+_loaded_mtime = 0
+_lock = threading.Lock()
+
+
+def get_estimator() -> Optional[LocalityEstimator]:
+    """The table in ESTIMATOR_DIR, re-read at most every RELOAD_SEC when an updater
+    has written a newer one; None when no table has been built."""
+    global _estimator, _checked_at, _loaded_mtime
+    if not ESTIMATOR_DIR:
+        return None
+    now = time.monotonic()
+    if _estimator is not None and now - _checked_at < RELOAD_SEC:
+        return _estimator
+    with _lock:
+        _checked_at = now
+        try:
+            mtime = os.stat(os.path.join(ESTIMATOR_DIR, "index.json")).st_mtime_ns
+        except OSError:
+            return _estimator
+        if mtime != _loaded_mtime:
+            _estimator, _loaded_mtime = LocalityEstimator(ESTIMATOR_DIR), mtime
+    return _estimator
+
+
+def estimate_facts(address: AddressResolved, land_sqm: Optional[float]) -> Dict[str, FieldValue]:
+    """Locality estimates where a table exists, the plain heuristics otherwise."""
+    est = get_estimator()
+    return est.estimate(address, land_sqm) if est is not None else estimate_from_heuristics(address, land_sqm)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Build or query the locality estimator tables.")
+    ap.add_argument("--dir", default=ESTIMATOR_DIR, help="table directory (default PROPLENS_ESTIMATOR_DIR)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    u = sub.add_parser("update", help="count new lines of pipeline JSONL outputs")
+    u.add_argument("jsonl", nargs="+")
+    q = sub.add_parser("query", help="estimate for a locality")
+    q.add_argument("postcode")
+    q.add_argument("suburb")
+    q.add_argument("state")
+    q.add_argument("--land", type=float)
+    args = ap.parse_args(argv)
+    if not args.dir:
+        ap.error("no table directory: pass --dir or set PROPLENS_ESTIMATOR_DIR or PROPLENS_CACHE_DIR")
+
+    est = LocalityEstimator(args.dir)
+    if args.cmd == "update":
+        t0 = time.perf_counter()
+        used = sum(est.ingest_jsonl(p) for p in args.jsonl)
+        est.save()
+        print(json.dumps({"facts": used, "rows": len(est.keys), "sec": round(time.perf_counter() - t0, 2)}))
+    else:
+        addr = AddressResolved(query="", display_name="", lat=0.0, lon=0.0, suburb=args.suburb,
+                               state=args.state, postcode=args.postcode, lga=None)
+        print(json.dumps({k: v.model_dump() for k, v in est.estimate(addr, args.land).items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
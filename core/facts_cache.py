@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from core import store
+from core.single_flight import SingleFlight
+from models.facts import AddressResolved, PropertyFacts
+
+FRESH_SEC = 24 * 3600.0  # served as-is
+MAX_AGE_SEC = 30 * 24 * 3600.0  # served stale while a refresh runs; older is a miss
+REFRESH_LEASE_SEC = 120.0  # how long one process owns a background refresh
+MAX_ENTRIES = 20_000
+KEY_DECIMALS = 4  # about 11 m of latitude
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+
+def facts_key(address: AddressResolved) -> str:
+    """Rounded coordinates plus postcode, so the same property reached through
+    differently spelt queries or geocoders shares one entry."""
+    return f"{round(address.lat, KEY_DECIMALS):.{KEY_DECIMALS}f},{round(address.lon, KEY_DECIMALS):.{KEY_DECIMALS}f}|{address.postcode or ''}"
+
+
+class FactsStats:
+    __slots__ = ("lookups", "fresh", "stale", "misses", "coalesced", "refreshes", "refresh_errors", "evictions")
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class FactsCache:
+    """Merged PropertyFacts per address in a SQLite table shared by every process
+    that opens the same path, with stale-while-revalidate reads.
+
+    Entries younger than fresh_sec are returned directly. Older ones, up to
+    max_age_sec, are returned at once while a background thread re-enriches the
+    address; a lease column makes sure only one process refreshes a key at a time.
+    Misses enrich synchronously, with concurrent misses for a key sharing one call.
+    The cached facts keep their source_urls, whose timestamps record when each page
+    was actually fetched. Past max_entries the least recently read rows go.
+    """
+
+    def __init__(self, path: str = store.MEMORY, fresh_sec: float = FRESH_SEC, max_age_sec: float = MAX_AGE_SEC,
+                 max_entries: int = MAX_ENTRIES, clock: Callable[[], float] = time.time, refresh_workers: int = 2):
+        self.fresh_sec = fresh_sec
+        self.max_age_sec = max_age_sec
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = FactsStats()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="facts-refresh")
+        self._conn = store.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS facts ("
+            " key TEXT PRIMARY KEY, facts TEXT, fetched_at REAL, accessed_at REAL, refresh_until REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS facts_accessed ON facts(accessed_at)")
+
+    def _load(self, key: str) -> Optional[Tuple[PropertyFacts, float]]:
+        with self._lock:
+            row = self._conn.execute("SELECT facts, fetched_at FROM facts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE facts SET accessed_at = ? WHERE key = ?", (self.clock(), key))
+        return PropertyFacts.model_validate_json(row[0]), row[1]
+
+    def put(self, address: AddressResolved, facts: PropertyFacts) -> None:
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?, NULL)",
+                (facts_key(address), facts.model_dump_json(), now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        cur = self._conn.execute(
+            "DELETE FROM facts WHERE key IN (SELECT key FROM facts ORDER BY accessed_at LIMIT ?)",
+            (count - self.max_entries,),
+        )
+        self.stats.evictions += cur.rowcount
+
+    def _claim(self, key: str) -> bool:
+        # Atomic across processes: only the UPDATE that finds no live lease wins
+        now = self.clock()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE facts SET refresh_until = ? WHERE key = ? AND (refresh_until IS NULL OR refresh_until < ?)",
+                (now + REFRESH_LEASE_SEC, key, now),
+            )
+        return cur.rowcount == 1
+
+    def _refresh(self, key: str, address: AddressResolved, enrich: Callable[[AddressResolved], PropertyFacts]) -> None:
+        try:
+            facts = enrich(address)
+        except Exception:
+            self.stats.refresh_errors += 1
+            with self._lock:
+                self._conn.execute("UPDATE facts SET refresh_until = NULL WHERE key = ?", (key,))
+            return
+        self.put(address, facts)
+        self.stats.refreshes += 1
+
+    def get(self, address: AddressResolved,
+            enrich: Callable[[AddressResolved], PropertyFacts]) -> Tuple[PropertyFacts, str, float]:
+        """Returns (facts, status, fetched_at); status is FRESH, STALE or MISS."""
+        key = facts_key(address)
+        self.stats.lookups += 1
+        hit = self._load(key)
+        if hit is not None:
+            facts, fetched_at = hit
+            age = self.clock() - fetched_at
+            if age < self.max_age_sec:
+                # The cached facts may have come through another spelling of the address
+                facts = facts.model_copy(update={"address": address})
+                if age < self.fresh_sec:
+                    self.stats.fresh += 1
+                    return facts, FRESH, fetched_at
+                self.stats.stale += 1
+                if self._claim(key):
+                    self._pool.submit(self._refresh, key, address, enrich)
+                return facts, STALE, fetched_at
+
+        def fetch() -> PropertyFacts:
+            facts = enrich(address)
+            self.put(address, facts)
+            return facts
+
+        self.stats.misses += 1
+        facts, shared = self._flight.do(key, fetch)
+        if shared:
+            self.stats.coalesced += 1
+            facts = facts.model_copy(update={"address": address})
+        return facts, MISS, self.clock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM facts")
+
+
+FACTS = FactsCache(store.db_path("facts.sqlite"))
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generic, List, Optional, Sequence, TypeVar
+
+from core import tracing
+from core.rate_limit import _host
+
+T = TypeVar("T")
+
+MAX_WORKERS = 6
+
+
+class Attempt(Generic[T]):
+    __slots__ = ("url", "result", "error", "ts")
+
+    def __init__(self, url: str, result: Optional[T], error: Optional[BaseException], ts: float):
+        self.url = url
+        self.result = result
+        self.error = error
+        self.ts = ts
+
+
+def _group_by_host(urls: Sequence[str]) -> List[List[str]]:
+    groups: dict[str, List[str]] = {}
+    for u in urls:
+        groups.setdefault(_host(u), []).append(u)
+    return list(groups.values())
+
+
+class FetchStream(Generic[T]):
+    """Fetch every url, one worker per host, handing attempts out as they finish.
+
+    URLs on the same host stay sequential so the per-host limiter still spaces
+    them out; different hosts run in parallel. close() drops queued URLs; requests
+    already in flight cannot be interrupted and finish in the background.
+    """
+
+    def __init__(self, urls: Sequence[str], fetch: Callable[[str], T], max_workers: int = MAX_WORKERS):
+        groups = _group_by_host(urls)
+        self.attempts: List[Attempt[T]] = []  # in completion order
+        self._remaining = len(groups)
+        self._stop = threading.Event()
+        self._done: "queue.Queue[Optional[Attempt[T]]]" = queue.Queue()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if not groups:
+            return
+
+        def run_host(host_urls: List[str]) -> None:
+            try:
+                for u in host_urls:
+                    if self._stop.is_set():
+                        return
+                    try:
+                        self._done.put(Attempt(u, fetch(u), None, time.time()))
+                    except Exception as e:
+                        self._done.put(Attempt(u, None, e, time.time()))
+            finally:
+                self._done.put(None)  # host finished
+
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups))))
+        for g in groups:
+            # Each worker joins the caller's lookup trace, if there is one
+            self._pool.submit(tracing.propagate(run_host), g)
+
+    @property
+    def finished(self) -> bool:
+        return self._remaining == 0
+
+    def next(self, timeout: Optional[float] = None) -> Optional[Attempt[T]]:
+        """The next finished attempt, or None once every url is done or when
+        `timeout` seconds pass first (check `finished` to tell which)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._remaining:
+            try:
+                item = self._done.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return None
+            if item is None:
+                self._remaining -= 1
+                continue
+            self.attempts.append(item)
+            return item
+        self.close()
+        return None
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_first(
+    urls: Sequence[str],
+    fetch: Callable[[str], T],
+    accept: Callable[[T], bool],
+    max_workers: int = MAX_WORKERS,
+) -> tuple[Optional[Attempt[T]], List[Attempt[T]]]:
+    """Fetch urls concurrently, one worker per host, and return as soon as one
+    result passes `accept`. Returns (winner, attempts) where attempts lists every
+    fetch that finished before the winner, in completion order.
+
+    Once a winner is found, queued URLs are dropped and fetches in flight finish
+    in the background with their results discarded.
+    """
+    stream = FetchStream(urls, fetch, max_workers)
+    winner: Optional[Attempt[T]] = None
+    try:
+        while True:
+            item = stream.next()
+            if item is None:
+                break
+            if item.error is None and accept(item.result):
+                winner = item
+                break
+    finally:
+        stream.close()
+    return winner, stream.attempts
@@ -0,0 +1,178 @@
+"""Reconcile the same fact reported by several sources.
+
+Every candidate page is fetched and normalised; for each field the values are
+voted on, weighted by confidence, after dropping numeric outliers (more than
+OUTLIER_MADS scaled MADs from the median). Values within AGREE_TOL of each
+other vote together. The winner's confidence combines its supporters as
+independent evidence, 1 - prod(1 - c), scaled by its share of the total weight,
+so agreement raises it and dissent lowers it. Its provenance lists every
+supporting source.
+
+fuse_pages() runs the fetches under a latency budget: when the deadline hits, or
+once every key field is settled, it returns the current fused answer and, if
+asked, keeps draining the remaining pages in the background and hands the final
+answer to a callback.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.fetch_pool import MAX_WORKERS, Attempt, FetchStream
+from models.facts import FieldValue
+
+OUTLIER_MADS = 3.0
+OUTLIER_REL_FLOOR = 0.15  # never reject within 15% of the median, even when MAD is 0
+AGREE_TOL = 0.05  # numeric values within 5% vote together
+MAX_CONFIDENCE = 0.99
+
+KEY_FIELDS = ("dwelling_type", "beds", "baths", "cars")
+SETTLED_CONFIDENCE = 0.95  # every key field at least this sure: stop waiting for pages
+
+# page url -> (normalised fields, robots_allowed, fetched_ok)
+PageFacts = Tuple[Dict[str, FieldValue], bool, bool]
+
+_refiners = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fusion-refine")
+
+
+def _origins(fv: FieldValue) -> List[str]:
+    return fv.provenance or [fv.source]
+
+
+def _number(v) -> Optional[float]:
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        return None
+    return float(v) if np.isfinite(v) else None
+
+
+def _reject_outliers(values: List[FieldValue]) -> List[FieldValue]:
+    nums = np.array([_number(v.value) for v in values], dtype=float)
+    if len(values) < 3 or np.isnan(nums).any():
+        return values
+    med = np.median(nums)
+    mad = 1.4826 * np.median(np.abs(nums - med))
+    limit = max(OUTLIER_MADS * mad, OUTLIER_REL_FLOOR * abs(med))
+    kept = [v for v, x in zip(values, nums) if abs(x - med) <= limit]
+    return kept or values
+
+
+def _groups(values: List[FieldValue]) -> List[List[FieldValue]]:
+    nums = [_number(v.value) for v in values]
+    if all(n is not None for n in nums):
+        ordered = sorted(values, key=lambda v: float(v.value))
+        groups = [[ordered[0]]]
+        for v in ordered[1:]:
+            anchor = float(groups[-1][0].value)
+            if abs(float(v.value) - anchor) <= AGREE_TOL * max(abs(anchor), abs(float(v.value))):
+                groups[-1].append(v)
+            else:
+                groups.append([v])
+        return groups
+    by_key: Dict[str, List[FieldValue]] = {}
+    for v in values:
+        by_key.setdefault(str(v.value).strip().lower(), []).append(v)
+    return list(by_key.values())
+
+
+def _representative(group: List[FieldValue]):
+    # Confidence-weighted median, so the value is one a source actually reported
+    if _number(group[0].value) is None:
+        return max(group, key=lambda v: v.confidence).value
+    ordered = sorted(group, key=lambda v: float(v.value))
+    half = sum(v.confidence for v in ordered) / 2
+    acc = 0.0
+    for v in ordered:
+        acc += v.confidence
+        if acc >= half:
+            return v.value
+    return ordered[-1].value
+
+
+def fuse_values(values: Sequence[Optional[FieldValue]]) -> Optional[FieldValue]:
+    """One FieldValue from several reports of the same field; None if there are none."""
+    values = [v for v in values if v is not None and v.value is not None]
+    if not values:
+        return None
+    if len(values) == 1:
+        v = values[0]
+        return v if v.provenance else v.model_copy(update={"provenance": [v.source]})
+    kept = _reject_outliers(values)
+    groups = _groups(kept)
+    weight = [sum(v.confidence for v in g) for g in groups]
+    best = groups[int(np.argmax(weight))]
+    support = 1.0 - float(np.prod([1.0 - min(max(v.confidence, 0.0), 1.0) for v in best]))
+    confidence = min(MAX_CONFIDENCE, support * max(weight) / max(sum(weight), 1e-12))
+    provenance: List[str] = []
+    for v in sorted(best, key=lambda v: -v.confidence):
+        provenance.extend(o for o in _origins(v) if o not in provenance)
+    return FieldValue(value=_representative(best), source=max(best, key=lambda v: v.confidence).source,
+                      confidence=round(confidence, 3), provenance=provenance)
+
+
+def fuse_maps(maps: Sequence[Dict[str, FieldValue]]) -> Dict[str, FieldValue]:
+    keys: List[str] = []
+    for m in maps:
+        keys.extend(k for k in m if k not in keys)
+    out = {}
+    for k in keys:
+        fv = fuse_values([m.get(k) for m in maps])
+        if fv is not None:
+            out[k] = fv
+    return out
+
+
+def with_provenance(fields: Dict[str, FieldValue], origin: str) -> Dict[str, FieldValue]:
+    return {k: v.model_copy(update={"provenance": [origin]}) for k, v in fields.items()}
+
+
+def settled(fused: Dict[str, FieldValue]) -> bool:
+    return all(k in fused and fused[k].confidence >= SETTLED_CONFIDENCE for k in KEY_FIELDS)
+
+
+def _page_maps(attempts: Sequence[Attempt[PageFacts]]) -> List[Dict[str, FieldValue]]:
+    return [a.result[0] for a in attempts if a.error is None and a.result[0]]
+
+
+def fuse_pages(
+    urls: Sequence[str],
+    page_facts: Callable[[str], PageFacts],
+    budget_sec: Optional[float] = None,
+    on_refined: Optional[Callable[[Dict[str, FieldValue], List[Attempt[PageFacts]]], None]] = None,
+    max_workers: int = MAX_WORKERS,
+) -> Tuple[Dict[str, FieldValue], List[Attempt[PageFacts]], bool]:
+    """Fetch and fuse every page. Returns (fused, attempts so far, complete).
+
+    With a budget, returns when it runs out or once the key fields are settled.
+    Pages still outstanding then keep going in the background and, if on_refined
+    is given, it is called with the fused answer over all pages, only when they
+    changed it.
+    """
+    stream = FetchStream(urls, page_facts, max_workers)
+    deadline = None if budget_sec is None else time.monotonic() + budget_sec
+    fused: Dict[str, FieldValue] = {}
+    while not stream.finished:
+        wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+        attempt = stream.next(wait)
+        if attempt is None:
+            break  # finished or out of time
+        if attempt.error is None and attempt.result[0]:
+            fused = fuse_maps(_page_maps(stream.attempts))
+            if deadline is not None and settled(fused):
+                break
+    attempts = list(stream.attempts)
+    if stream.finished:
+        return fused, attempts, True
+    if on_refined is None:
+        stream.close()
+        return fused, attempts, False
+
+    def refine() -> None:
+        while stream.next() is not None:
+            pass
+        final = fuse_maps(_page_maps(stream.attempts))
+        if final != fused:
+            on_refined(final, list(stream.attempts))
+
+    _refiners.submit(refine)
+    return fused, attempts, False
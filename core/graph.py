@@ -0,0 +1,149 @@
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core import tracing
+
+
+def _same(a: Any, b: Any) -> bool:
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and a.dtype == b.dtype and np.array_equal(a, b)
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+class NodeStats:
+    __slots__ = ("name", "calls", "hits", "last_ms", "total_ms", "fresh")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.hits = 0
+        self.last_ms = 0.0
+        self.total_ms = 0.0
+        self.fresh = False  # recomputed during the current pass
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "node": self.name,
+            "recomputed": self.fresh,
+            "last_ms": round(self.last_ms, 3),
+            "calls": self.calls,
+            "hits": self.hits,
+            "total_ms": round(self.total_ms, 3),
+        }
+
+
+class _Node:
+    __slots__ = ("name", "fn", "deps", "dep_versions", "value", "version")
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Tuple[str, ...]):
+        self.name = name
+        self.fn = fn
+        self.deps = deps
+        self.dep_versions: Optional[Tuple[int, ...]] = None
+        self.value: Any = None
+        self.version = 0
+
+
+class ComputeGraph:
+    """Memoised computations wired by name.
+
+    Inputs are plain values set with set(); nodes are functions of inputs and other
+    nodes. get() recomputes a node only if the version of one of its dependencies
+    moved since it last ran. A value that is set or recomputed to something equal
+    to what it was keeps its version, so unchanged results stop the change from
+    propagating further downstream.
+
+    Not thread-safe; meant to live in one Streamlit session's state.
+    """
+
+    def __init__(self):
+        self._inputs: Dict[str, Tuple[Any, int]] = {}
+        self._nodes: Dict[str, _Node] = {}
+        self.stats: Dict[str, NodeStats] = {}
+
+    def node(self, name: str, *deps: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator registering fn(*deps) as node `name`."""
+
+        def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self.add(name, fn, *deps)
+            return fn
+
+        return register
+
+    def add(self, name: str, fn: Callable[..., Any], *deps: str) -> None:
+        if name in self._inputs:
+            raise ValueError(f"{name!r} is already an input")
+        self._nodes[name] = _Node(name, fn, deps)
+        self.stats[name] = NodeStats(name)
+
+    def set(self, **values: Any) -> None:
+        for name, value in values.items():
+            if name in self._nodes:
+                raise ValueError(f"{name!r} is a computed node")
+            old = self._inputs.get(name)
+            if old is None:
+                self._inputs[name] = (value, 0)
+            elif not _same(old[0], value):
+                self._inputs[name] = (value, old[1] + 1)
+
+    def begin(self) -> None:
+        """Start a new pass, clearing the per-pass `fresh` flags shown in timings()."""
+        for s in self.stats.values():
+            s.fresh = False
+
+    def _resolve(self, name: str, stack: Tuple[str, ...] = ()) -> Tuple[Any, int]:
+        if name in self._inputs:
+            return self._inputs[name]
+        node = self._nodes.get(name)
+        if node is None:
+            raise KeyError(f"unknown input or node {name!r}")
+        if name in stack:
+            raise ValueError("cycle: " + " -> ".join(stack + (name,)))
+        resolved = [self._resolve(d, stack + (name,)) for d in node.deps]
+        versions = tuple(v for _, v in resolved)
+        stats = self.stats[name]
+        if versions == node.dep_versions:
+            stats.hits += 1
+            return node.value, node.version
+        t0 = time.perf_counter()
+        value = node.fn(*(v for v, _ in resolved))
+        ms = (time.perf_counter() - t0) * 1000
+        if tracing.enabled():
+            tracing.record(f"calc.{name}", t0, ms / 1000)
+        stats.calls += 1
+        stats.last_ms = ms
+        stats.total_ms += ms
+        stats.fresh = True
+        if node.dep_versions is None or not _same(node.value, value):
+            node.version += 1
+        node.value = value
+        node.dep_versions = versions
+        return value, node.version
+
+    def get(self, name: str) -> Any:
+        return self._resolve(name)[0]
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def timings(self) -> List[Dict[str, Any]]:
+        return [s.as_dict() for s in self.stats.values()]
+
+    def downstream(self, name: str) -> Sequence[str]:
+        """Nodes that (transitively) depend on `name`."""
+        out: List[str] = []
+        frontier = [name]
+        while frontier:
+            cur = frontier.pop()
+            for n in self._nodes.values():
+                if cur in n.deps and n.name not in out:
+                    out.append(n.name)
+                    frontier.append(n.name)
+        return out
@@ -0,0 +1,205 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol
+
+from core import store
+
+
+class CachedResponse:
+    """The parts of a response worth keeping: status, headers, body and fetch time.
+    Exposes the subset of the requests.Response API the providers use.
+    """
+
+    __slots__ = ("url", "status_code", "headers", "content", "fetched_at")
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes, fetched_at: float):
+        self.url = url
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in headers.items()}
+        self.content = content
+        self.fetched_at = fetched_at
+
+    @classmethod
+    def from_response(cls, resp) -> "CachedResponse":
+        return cls(resp.url, resp.status_code, dict(resp.headers), resp.content, time.time())
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def encoding(self) -> str:
+        ctype = self.headers.get("content-type", "")
+        for part in ctype.split(";"):
+            k, _, v = part.strip().partition("=")
+            if k.lower() == "charset" and v:
+                return v.strip('"')
+        return "utf-8"
+
+    @property
+    def text(self) -> str:
+        try:
+            return self.content.decode(self.encoding, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "stores", "evictions", "revalidated")
+
+    def __init__(self):
+        self.hits = self.misses = self.stores = self.evictions = self.revalidated = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class CacheBackend(Protocol):
+    stats: CacheStats
+
+    def get(self, key: str) -> Optional[CachedResponse]: ...
+    def set(self, key: str, resp: CachedResponse) -> None: ...
+    def delete(self, key: str) -> None: ...
+    def clear(self) -> None: ...
+    def size_bytes(self) -> int: ...
+
+
+class MemoryLRUCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._items: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            resp = self._items.get(key)
+            if resp is None:
+                self.stats.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats.hits += 1
+            return resp
+
+    def set(self, key: str, resp: CachedResponse) -> None:
+        if resp.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._items[key] = resp
+            self._bytes += resp.size
+            self.stats.stores += 1
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class SQLiteCache:
+    """Body, headers and fetch time in a SQLite file, shared by every process that
+    opens the same path. Evicts least recently read entries past max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = store.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            " key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB,"
+            " fetched_at REAL, accessed_at REAL, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS http_cache_accessed ON http_cache(accessed_at)")
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, fetched_at FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE http_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.stats.hits += 1
+        url, status, headers, body, fetched_at = row
+        return CachedResponse(url, status, json.loads(headers), bytes(body), fetched_at)
+
+    def set(self, key: str, resp: CachedResponse) -> None:
+        if resp.size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, resp.url, resp.status_code, json.dumps(resp.headers), resp.content,
+                 resp.fetched_at, time.time(), resp.size),
+            )
+            self.stats.stores += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM http_cache ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM http_cache WHERE key = ?", victims)
+        self.stats.evictions += len(victims)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+
+def default_backend() -> CacheBackend:
+    path = store.db_path("http_cache.sqlite")
+    if path == store.MEMORY:
+        return MemoryLRUCache()
+    return SQLiteCache(path)
+
+
+def conditional_headers(resp: CachedResponse) -> Dict[str, str]:
+    out = {}
+    if resp.headers.get("etag"):
+        out["If-None-Match"] = resp.headers["etag"]
+    if resp.headers.get("last-modified"):
+        out["If-Modified-Since"] = resp.headers["last-modified"]
+    return out
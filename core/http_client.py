@@ -0,0 +1,132 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+UA = {"User-Agent": "PropLens/0.1 (+https://example.com)"}
+
+# (connect, read) seconds
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 20.0)
+POOL_CONNECTIONS = 16  # distinct hosts kept warm
+POOL_MAXSIZE = 8  # keep-alive connections per host
+# Failed connects are retried here, with backoff; the request never reached the host.
+# Transient server errors (RETRY_STATUSES) are retried by core.rate_limit, which takes a
+# fresh per-host token for each attempt. 429 and 503 are left to Retry-After.
+RETRIES = 2
+BACKOFF_SEC = 0.5
+RETRY_STATUSES = (500, 502, 504)
+
+# HTTP/2 needs httpx with the h2 extra; requests only speaks HTTP/1.1
+HTTP2 = os.getenv("PROPLENS_HTTP2", "false").lower() == "true"
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class _HttpxResponse:
+    """Adapts an httpx.Response to the parts of requests.Response the callers use."""
+
+    def __init__(self, resp):
+        self._resp = resp
+        self.url = str(resp.url)
+        self.status_code = resp.status_code
+        self.headers = resp.headers
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        return self._resp.read()
+
+    @property
+    def text(self) -> str:
+        self._resp.read()
+        return self._resp.text
+
+    def json(self) -> Any:
+        self._resp.read()
+        return self._resp.json()
+
+    def iter_content(self, chunk_size: int = 65536):
+        return self._resp.iter_bytes(chunk_size)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}", response=self)
+
+    def close(self) -> None:
+        self._resp.close()
+
+
+class HttpClient:
+    """One pooled, keep-alive session shared by every provider."""
+
+    def __init__(self, pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                 retries: int = RETRIES, backoff: float = BACKOFF_SEC, timeout: Timeout = DEFAULT_TIMEOUT,
+                 http2: bool = HTTP2):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(UA)
+        retry = Retry(
+            total=retries, connect=retries, read=0, status=0, other=0,
+            backoff_factor=backoff, allowed_methods=frozenset({"GET", "HEAD"}), raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._h2 = None
+        if http2:
+            try:
+                import httpx
+                self._h2 = httpx.Client(
+                    http2=True, headers=UA, follow_redirects=True,
+                    limits=httpx.Limits(max_keepalive_connections=pool_connections * pool_maxsize),
+                    transport=httpx.HTTPTransport(http2=True, retries=retries),
+                )
+            except Exception:
+                self._h2 = None
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Timeout] = None, stream: bool = False, **kwargs):
+        timeout = timeout if timeout is not None else self.timeout
+        if self._h2 is not None and not kwargs:
+            t = timeout if isinstance(timeout, (int, float)) else timeout[1]
+            req = self._h2.build_request("GET", url, params=params, headers=headers, timeout=t)
+            return _HttpxResponse(self._h2.send(req, stream=stream))
+        return self.session.get(url, params=params, headers=headers, timeout=timeout, stream=stream, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+        if self._h2 is not None:
+            self._h2.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+
+def configure(**kwargs) -> HttpClient:
+    """Replace the shared client, e.g. configure(pool_maxsize=32, retries=0)."""
+    global _client
+    with _client_lock:
+        old, _client = _client, HttpClient(**kwargs)
+    if old is not None:
+        old.close()
+    return _client
+
+
+def get(url: str, **kwargs):
+    return get_client().get(url, **kwargs)
@@ -1,4 +1,6 @@
 from typing import Dict, Any, Optional
+from core import tracing
+from core.fusion import fuse_values
 from models.facts import FieldValue, PropertyFacts, AddressResolved
 
 
@@ -18,6 +20,7 @@ def _num(val) -> Optional[float]:
         return None
 
 
+@tracing.traced("normalise_jsonld")
 def normalise_jsonld(jsonld: Dict[str, Any]) -> Dict[str, FieldValue]:
     out: Dict[str, FieldValue] = {}
 
@@ -91,7 +94,7 @@ def normalise_jsonld(jsonld: Dict[str, Any]) -> Dict[str, FieldValue]:
 
 
 def estimate_from_heuristics(address: AddressResolved, land_sqm: Optional[float]) -> Dict[str, FieldValue]:
-    # Very basic heuristics. Replace with locality aware distributions later.
+    # Very basic heuristics; the fallback for core.estimator where local data is thin.
     beds = 4 if land_sqm and land_sqm >= 450 else 3
     baths = 2 if beds >= 3 else 1
     cars = 2 if beds >= 3 else 1
@@ -109,13 +112,20 @@ def estimate_from_heuristics(address: AddressResolved, land_sqm: Optional[float]
     return out
 
 
+@tracing.traced("merge_facts")
 def merge_facts(*, address: AddressResolved, jsonld_map: Dict[str, FieldValue] | None, open_data: dict | None, estimated_map: Dict[str, FieldValue], source_urls: list[str]) -> PropertyFacts:
     def pick(key: str) -> FieldValue:
+        # Observed values are voted on; estimates only fill gaps, agreeing with a page proves nothing
+        observed = []
         if jsonld_map and key in jsonld_map:
-            return jsonld_map[key]
+            observed.append(jsonld_map[key])
         if open_data and key in open_data and open_data[key] is not None:
-            return FieldValue(value=open_data[key], source="open_data", confidence=float(open_data.get("confidence", 0.6)))
-        return estimated_map.get(key, FieldValue(value=None, source="estimated", confidence=0.1))
+            observed.append(FieldValue(value=open_data[key], source="open_data", confidence=float(open_data.get("confidence", 0.6))))
+        fused = fuse_values(observed)
+        if fused is not None:
+            return fused
+        est = estimated_map.get(key, FieldValue(value=None, source="estimated", confidence=0.1))
+        return est if est.provenance else est.model_copy(update={"provenance": ["estimated"]})
 
     return PropertyFacts(
         address=address,
@@ -125,6 +135,6 @@ def merge_facts(*, address: AddressResolved, jsonld_map: Dict[str, FieldValue] |
         cars=pick("cars"),
         land_sqm=pick("land_sqm"),
         build_sqm=pick("build_sqm"),
-        last_sold_price=jsonld_map.get("last_sold_price") if jsonld_map else None,
+        last_sold_price=fuse_values([jsonld_map.get("last_sold_price")]) if jsonld_map else None,
         source_urls=source_urls or [],
     )
\ No newline at end of file
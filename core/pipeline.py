@@ -0,0 +1,368 @@
+"""Headless batch enrichment: addresses in, PropertyFacts out.
+
+    python -m core.pipeline addresses.csv -o facts.jsonl
+    python -m core.pipeline addresses.jsonl -o facts.parquet --extract-workers 16
+
+Input is a CSV with an `address` column (or the first column) or JSONL whose lines
+are either {"address": "..."} or full AddressResolved objects, which skip geocoding.
+Stages run as a bounded pipeline: each has its own worker pool and a fixed-size
+inbox, so a slow stage holds back the ones feeding it instead of growing a backlog.
+Keys written successfully go to <output>.ckpt; rerunning the same command resumes
+after them and retries the rows that failed (listed in <output>.errors.jsonl).
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from core.enrich import build_facts, extract_jsonld
+from models.facts import AddressResolved, PropertyFacts
+from providers.geocode_local import search_addresses
+from providers.portal_finders import find_candidate_urls
+
+QUEUE_SIZE = 64
+PARQUET_BATCH = 1000
+
+_STOP = object()
+
+
+class Job:
+    __slots__ = ("key", "query", "address", "urls", "jsonld", "sources", "facts", "error")
+
+    def __init__(self, key: str, query: str, address: Optional[AddressResolved] = None):
+        self.key = key
+        self.query = query
+        self.address = address
+        self.urls: List[str] = []
+        self.jsonld: Dict[str, Any] = {}
+        self.sources: List[str] = []
+        self.facts: Optional[PropertyFacts] = None
+        self.error: Optional[str] = None
+
+
+class StageStats:
+    __slots__ = ("name", "workers", "items", "errors", "busy_sec")
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_sec = 0.0
+
+    def as_dict(self, wall_sec: float) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "items_per_sec": round(self.items / wall_sec, 2) if wall_sec else 0.0,
+            "avg_ms": round(self.busy_sec / self.items * 1000, 1) if self.items else 0.0,
+            "utilisation": round(self.busy_sec / (wall_sec * self.workers), 3) if wall_sec else 0.0,
+        }
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Job], None], workers: int, inbox: "queue.Queue", outbox: "queue.Queue"):
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stats = StageStats(name, workers)
+        self.next_workers = 1
+        self._live = workers
+        self._lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)]
+
+    def _work(self) -> None:
+        while True:
+            job = self.inbox.get()
+            if job is _STOP:
+                break
+            if job.error is None:
+                t0 = time.perf_counter()
+                try:
+                    self.fn(job)
+                except Exception as e:
+                    job.error = f"{self.stats.name}: {type(e).__name__}: {e}"
+                elapsed = time.perf_counter() - t0
+                with self._lock:
+                    self.stats.items += 1
+                    self.stats.busy_sec += elapsed
+                    if job.error is not None:
+                        self.stats.errors += 1
+            self.outbox.put(job)
+        with self._lock:
+            self._live -= 1
+            last = self._live == 0
+        if last:
+            for _ in range(self.next_workers):
+                self.outbox.put(_STOP)
+
+
+# --- default stage functions ---
+
+def _geocode(job: Job) -> None:
+    if job.address is None:
+        hits = search_addresses(job.query)
+        if not hits:
+            raise LookupError("no geocode match")
+        job.address = hits[0]
+
+
+def _discover(job: Job) -> None:
+    job.urls = find_candidate_urls(job.address)
+
+
+def _extract(job: Job) -> None:
+    job.jsonld, job.sources = extract_jsonld(job.urls)
+
+
+def _merge(job: Job) -> None:
+    job.facts = build_facts(job.address, job.jsonld, job.sources)
+
+
+# --- input ---
+
+def read_addresses(path: str) -> Iterator[Tuple[str, str, Optional[AddressResolved]]]:
+    """Yield (key, query, address-or-None). Keys are input row numbers."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for i, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    d = json.loads(line)
+                    if "lat" in d and "lon" in d:
+                        fields = {k: d.get(k) for k in AddressResolved.model_fields}
+                        fields["query"] = fields["query"] or fields["display_name"] or ""
+                        addr = AddressResolved(**fields)
+                        yield str(i), addr.display_name, addr
+                    else:
+                        yield str(i), d["address"], None
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path} line {i + 1}: bad address row ({e!r})") from e
+        else:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            lowered = [h.strip().lower() for h in header]
+            col = lowered.index("address") if "address" in lowered else 0
+            for i, row in enumerate(reader, start=1):
+                if row and row[col].strip():
+                    yield str(i), row[col].strip(), None
+
+
+# --- output ---
+
+class JsonlSink:
+    def __init__(self, path: str):
+        self.f = open(path, "a", encoding="utf-8")
+
+    def write(self, key: str, facts: PropertyFacts) -> None:
+        self.f.write(json.dumps({"key": key, **facts.model_dump()}) + "\n")
+        self.f.flush()
+
+    def close(self) -> None:
+        self.f.close()
+
+
+FACT_FIELDS = ("dwelling_type", "beds", "baths", "cars", "land_sqm", "build_sqm", "last_sold_price")
+ADDRESS_FIELDS = ("display_name", "lat", "lon", "suburb", "state", "postcode", "lga")
+
+
+def flat_row(key: str, facts: PropertyFacts) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"key": key}
+    for f in ADDRESS_FIELDS:
+        row[f] = getattr(facts.address, f)
+    for f in FACT_FIELDS:
+        fv = getattr(facts, f)
+        value = fv.value if fv is not None else None
+        if f == "dwelling_type":
+            row[f] = None if value is None else str(value)
+        else:
+            row[f] = None if value is None else float(value)
+        row[f + "_source"] = fv.source if fv is not None else None
+        row[f + "_confidence"] = fv.confidence if fv is not None else None
+    row["source_urls"] = list(facts.source_urls)
+    return row
+
+
+class ParquetSink:
+    """Flat rows (see flat_row) in row groups of PARQUET_BATCH. Parquet files can't be
+    appended to, so a resumed run writes the next numbered part next to the first one.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        base, ext = os.path.splitext(path)
+        part, candidate = 0, path
+        while os.path.exists(candidate):
+            part += 1
+            candidate = f"{base}-{part:05d}{ext}"
+        self.path = candidate
+        cols = [("key", pa.string()), ("display_name", pa.string()), ("lat", pa.float64()), ("lon", pa.float64())]
+        cols += [(f, pa.string()) for f in ("suburb", "state", "postcode", "lga")]
+        for f in FACT_FIELDS:
+            cols += [(f, pa.string() if f == "dwelling_type" else pa.float64()),
+                     (f + "_source", pa.string()), (f + "_confidence", pa.float64())]
+        cols.append(("source_urls", pa.list_(pa.string())))
+        self.schema = pa.schema(cols)
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.rows: List[Dict[str, Any]] = []
+
+    def write(self, key: str, facts: PropertyFacts) -> None:
+        self.rows.append(flat_row(key, facts))
+        if len(self.rows) >= PARQUET_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        import pyarrow as pa
+        self.writer.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+        self.rows.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+
+
+def _sink(path: str):
+    return ParquetSink(path) if path.endswith(".parquet") else JsonlSink(path)
+
+
+def load_checkpoint(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+# --- driver ---
+
+def run_pipeline(
+    rows: Iterable[Tuple[str, str, Optional[AddressResolved]]],
+    out_path: str,
+    workers: Optional[Dict[str, int]] = None,
+    stages: Optional[Sequence[Tuple[str, Callable[[Job], None]]]] = None,
+    queue_size: int = QUEUE_SIZE,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    progress_every: float = 10.0,
+) -> Dict[str, Any]:
+    """Run rows through the stages and write facts to out_path. Returns a report with
+    per-stage throughput. Errors are written to <out_path>.errors.jsonl. If reading
+    rows fails, the rows read so far are finished and the error is raised.
+    """
+    stages = stages or [("geocode", _geocode), ("discover", _discover), ("extract", _extract), ("merge", _merge)]
+    workers = {"geocode": 2, "discover": 2, "extract": 8, "merge": 2, **(workers or {})}
+    ckpt_path = out_path + ".ckpt"
+    done = load_checkpoint(ckpt_path)
+
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    pipeline = [Stage(name, fn, max(1, workers.get(name, 1)), queues[i], queues[i + 1]) for i, (name, fn) in enumerate(stages)]
+    for a, b in zip(pipeline, pipeline[1:]):
+        a.next_workers = len(b.threads)
+
+    start = time.perf_counter()
+    counts = {"read": 0, "skipped": 0, "written": 0, "failed": 0}
+
+    def report() -> Dict[str, Any]:
+        wall = time.perf_counter() - start
+        return {**counts, "wall_sec": round(wall, 2), "stages": [s.stats.as_dict(wall) for s in pipeline]}
+
+    feed_error: List[BaseException] = []
+
+    def feed() -> None:
+        try:
+            for key, q, addr in rows:
+                counts["read"] += 1
+                if key in done:
+                    counts["skipped"] += 1
+                    continue
+                queues[0].put(Job(key, q, addr))  # blocks when the first stage is behind
+        except BaseException as e:
+            # Raised again by run_pipeline once the rows already read are written
+            feed_error.append(e)
+        finally:
+            for _ in pipeline[0].threads:
+                queues[0].put(_STOP)
+
+    feeder = threading.Thread(target=feed, name="feed", daemon=True)
+    feeder.start()
+    for s in pipeline:
+        for t in s.threads:
+            t.start()
+
+    sink = _sink(out_path)
+    last_progress = time.perf_counter()
+    with open(ckpt_path, "a", encoding="utf-8") as ckpt, open(out_path + ".errors.jsonl", "a", encoding="utf-8") as errs:
+        try:
+            while True:
+                job = queues[-1].get()
+                if job is _STOP:
+                    break
+                if job.error is None:
+                    sink.write(job.key, job.facts)
+                    counts["written"] += 1
+                    # Written before checkpointed: a crash here repeats at most this row
+                    ckpt.write(job.key + "\n")
+                    ckpt.flush()
+                else:
+                    # Not checkpointed, so a rerun retries it (most failures are timeouts or 429s)
+                    errs.write(json.dumps({"key": job.key, "query": job.query, "error": job.error}) + "\n")
+                    errs.flush()
+                    counts["failed"] += 1
+                if progress and time.perf_counter() - last_progress >= progress_every:
+                    last_progress = time.perf_counter()
+                    progress(report())
+        finally:
+            sink.close()
+    feeder.join()
+    if feed_error:
+        raise feed_error[0]
+    return report()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("input", help="CSV or JSONL of addresses")
+    ap.add_argument("-o", "--output", required=True, help="facts output, .jsonl or .parquet")
+    ap.add_argument("--geocode-workers", type=int, default=2)
+    ap.add_argument("--discover-workers", type=int, default=2)
+    ap.add_argument("--extract-workers", type=int, default=8)
+    ap.add_argument("--merge-workers", type=int, default=2)
+    ap.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    ap.add_argument("--no-web", action="store_true", help="skip portal search and page fetches")
+    ap.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines on stderr")
+    args = ap.parse_args(argv)
+
+    stages = [("geocode", _geocode), ("discover", _discover), ("extract", _extract), ("merge", _merge)]
+    if args.no_web:
+        stages = [("geocode", _geocode), ("merge", _merge)]
+    report = run_pipeline(
+        read_addresses(args.input),
+        args.output,
+        workers={
+            "geocode": args.geocode_workers,
+            "discover": args.discover_workers,
+            "extract": args.extract_workers,
+            "merge": args.merge_workers,
+        },
+        stages=stages,
+        queue_size=args.queue_size,
+        progress=lambda r: print(json.dumps(r), file=sys.stderr),
+        progress_every=args.progress_every,
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
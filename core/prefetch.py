@@ -0,0 +1,253 @@
+"""Background warm-up of the caches for addresses a session is likely to ask for.
+
+One daemon thread per process works through a priority queue: the default
+address first, then recently looked-up addresses (kept in prefetch.sqlite under
+PROPLENS_CACHE_DIR, so they outlive a restart), then the watchlists named by
+PROPLENS_WATCHLIST. Warming an address makes the same calls as an interactive
+lookup, suggest_addresses and then enrich_address_cached. It therefore fills the
+suggestion, robots, HTTP and facts caches, and every request goes through the
+same per-host limiter.
+
+Addresses are deduplicated by normalised display name (or query, until it is
+geocoded), and one warmed within REWARM_SEC is not warmed again.
+
+Interactive lookups run inside interactive(). While one is in flight, and for
+idle_sec after the last one ends, the worker starts no new step. A step is the
+geocode or the enrichment of one address, so a lookup waits at most for the
+step already running. The worker pauses gap_sec between addresses, which leaves
+most of each host's request budget to interactive use.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core import store
+from core.enrich import enrich_address_cached
+from core.facts_cache import FRESH_SEC
+from models.facts import AddressResolved
+from providers.address_autocomplete import normalise_query, suggest_addresses
+
+PREFETCH = os.getenv("PROPLENS_PREFETCH", "true").lower() == "true"
+# Address files (CSV with an address column, or JSONL as read by core.pipeline), separated by os.pathsep
+WATCHLIST = os.getenv("PROPLENS_WATCHLIST")
+
+IDLE_SEC = 2.0  # quiet time after an interactive lookup before prefetch resumes
+GAP_SEC = 5.0  # pause between prefetched addresses
+RECENT_LIMIT = 50
+REWARM_SEC = FRESH_SEC  # an address warmed this recently is not queued again
+
+DEFAULT, RECENT, WATCHED = 0, 1, 2  # queue priorities, lowest first
+
+Item = Tuple[int, int, str, str, Optional[AddressResolved]]  # priority, seq, key, query, address
+
+log = logging.getLogger(__name__)
+
+
+class PrefetchStats:
+    __slots__ = ("queued", "warmed", "skipped", "errors", "yielded")
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class Prefetcher:
+    def __init__(self, path: str = store.MEMORY,
+                 enrich: Optional[Callable[[AddressResolved], object]] = enrich_address_cached,
+                 suggest: Callable[[str], List[AddressResolved]] = suggest_addresses,
+                 idle_sec: float = IDLE_SEC, gap_sec: float = GAP_SEC, clock: Callable[[], float] = time.monotonic):
+        self.enrich = enrich
+        self.suggest = suggest
+        self.idle_sec = idle_sec
+        self.gap_sec = gap_sec
+        self.clock = clock
+        self.stats = PrefetchStats()
+        self._cond = threading.Condition()
+        self._heap: List[Item] = []
+        self._seq = itertools.count()
+        self._pending: set = set()
+        self._warmed: Dict[str, float] = {}
+        self._watchlists: List[str] = []  # files not read yet; the worker reads them
+        self._active = 0
+        self._last_interactive = float("-inf")
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._conn = store.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS recent (key TEXT PRIMARY KEY, address TEXT, searched_at REAL)")
+
+    # --- interactive side ---
+
+    @contextmanager
+    def interactive(self) -> Iterator[None]:
+        """Hold prefetch back for the duration of a user-facing lookup."""
+        with self._cond:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._last_interactive = self.clock()
+                self._cond.notify_all()
+
+    def remember(self, address: AddressResolved) -> None:
+        """Record a looked-up address, to be warmed first after a restart."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO recent VALUES (?, ?, ?)",
+                               (normalise_query(address.display_name), address.model_dump_json(), time.time()))
+            self._conn.execute("DELETE FROM recent WHERE key NOT IN "
+                               "(SELECT key FROM recent ORDER BY searched_at DESC LIMIT ?)", (RECENT_LIMIT,))
+
+    def recent(self, limit: int = RECENT_LIMIT) -> List[AddressResolved]:
+        with self._lock:
+            rows = self._conn.execute("SELECT address FROM recent ORDER BY searched_at DESC LIMIT ?", (limit,)).fetchall()
+        return [AddressResolved.model_validate_json(r[0]) for r in rows]
+
+    # --- queue ---
+
+    def submit(self, query: str, priority: int = WATCHED, address: Optional[AddressResolved] = None) -> bool:
+        """Queue an address for warming. Returns False if it is already queued or
+        was warmed within REWARM_SEC."""
+        key = normalise_query(address.display_name if address else query)
+        if not key:
+            return False
+        with self._cond:
+            if key in self._pending or self._fresh(key):
+                return False
+            self._pending.add(key)
+            heapq.heappush(self._heap, (priority, next(self._seq), key, query, address))
+            self.stats.queued += 1
+            self._cond.notify_all()
+        return True
+
+    def start(self, defaults: Iterable[str] = (), watchlist: Optional[str] = WATCHLIST) -> None:
+        """Queue defaults and recent addresses, and start the worker, which reads the
+        watchlists itself once nothing more urgent is queued. Further calls only
+        queue; one worker runs per Prefetcher."""
+        for q in defaults:
+            self.submit(q, DEFAULT)
+        for a in self.recent():
+            self.submit(a.display_name, RECENT, a)
+        with self._cond:
+            self._watchlists += [p for p in (watchlist or "").split(os.pathsep) if p]
+            self._cond.notify_all()
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    # --- worker ---
+
+    def _fresh(self, key: str) -> bool:
+        """Warmed within REWARM_SEC. Called with self._cond held."""
+        warmed = self._warmed.get(key)
+        return warmed is not None and self.clock() - warmed < REWARM_SEC
+
+    def _mark_warmed(self, keys: Iterable[str]) -> None:
+        """Record keys as warmed now and forget ones past REWARM_SEC. Called with self._cond held."""
+        now = self.clock()
+        for k in keys:
+            self._warmed[k] = now
+        for k in [k for k, t in self._warmed.items() if now - t >= REWARM_SEC]:
+            del self._warmed[k]
+
+    def _turn(self, need_item: bool) -> bool:
+        """Wait until there is no interactive lookup in flight or just finished
+        (and, with need_item, until something is queued). False once stopping.
+        Called with self._cond held."""
+        waited = False
+        while not self._stopping:
+            if need_item and not self._heap and not self._watchlists:
+                self._cond.wait()
+                continue
+            quiet_for = self.clock() - self._last_interactive
+            if not self._active and quiet_for >= self.idle_sec:
+                if waited:
+                    self.stats.yielded += 1
+                return True
+            waited = True
+            self._cond.wait(None if self._active else self.idle_sec - quiet_for)
+        return False
+
+    def _read_watchlists(self, paths: List[str]) -> None:
+        """Queue every address in paths. A file that is missing or malformed is
+        logged and counted as an error; addresses read before the fault stay queued."""
+        from core.pipeline import read_addresses
+
+        for path in paths:
+            try:
+                for _, query, address in read_addresses(path):
+                    self.submit(query, WATCHED, address)
+            except Exception as e:
+                self.stats.errors += 1
+                log.warning("prefetch: skipping watchlist %s: %s", path, e)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._turn(need_item=True):
+                    return
+                if self._watchlists and (not self._heap or self._heap[0][0] >= WATCHED):
+                    # Read without the lock; defaults and recent addresses go first
+                    paths, self._watchlists = self._watchlists, []
+                else:
+                    paths = []
+                    _, _, key, query, address = heapq.heappop(self._heap)
+            if paths:
+                self._read_watchlists(paths)
+                continue
+            with self._cond:
+                if self._fresh(key):
+                    # Warmed while queued, by an item that geocoded to the same address
+                    self._pending.discard(key)
+                    self.stats.skipped += 1
+                    continue
+            keys = [key]
+            try:
+                if address is None:
+                    hits = self.suggest(query)
+                    address = hits[0] if hits else None
+                resolved = normalise_query(address.display_name) if address is not None else key
+                if resolved != key:
+                    # Items queued with an address are keyed by its display name; so is a geocoded query, once known
+                    keys.append(resolved)
+                    with self._cond:
+                        if self._fresh(resolved):
+                            address = None
+                if address is None:
+                    self.stats.skipped += 1
+                elif self.enrich is not None:
+                    with self._cond:
+                        if not self._turn(need_item=False):
+                            return
+                    self.enrich(address)
+                    self.stats.warmed += 1
+                else:
+                    self.stats.warmed += 1
+            except Exception:
+                self.stats.errors += 1
+            with self._cond:
+                self._pending.discard(key)
+                self._mark_warmed(keys)
+                if self._cond.wait_for(lambda: self._stopping, timeout=self.gap_sec):
+                    return
+
+
+PREFETCHER = Prefetcher(path=store.db_path("prefetch.sqlite"))
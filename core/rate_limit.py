@@ -1,77 +1,280 @@
+import asyncio
+import email.utils
+import threading
 import time
 import urllib.parse
-import requests
-from typing import Optional, Tuple
+from typing import Callable, Dict, Optional, Protocol, Tuple
 
-# Prefer stdlib robots, fall back to third-party if installed
-try:
-    import urllib.robotparser as _urob
-    _HAS_STDLIB_ROBOTS = True
-except Exception:
-    _HAS_STDLIB_ROBOTS = False
-
-# try:
-#     from robotexclusionrulesparser import RobotExclusionRulesParser as _ThirdPartyRobots
-# except Exception:
-#     _ThirdPartyRobots = None
-
-# Simple per-host backoff and robots cache
-_last_call: dict[str, float] = {}
-_robots_cache: dict[str, object] = {}  # RobotFileParser or third-party parser
-_content_cache: dict[str, tuple[float, requests.Response]] = {}
-
-UA = {"User-Agent": "PropLens/0.1 (+https://example.com)"}
+from core import http_client, store, tracing
+from core.http_client import UA
+from core.robots import ROBOTS, RobotsCache
+from core.http_cache import CacheBackend, CachedResponse, conditional_headers, default_backend
 
+# Default pace per host: one request every MIN_DELAY_SEC, no bursts
 MIN_DELAY_SEC = 2.0
 CACHE_TTL_SEC = 600.0
+# polite_stream stops reading a body after this many bytes
+MAX_STREAM_BYTES = 4 * 1024 * 1024
+STREAM_CHUNK = 16 * 1024
+# Per-host overrides of CACHE_TTL_SEC, keyed by netloc
+HOST_TTL_SEC: dict[str, float] = {}
+# Per-host (rate, burst) overriding every limiter's default, keyed by netloc
+HOST_RATES: dict[str, Tuple[float, float]] = {
+    "nominatim.openstreetmap.org": (1.0, 1.0),  # Nominatim usage policy: at most one request per second
+}
 
 
 def _host(url: str) -> str:
     return urllib.parse.urlparse(url).netloc
 
 
-def robots_allowed(url: str, ua: str = UA["User-Agent"]) -> bool:
-    host = _host(url)
-    base = f"https://{host}/robots.txt"
-    rules = _robots_cache.get(host)
-    if not rules:
-        try:
-            resp = requests.get(base, headers=UA, timeout=10)
-            # Default allow if robots.txt is missing or not readable
-            if resp.status_code >= 400 or not resp.text.strip():
-                return True
-
-            if _HAS_STDLIB_ROBOTS:
-                rp = _urob.RobotFileParser()
-                # RobotFileParser.parse expects an iterable of lines
-                rp.parse(resp.text.splitlines())
-                rules = rp
-            elif _ThirdPartyRobots is not None:
-                rp = _ThirdPartyRobots()
-                rp.parse(resp.text)
-                rules = rp
-            else:
-                return True
-
-            _robots_cache[host] = rules
-        except Exception:
-            return True
+class TokenBucket:
+    """Reservation-style token bucket. Tokens may go negative: a caller takes its
+    token immediately and is told how long to wait for it, so concurrent callers get
+    distinct, evenly spaced slots without holding a lock while they sleep.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, now: float, cost: float = 1.0) -> float:
+        self._refill(now)
+        self.tokens -= cost
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def hold_off(self, now: float, seconds: float) -> None:
+        # Next reservation waits at least `seconds`
+        self._refill(now)
+        self.tokens = min(self.tokens, 1.0 - seconds * self.rate)
+
+
+class BucketStore(Protocol):
+    def reserve(self, host: str, rate: float, burst: float, now: float) -> float: ...
+    def hold_off(self, host: str, rate: float, burst: float, now: float, seconds: float) -> None: ...
+    def reset(self) -> None: ...
+
+
+class MemoryBucketStore:
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str, rate: float, burst: float, now: float) -> TokenBucket:
+        b = self._buckets.get(host)
+        if b is None:
+            b = self._buckets[host] = TokenBucket(rate, burst, now)
+        b.rate, b.burst = rate, burst
+        return b
+
+    def reserve(self, host: str, rate: float, burst: float, now: float) -> float:
+        with self._lock:
+            return self._bucket(host, rate, burst, now).reserve(now)
+
+    def hold_off(self, host: str, rate: float, burst: float, now: float, seconds: float) -> None:
+        with self._lock:
+            self._bucket(host, rate, burst, now).hold_off(now, seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file so several app processes share one budget per host.
+    Each update runs in a BEGIN IMMEDIATE transaction, which SQLite serialises across
+    processes. Use a wall clock (time.time) with this store.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = store.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (host TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def _update(self, host: str, rate: float, burst: float, now: float, fn: Callable[[TokenBucket], float]) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE host = ?", (host,)).fetchone()
+                b = TokenBucket(rate, burst, now)
+                if row:
+                    b.tokens, b.updated = row
+                out = fn(b)
+                self._conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (host, b.tokens, b.updated))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return out
+
+    def reserve(self, host: str, rate: float, burst: float, now: float) -> float:
+        return self._update(host, rate, burst, now, lambda b: b.reserve(now))
+
+    def hold_off(self, host: str, rate: float, burst: float, now: float, seconds: float) -> None:
+        self._update(host, rate, burst, now, lambda b: b.hold_off(now, seconds) or 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM buckets")
+
+
+class HostLimiter:
+    """Per-host rate limiter. Each host gets `rate` requests per second with bursts of
+    up to `burst`; HOST_RATES, then the limiter's own host_rates, override both, Crawl-delay can only slow a host down
+    and Retry-After pauses it.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0, store: Optional[BucketStore] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates: Dict[str, Tuple[float, float]] = {}
+        self.crawl_delays: Dict[str, float] = {}
+        self.store = store or MemoryBucketStore()
+        self.clock = clock
+        self.sleep = sleep
+
+    def limits(self, host: str) -> Tuple[float, float]:
+        rate, burst = self.host_rates.get(host) or HOST_RATES.get(host, (self.rate, self.burst))
+        delay = self.crawl_delays.get(host)
+        if delay:
+            rate = min(rate, 1.0 / delay)
+        return rate, burst
+
+    def set_crawl_delay(self, host: str, delay: Optional[float]) -> None:
+        if delay and delay > 0:
+            self.crawl_delays[host] = float(delay)
+        else:
+            self.crawl_delays.pop(host, None)
+
+    def reserve(self, host: str) -> float:
+        """Take a slot for host and return how many seconds to wait before using it."""
+        rate, burst = self.limits(host)
+        return self.store.reserve(host, rate, burst, self.clock())
+
+    def acquire(self, host: str) -> float:
+        wait = self.reserve(host)
+        if wait > 0:
+            with tracing.span("rate_limit.sleep"):
+                self.sleep(wait)
+        return wait
+
+    async def acquire_async(self, host: str) -> float:
+        wait = self.reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def retry_after(self, host: str, seconds: float) -> None:
+        rate, burst = self.limits(host)
+        self.store.hold_off(host, rate, burst, self.clock(), seconds)
 
+    def reset(self) -> None:
+        self.store.reset()
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
     try:
-        # stdlib
-        if _HAS_STDLIB_ROBOTS and hasattr(rules, "can_fetch"):
-            return rules.can_fetch(ua, url)
-        # third-party
-        if _ThirdPartyRobots is not None and hasattr(rules, "is_allowed"):
-            return rules.is_allowed(ua, url)
-        return True
+        when = email.utils.parsedate_to_datetime(value).timestamp()
     except Exception:
-        return True
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+
+def default_limiter() -> HostLimiter:
+    path = store.db_path("rate_limit.sqlite")
+    bucket_store = MemoryBucketStore() if path == store.MEMORY else SQLiteBucketStore(path)
+    return HostLimiter(rate=1.0 / MIN_DELAY_SEC, burst=1.0, store=bucket_store)
+
+
+_cache: CacheBackend = default_backend()
+_robots: RobotsCache = ROBOTS
+_limiter: HostLimiter = default_limiter()
+
+
+def get_limiter() -> HostLimiter:
+    return _limiter
+
+
+def set_limiter(limiter: HostLimiter) -> None:
+    global _limiter
+    _limiter = limiter
+
+
+def get_cache() -> CacheBackend:
+    return _cache
+
+
+def set_cache(backend: CacheBackend) -> None:
+    global _cache
+    _cache = backend
+
+
+def ttl_for(url: str) -> float:
+    return HOST_TTL_SEC.get(_host(url), CACHE_TTL_SEC)
+
+
+@tracing.traced("robots_allowed")
+def robots_allowed(url: str, ua: str = UA["User-Agent"]) -> bool:
+    return _robots.allowed(url, ua)
 
 
-def polite_get(url: str, timeout: float = 20.0) -> Tuple[Optional[requests.Response], bool]:
+def get_robots() -> RobotsCache:
+    return _robots
+
+
+def set_robots(robots: RobotsCache) -> None:
+    global _robots
+    _robots = robots
+
+
+def _before_fetch(url: str) -> str:
+    host = _host(url)
+    _limiter.set_crawl_delay(host, _robots.crawl_delay(url))
+    _limiter.acquire(host)
+    return host
+
+
+def _after_fetch(host: str, resp) -> None:
+    if resp.status_code in (429, 503):
+        delay = parse_retry_after(resp.headers.get("Retry-After"))
+        if delay:
+            _limiter.retry_after(host, delay)
+
+
+def _get(url: str, headers: Dict[str, str], timeout: float, **kwargs):
+    """GET url through the host's limiter, re-sending on http_client.RETRY_STATUSES.
+    Each attempt takes its own token, after a backoff held on the host's bucket."""
+    for attempt in range(http_client.RETRIES + 1):
+        host = _before_fetch(url)
+        resp = http_client.get(url, headers=headers, timeout=timeout, **kwargs)
+        _after_fetch(host, resp)
+        if resp.status_code not in http_client.RETRY_STATUSES or attempt == http_client.RETRIES:
+            break
+        resp.close()
+        _limiter.retry_after(host, http_client.BACKOFF_SEC * 2 ** attempt)
+    return resp
+
+
+@tracing.traced("polite_get")
+def polite_get(url: str, timeout: float = 20.0) -> Tuple[Optional[CachedResponse], bool]:
     """Returns (response, allowed). If not allowed, response is None.
-    Caches content for CACHE_TTL_SEC and enforces MIN_DELAY_SEC per host.
+    Caches content for ttl_for(url) and paces each host through the limiter. Stale
+    entries carrying an ETag or Last-Modified are revalidated with a conditional GET.
     """
     allowed = robots_allowed(url)
     if not allowed:
@@ -79,19 +282,45 @@ def polite_get(url: str, timeout: float = 20.0) -> Tuple[Optional[requests.Respo
 
     # cache
     now = time.time()
-    cached = _content_cache.get(url)
-    if cached and now - cached[0] < CACHE_TTL_SEC:
-        return cached[1], True
+    cached = _cache.get(url)
+    if cached and now - cached.fetched_at < ttl_for(url):
+        return cached, True
 
     # backoff per host
-    host = _host(url)
-    last = _last_call.get(host, 0.0)
-    elapsed = now - last
-    if elapsed < MIN_DELAY_SEC:
-        time.sleep(MIN_DELAY_SEC - elapsed)
-
-    resp = requests.get(url, headers=UA, timeout=timeout)
-    _last_call[host] = time.time()
+    headers = dict(UA)
+    if cached:
+        headers.update(conditional_headers(cached))
+    resp = _get(url, headers, timeout)
+    if cached and resp.status_code == 304:
+        cached.fetched_at = time.time()
+        _cache.set(url, cached)
+        _cache.stats.revalidated += 1
+        return cached, True
+    out = CachedResponse.from_response(resp)
     if resp.ok:
-        _content_cache[url] = (time.time(), resp)
-    return resp, True
+        _cache.set(url, out)
+    return out, True
+
+
+@tracing.traced("polite_stream")
+def polite_stream(url: str, on_chunk: Callable[[bytes], bool], max_bytes: int = MAX_STREAM_BYTES,
+                  timeout: float = 20.0) -> Tuple[Optional[int], bool]:
+    """Stream the body of url into on_chunk until it returns True or max_bytes have
+    been read, then close the connection. Returns (status_code, allowed); status is
+    None when robots disallows. Nothing is cached here, callers cache what they keep.
+    """
+    if not robots_allowed(url):
+        return None, False
+    resp = _get(url, UA, timeout, stream=True)
+    try:
+        if not resp.ok:
+            return resp.status_code, True
+        read = 0
+        for chunk in resp.iter_content(STREAM_CHUNK):
+            read += len(chunk)
+            if on_chunk(chunk) or read >= max_bytes:
+                break
+    finally:
+        # Closing mid-body drops the connection instead of draining the rest of the page
+        resp.close()
+    return resp.status_code, True
@@ -0,0 +1,217 @@
+import re
+import threading
+import time
+import urllib.parse
+import urllib.robotparser
+from typing import Dict, Optional
+
+from core import http_client, store
+from core.http_client import UA
+from core.single_flight import SingleFlight
+
+# RFC 9309 asks crawlers not to rely on a cached robots.txt for more than a day
+DEFAULT_TTL_SEC = 24 * 3600.0
+MIN_TTL_SEC = 300.0
+MAX_TTL_SEC = 24 * 3600.0
+# 4xx means "no robots.txt": allow everything and remember that for the default TTL.
+# 5xx and network errors keep serving the last rules we had, retried after
+# ERROR_TTL_SEC; with none, the host is fully disallowed (RFC 9309 2.3.1.3).
+ERROR_TTL_SEC = 600.0
+UNREACHABLE = 599  # status recorded when robots.txt could not be fetched at all
+
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)", re.I)
+
+
+class RobotsEntry:
+    __slots__ = ("host", "status", "body", "etag", "last_modified", "fetched_at", "expires_at", "_parser")
+
+    def __init__(self, host: str, status: int, body: str, etag: Optional[str], last_modified: Optional[str],
+                 fetched_at: float, expires_at: float):
+        self.host = host
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self._parser: Optional[urllib.robotparser.RobotFileParser] = None
+
+    @property
+    def parser(self) -> Optional[urllib.robotparser.RobotFileParser]:
+        if self._parser is None and 200 <= self.status < 300 and self.body.strip():
+            rp = urllib.robotparser.RobotFileParser()
+            rp.parse(self.body.splitlines())
+            self._parser = rp
+        return self._parser
+
+    def fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def allows(self, ua: str, url: str) -> bool:
+        if self.status >= 500:
+            return False
+        rp = self.parser
+        if rp is None:
+            return True
+        try:
+            return rp.can_fetch(ua, url)
+        except Exception:
+            return True
+
+    def crawl_delay(self, ua: str) -> Optional[float]:
+        rp = self.parser
+        if rp is None:
+            return None
+        try:
+            d = rp.crawl_delay(ua)
+        except Exception:
+            return None
+        return float(d) if d is not None else None
+
+
+class RobotsStats:
+    __slots__ = ("lookups", "memory_hits", "store_hits", "fetches", "not_modified", "negative", "coalesced")
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
+
+    @property
+    def fetches_saved(self) -> int:
+        return self.lookups - self.fetches
+
+    def as_dict(self) -> Dict[str, int]:
+        out = {k: getattr(self, k) for k in self.__slots__}
+        out["fetches_saved"] = self.fetches_saved
+        return out
+
+
+def ttl_from_headers(headers) -> float:
+    cc = headers.get("Cache-Control") or headers.get("cache-control") or ""
+    if "no-store" in cc or "no-cache" in cc:
+        return MIN_TTL_SEC
+    m = _MAX_AGE.search(cc)
+    if m:
+        return min(MAX_TTL_SEC, max(MIN_TTL_SEC, float(m.group(1))))
+    return DEFAULT_TTL_SEC
+
+
+class RobotsCache:
+    """robots.txt rules per host: in-memory parsers in front of a SQLite store shared
+    between processes, with TTL expiry, conditional re-fetch, negative caching and
+    single-flight fetches.
+    """
+
+    def __init__(self, path: str = store.MEMORY, clock=time.time):
+        self.clock = clock
+        self.stats = RobotsStats()
+        self._entries: Dict[str, RobotsEntry] = {}
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._conn = store.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS robots ("
+            " host TEXT PRIMARY KEY, status INTEGER, body TEXT, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL, expires_at REAL)"
+        )
+
+    def _load(self, host: str) -> Optional[RobotsEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, body, etag, last_modified, fetched_at, expires_at FROM robots WHERE host = ?", (host,)
+            ).fetchone()
+        return RobotsEntry(host, *row) if row else None
+
+    def _save(self, e: RobotsEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO robots VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (e.host, e.status, e.body, e.etag, e.last_modified, e.fetched_at, e.expires_at),
+            )
+        self._entries[e.host] = e
+
+    def _fetch(self, scheme: str, host: str, stale: Optional[RobotsEntry]) -> RobotsEntry:
+        # Another process may have refreshed the store while we waited
+        stored = self._load(host)
+        now = self.clock()
+        if stored and stored.fresh(now):
+            self.stats.store_hits += 1
+            self._entries[host] = stored
+            return stored
+        stale = stored or stale
+
+        headers = dict(UA)
+        if stale and stale.etag:
+            headers["If-None-Match"] = stale.etag
+        if stale and stale.last_modified:
+            headers["If-Modified-Since"] = stale.last_modified
+
+        self.stats.fetches += 1
+        try:
+            resp = http_client.get(f"{scheme}://{host}/robots.txt", headers=headers, timeout=10)
+        except Exception:
+            return self._unreachable(host, UNREACHABLE, stale, now)
+
+        if resp.status_code == 304 and stale:
+            self.stats.not_modified += 1
+            stale.fetched_at = now
+            stale.expires_at = now + ttl_from_headers(resp.headers)
+            self._save(stale)
+            return stale
+
+        if resp.status_code >= 500:
+            return self._unreachable(host, resp.status_code, stale, now)
+        if resp.status_code >= 400:
+            self.stats.negative += 1
+            entry = RobotsEntry(host, resp.status_code, "", None, None, now, now + DEFAULT_TTL_SEC)
+        else:
+            entry = RobotsEntry(
+                host, resp.status_code, resp.text, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                now, now + ttl_from_headers(resp.headers),
+            )
+        self._save(entry)
+        return entry
+
+    def _unreachable(self, host: str, status: int, stale: Optional[RobotsEntry], now: float) -> RobotsEntry:
+        # Keep the rules we already have rather than dropping them during an outage
+        self.stats.negative += 1
+        if stale:
+            stale.expires_at = now + ERROR_TTL_SEC
+            entry = stale
+        else:
+            entry = RobotsEntry(host, status, "", None, None, now, now + ERROR_TTL_SEC)
+        self._save(entry)
+        return entry
+
+    def entry(self, url: str) -> RobotsEntry:
+        parts = urllib.parse.urlparse(url)
+        host = parts.netloc
+        self.stats.lookups += 1
+        e = self._entries.get(host)
+        if e and e.fresh(self.clock()):
+            self.stats.memory_hits += 1
+            return e
+        e, shared = self._flight.do(host, lambda: self._fetch(parts.scheme or "https", host, e))
+        if shared:
+            self.stats.coalesced += 1
+        return e
+
+    def allowed(self, url: str, ua: str = UA["User-Agent"]) -> bool:
+        try:
+            return self.entry(url).allows(ua, url)
+        except Exception:
+            return True
+
+    def crawl_delay(self, url: str, ua: str = UA["User-Agent"]) -> Optional[float]:
+        try:
+            return self.entry(url).crawl_delay(ua)
+        except Exception:
+            return None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM robots")
+
+
+ROBOTS = RobotsCache(store.db_path("robots.sqlite"))
@@ -0,0 +1,26 @@
+import os
+import sqlite3
+
+# Directory for on-disk stores shared between Streamlit worker processes.
+# Unset means every store lives in memory for the lifetime of the process.
+CACHE_DIR = os.getenv("PROPLENS_CACHE_DIR")
+
+MEMORY = ":memory:"
+
+
+def db_path(name: str) -> str:
+    if not CACHE_DIR:
+        return MEMORY
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Autocommit connection usable from several threads. Callers serialise access
+    with their own lock and open explicit transactions when they need one.
+    """
+    conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False, isolation_level=None)
+    if path != MEMORY:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,275 @@
+"""Spans around the hot path, per-stage latency histograms and per-lookup traces.
+
+Off unless PROPLENS_TRACE=true (or enable() is called). When off, a traced
+function costs one flag check on top of the call, and span() hands back a shared
+no-op context manager.
+
+When on, every span feeds a histogram for its stage (log-spaced buckets, about
+12% wide, so p50/p95/p99 are read straight off the counts). Spans that run
+inside trace() are also kept on that Trace, for a waterfall of one lookup. The
+trace travels in a contextvar; worker threads see it when their task is wrapped
+with propagate().
+
+With PROPLENS_TRACE_FILE set, the histograms are written there as Prometheus
+text, or as JSON if the name ends in .json, after each trace (at most every
+EXPORT_EVERY_SEC) and at exit.
+"""
+import atexit
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_FILE = os.getenv("PROPLENS_TRACE_FILE")
+EXPORT_EVERY_SEC = 10.0
+
+# Bucket upper bounds in seconds: 20 per decade from 10 us to 100 s
+BOUNDS: List[float] = [1e-5 * 10 ** (i / 20) for i in range(141)]
+PROM_EVERY = 5  # Prometheus export lists every 5th bound, 4 per decade
+QUANTILES = (0.5, 0.95, 0.99)
+
+_enabled = os.getenv("PROPLENS_TRACE", "false").lower() == "true"
+_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("proplens_trace", default=None)
+_depth: contextvars.ContextVar[int] = contextvars.ContextVar("proplens_span_depth", default=0)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)  # last bucket is overflow
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, sec: float) -> None:
+        self.counts[bisect.bisect_left(BOUNDS, sec)] += 1
+        self.count += 1
+        self.sum += sec
+        if sec > self.max:
+            self.max = sec
+
+    def quantile(self, q: float) -> float:
+        """Seconds below which a fraction q of observations fall, interpolated
+        within the bucket holding that rank."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = BOUNDS[i - 1] if i else 0.0
+                hi = BOUNDS[i] if i < len(BOUNDS) else self.max
+                return min(self.max, lo + (hi - lo) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def as_dict(self, stage: str) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"stage": stage, "count": self.count}
+        for q in QUANTILES:
+            out[f"p{round(q * 100)}_ms"] = round(self.quantile(q) * 1000, 3)
+        out["max_ms"] = round(self.max * 1000, 3)
+        out["total_ms"] = round(self.sum * 1000, 3)
+        return out
+
+
+class Trace:
+    """Spans of one lookup, as (name, start_ms, ms, depth, thread) relative to its start.
+    Spans finishing after close() (work left running in the background) are dropped."""
+
+    __slots__ = ("name", "t0", "spans", "closed")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.t0 = time.perf_counter()
+        self.spans: List[Tuple[str, float, float, int, str]] = []
+        self.closed = False
+
+    def add(self, name: str, start: float, sec: float, depth: int) -> None:
+        if not self.closed:
+            self.spans.append((name, (start - self.t0) * 1000, sec * 1000, depth, threading.current_thread().name))
+
+    def waterfall(self) -> List[Dict[str, Any]]:
+        return [{"span": name, "start_ms": round(start, 3), "ms": round(ms, 3), "depth": depth, "thread": thread}
+                for name, start, ms, depth, thread in sorted(self.spans, key=lambda s: s[1])]
+
+
+_histograms: Dict[str, Histogram] = {}
+_lock = threading.Lock()
+_last_export = 0.0
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def record(name: str, start: float, sec: float) -> None:
+    """Add a span timed by the caller: start from time.perf_counter(), sec long."""
+    if not _enabled:
+        return
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = Histogram()
+        h.observe(sec)
+    t = _trace.get()
+    if t is not None:
+        t.add(name, start, sec, _depth.get())
+
+
+class _Span:
+    __slots__ = ("name", "start", "token")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.token = _depth.set(_depth.get() + 1)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        sec = time.perf_counter() - self.start
+        _depth.reset(self.token)
+        record(self.name, self.start, sec)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Context manager timing a block as stage `name`."""
+    return _Span(name) if _enabled else _NO_SPAN
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator timing every call of a function as stage `name` (default: its qualified name)."""
+
+    def wrap(fn: F) -> F:
+        stage = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(stage):
+                return fn(*args, **kwargs)
+
+        return inner  # type: ignore[return-value]
+
+    return wrap
+
+
+def propagate(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn bound to a copy of the caller's context, so spans it records in another
+    thread join the caller's trace. Call once per task: a context cannot be
+    entered by two threads at once. Returns fn itself when tracing is off."""
+    if not _enabled:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+@contextmanager
+def trace(name: str = "lookup") -> Iterator[Optional[Trace]]:
+    """Collect the spans of the enclosed block (and of propagated workers) on a Trace.
+    Yields None when tracing is off."""
+    if not _enabled:
+        yield None
+        return
+    t = Trace(name)
+    trace_token = _trace.set(t)
+    depth_token = _depth.set(1)
+    try:
+        yield t
+    finally:
+        _depth.reset(depth_token)
+        record(name, t.t0, time.perf_counter() - t.t0)
+        t.closed = True
+        _trace.reset(trace_token)
+        _maybe_export()
+
+
+def snapshot() -> List[Dict[str, Any]]:
+    """Count, p50/p95/p99, max and total per stage, slowest total first."""
+    with _lock:
+        rows = [h.as_dict(stage) for stage, h in _histograms.items()]
+    return sorted(rows, key=lambda r: -r["total_ms"])
+
+
+def prometheus() -> str:
+    """Histograms in the Prometheus text exposition format."""
+    lines = ["# HELP proplens_stage_seconds Time spent in each traced stage.",
+             "# TYPE proplens_stage_seconds histogram"]
+    quantiles = ["# HELP proplens_stage_quantile_seconds Estimated latency quantiles per stage.",
+                 "# TYPE proplens_stage_quantile_seconds gauge"]
+    with _lock:
+        items = sorted((stage, list(h.counts), h.count, h.sum, [h.quantile(q) for q in QUANTILES])
+                       for stage, h in _histograms.items())
+    for stage, counts, count, total, qs in items:
+        label = stage.replace("\\", "\\\\").replace('"', '\\"')
+        cumulative = 0
+        for i, bound in enumerate(BOUNDS):
+            cumulative += counts[i]
+            if i % PROM_EVERY == 0:
+                lines.append(f'proplens_stage_seconds_bucket{{stage="{label}",le="{bound:.4g}"}} {cumulative}')
+        lines.append(f'proplens_stage_seconds_bucket{{stage="{label}",le="+Inf"}} {count}')
+        lines.append(f'proplens_stage_seconds_sum{{stage="{label}"}} {total:.6f}')
+        lines.append(f'proplens_stage_seconds_count{{stage="{label}"}} {count}')
+        for q, v in zip(QUANTILES, qs):
+            quantiles.append(f'proplens_stage_quantile_seconds{{stage="{label}",quantile="{q}"}} {v:.6f}')
+    return "\n".join(lines + quantiles) + "\n"
+
+
+def export(path: Optional[str] = None) -> Optional[str]:
+    """Write the histograms to path (default TRACE_FILE): JSON for *.json, else
+    Prometheus text. Returns the path written, or None without one."""
+    path = path or TRACE_FILE
+    if not path:
+        return None
+    body = json.dumps(snapshot(), indent=1) if path.endswith(".json") else prometheus()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(tmp, path)
+    return path
+
+
+def _maybe_export() -> None:
+    global _last_export
+    if not TRACE_FILE:
+        return
+    now = time.monotonic()
+    if now - _last_export >= EXPORT_EVERY_SEC:
+        _last_export = now
+        export()
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+
+
+if TRACE_FILE:
+    atexit.register(lambda: _enabled and export())
@@ -1,6 +1,31 @@
 from pydantic import BaseModel
 from typing import Optional, Literal
 
+# Full names of the states and territories; state_code also accepts the codes themselves
+STATE_CODES = {
+    "NEW SOUTH WALES": "NSW",
+    "VICTORIA": "VIC",
+    "QUEENSLAND": "QLD",
+    "SOUTH AUSTRALIA": "SA",
+    "WESTERN AUSTRALIA": "WA",
+    "TASMANIA": "TAS",
+    "NORTHERN TERRITORY": "NT",
+    "AUSTRALIAN CAPITAL TERRITORY": "ACT",
+}
+
+
+def state_code(state: Optional[str]) -> Optional[str]:
+    """Upper-case code ("NSW") for a state as geocoders and users write it
+    ("New South Wales", "nsw", "N.S.W."). Anything unrecognised comes back
+    cleaned but otherwise as given; None or blank gives None."""
+    s = " ".join((state or "").upper().replace(".", " ").split())
+    if not s:
+        return None
+    compact = s.replace(" ", "")
+    if compact in STATE_CODES.values():
+        return compact
+    return STATE_CODES.get(s, s)
+
 
 class AddressResolved(BaseModel):
     query: str
@@ -17,6 +42,8 @@ class FieldValue(BaseModel):
     value: Optional[float | str]
     source: Literal["jsonld","open_data","estimated","user"]
     confidence: float
+    # Where the value came from: page URLs, "open_data" or "estimated"; several when sources agreed
+    provenance: list[str] = []
 
 
 class PropertyFacts(BaseModel):
@@ -0,0 +1,325 @@
+"""Columnar PropertyFacts for bulk work.
+
+One PropertyFacts with its seven FieldValues is about 6 KB of Python objects; a
+row here is about 100 bytes of columns plus its text. Each fact field is a float64 value, a float32
+confidence and an int8 source code. The fields are stored fields x rows, so one
+field over all rows is contiguous. Repeating strings (state, postcode, suburb,
+LGA, dwelling type) are int32 codes into a vocabulary. Free text (query,
+display name, and the source URLs and provenance as JSON) is one UTF-8 buffer
+with offsets.
+
+Slicing with a slice is zero-copy: every column becomes a view and the text
+buffers and vocabularies are shared. save() writes one .npy per column, and
+load() memory-maps them. Converting a row to or from the pydantic models costs
+only that row.
+"""
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from models.facts import AddressResolved, FieldValue, PropertyFacts
+
+SOURCES = ("jsonld", "open_data", "estimated", "user")
+NUMERIC_FIELDS = ("beds", "baths", "cars", "land_sqm", "build_sqm", "last_sold_price")
+COUNT_FIELDS = ("beds", "baths", "cars")  # read back as int when whole, as the app and report show them
+FIELDS = ("dwelling_type",) + NUMERIC_FIELDS
+LABEL_COLUMNS = ("state", "postcode", "suburb", "lga", "dwelling_type")
+TEXT_COLUMNS = ("query", "display_name", "extra")  # extra: JSON of source_urls and provenance
+NO_SOURCE = -1  # the FieldValue itself is None (last_sold_price is optional)
+TABLE_VERSION = 1
+
+_SOURCE_CODE = {s: i for i, s in enumerate(SOURCES)}
+
+
+class Labels:
+    """A coded string column: vocab[codes[i]], with -1 for None. The batch
+    calculators take it wherever they take an array of labels, and evaluate
+    their rule once per vocabulary entry."""
+
+    __slots__ = ("codes", "vocab")
+
+    def __init__(self, codes: np.ndarray, vocab: Sequence[str]):
+        self.codes = codes
+        self.vocab = vocab
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        c = int(self.codes[i])
+        return self.vocab[c] if c >= 0 else None
+
+    def decode(self) -> np.ndarray:
+        return np.array(list(self.vocab) + [None], dtype=object)[self.codes]
+
+
+class Text:
+    """Variable-length strings: row i is data[offsets[i]:offsets[i + 1]]."""
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+
+def _confidence(c: np.float32) -> float:
+    # float32 holds about 7 digits; confidences are kept to 3 or 4 decimals upstream
+    return round(float(c), 6)
+
+
+class FactsRow:
+    """View of one row; reads go straight to the table's columns."""
+
+    __slots__ = ("table", "i")
+
+    def __init__(self, table: "PropertyFactsTable", i: int):
+        self.table = table
+        self.i = i
+
+    def value(self, field: str):
+        t, i = self.table, self.i
+        if field == "dwelling_type":
+            return t.labels["dwelling_type"][i]
+        v = t.value[FIELDS.index(field), i]
+        if np.isnan(v):
+            return None
+        return int(v) if field in COUNT_FIELDS and v.is_integer() else float(v)
+
+    def label(self, column: str) -> Optional[str]:
+        return self.table.labels[column][self.i]
+
+    def text(self, column: str) -> str:
+        return self.table.text[column][self.i]
+
+    @property
+    def display_name(self) -> str:
+        return self.text("display_name")
+
+    def to_model(self) -> PropertyFacts:
+        t, i = self.table, self.i
+        extra = json.loads(self.text("extra") or "{}")
+        prov = extra.get("prov", {})
+        address = AddressResolved(
+            query=self.text("query"), display_name=self.display_name,
+            lat=float(t.lat[i]), lon=float(t.lon[i]),
+            suburb=self.label("suburb"), state=self.label("state"), postcode=self.label("postcode"), lga=self.label("lga"),
+        )
+        fields: Dict[str, Optional[FieldValue]] = {}
+        for j, f in enumerate(FIELDS):
+            src = int(t.source[j, i])
+            if src == NO_SOURCE:
+                fields[f] = None
+                continue
+            fields[f] = FieldValue(value=self.value(f), source=SOURCES[src], confidence=_confidence(t.confidence[j, i]),
+                                   provenance=prov.get(f, [SOURCES[src]]))
+        return PropertyFacts(address=address, source_urls=extra.get("urls", []), **fields)
+
+
+class PropertyFactsTable:
+    __slots__ = ("lat", "lon", "value", "confidence", "source", "labels", "text")
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, value: np.ndarray, confidence: np.ndarray,
+                 source: np.ndarray, labels: Dict[str, Labels], text: Dict[str, Text]):
+        self.lat = lat
+        self.lon = lon
+        self.value = value  # (len(FIELDS), rows) float64, NaN missing; dwelling_type lives in labels
+        self.confidence = confidence  # (len(FIELDS), rows) float32
+        self.source = source  # (len(FIELDS), rows) int8 into SOURCES, NO_SOURCE for a None FieldValue
+        self.labels = labels
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    # --- access ---------------------------------------------------------------------
+
+    def column(self, name: str) -> Union[np.ndarray, Labels]:
+        """A fact field's values, a label column, or lat / lon."""
+        if name in self.labels:
+            return self.labels[name]
+        if name in ("lat", "lon"):
+            return getattr(self, name)
+        return self.value[FIELDS.index(name)]
+
+    def row(self, i: int) -> FactsRow:
+        return FactsRow(self, range(len(self))[i])
+
+    def __iter__(self) -> Iterator[FactsRow]:
+        return (FactsRow(self, i) for i in range(len(self)))
+
+    def __getitem__(self, key) -> Union[FactsRow, "PropertyFactsTable"]:
+        """An int gives a row view. A slice gives a table of views. A boolean mask
+        or an index array gives a copy that still shares the text and vocabularies."""
+        if isinstance(key, (int, np.integer)):
+            return self.row(int(key))
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                key = np.arange(start, stop, step)
+            else:
+                return PropertyFactsTable(
+                    self.lat[start:stop], self.lon[start:stop], self.value[:, start:stop],
+                    self.confidence[:, start:stop], self.source[:, start:stop],
+                    {k: Labels(v.codes[start:stop], v.vocab) for k, v in self.labels.items()},
+                    {k: Text(v.offsets[start:stop + 1], v.data) for k, v in self.text.items()},
+                )
+        idx = np.flatnonzero(key) if np.asarray(key).dtype == bool else np.asarray(key, dtype=np.intp)
+        return PropertyFactsTable(
+            self.lat[idx], self.lon[idx], self.value[:, idx], self.confidence[:, idx], self.source[:, idx],
+            {k: Labels(v.codes[idx], v.vocab) for k, v in self.labels.items()},
+            {k: _take_text(v, idx) for k, v in self.text.items()},
+        )
+
+    def to_models(self) -> List[PropertyFacts]:
+        return [r.to_model() for r in self]
+
+    # --- building -------------------------------------------------------------------
+
+    @classmethod
+    def from_models(cls, facts: Iterable[PropertyFacts]) -> "PropertyFactsTable":
+        b = FactsTableBuilder()
+        for f in facts:
+            b.add(f)
+        return b.build()
+
+    @classmethod
+    def read_jsonl(cls, path: str) -> "PropertyFactsTable":
+        """A batch pipeline JSONL output (one PropertyFacts per line, plus a key)."""
+        b = FactsTableBuilder()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    d = json.loads(line)
+                    d.pop("key", None)
+                    b.add(PropertyFacts.model_validate(d))
+        return b.build()
+
+    # --- persistence ----------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        """One .npy per column plus meta.json, in directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        arrays = {"lat": self.lat, "lon": self.lon, "value": self.value, "confidence": self.confidence, "source": self.source}
+        for k, v in self.labels.items():
+            arrays[f"label_{k}"] = v.codes
+        for k, v in self.text.items():
+            lo, hi = int(v.offsets[0]), int(v.offsets[-1])
+            arrays[f"text_{k}_offsets"] = v.offsets - lo
+            arrays[f"text_{k}_data"] = v.data[lo:hi]
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arr))
+        meta = {"version": TABLE_VERSION, "rows": len(self), "fields": FIELDS, "sources": SOURCES,
+                "vocab": {k: list(v.vocab) for k, v in self.labels.items()}}
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "PropertyFactsTable":
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != TABLE_VERSION or tuple(meta["fields"]) != FIELDS:
+            raise ValueError(f"{path}: facts table written by an incompatible version")
+        mode = "r" if mmap else None
+
+        def arr(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+
+        return cls(arr("lat"), arr("lon"), arr("value"), arr("confidence"), arr("source"),
+                   {k: Labels(arr(f"label_{k}"), meta["vocab"][k]) for k in LABEL_COLUMNS},
+                   {k: Text(arr(f"text_{k}_offsets"), arr(f"text_{k}_data")) for k in TEXT_COLUMNS})
+
+
+def _take_text(t: Text, idx: np.ndarray) -> Text:
+    lengths = t.offsets[idx + 1] - t.offsets[idx]
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    data = np.concatenate([t.data[t.offsets[i]:t.offsets[i + 1]] for i in idx]) if len(idx) else t.data[:0]
+    return Text(offsets, data)
+
+
+class FactsTableBuilder:
+    """Appends rows as plain scalars; build() makes the arrays once."""
+
+    def __init__(self):
+        self._lat: List[float] = []
+        self._lon: List[float] = []
+        self._value: List[List[float]] = [[] for _ in FIELDS]
+        self._conf: List[List[float]] = [[] for _ in FIELDS]
+        self._source: List[List[int]] = [[] for _ in FIELDS]
+        self._codes: Dict[str, List[int]] = {k: [] for k in LABEL_COLUMNS}
+        self._vocab: Dict[str, Dict[str, int]] = {k: {} for k in LABEL_COLUMNS}
+        self._text: Dict[str, List[bytes]] = {k: [] for k in TEXT_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._lat)
+
+    def _code(self, column: str, label: Optional[str]) -> None:
+        if label is None:
+            self._codes[column].append(-1)
+            return
+        vocab = self._vocab[column]
+        code = vocab.get(label)
+        if code is None:
+            code = vocab[label] = len(vocab)
+        self._codes[column].append(code)
+
+    def add(self, facts: PropertyFacts) -> None:
+        a = facts.address
+        self._lat.append(a.lat)
+        self._lon.append(a.lon)
+        for col in ("state", "postcode", "suburb", "lga"):
+            self._code(col, getattr(a, col))
+        prov = {}
+        for j, f in enumerate(FIELDS):
+            fv: Optional[FieldValue] = getattr(facts, f)
+            if fv is None:
+                self._value[j].append(np.nan)
+                self._conf[j].append(np.nan)
+                self._source[j].append(NO_SOURCE)
+                if f == "dwelling_type":
+                    self._code(f, None)
+                continue
+            if f == "dwelling_type":
+                self._code(f, None if fv.value is None else str(fv.value))
+                self._value[j].append(np.nan)
+            else:
+                self._value[j].append(np.nan if fv.value is None else float(fv.value))
+            self._conf[j].append(fv.confidence)
+            self._source[j].append(_SOURCE_CODE[fv.source])
+            if fv.provenance and fv.provenance != [fv.source]:
+                prov[f] = fv.provenance
+        extra = {}
+        if facts.source_urls:
+            extra["urls"] = facts.source_urls
+        if prov:
+            extra["prov"] = prov
+        self._text["query"].append(a.query.encode("utf-8"))
+        self._text["display_name"].append(a.display_name.encode("utf-8"))
+        self._text["extra"].append(json.dumps(extra).encode("utf-8") if extra else b"")
+
+    def build(self) -> PropertyFactsTable:
+        text = {}
+        for k, parts in self._text.items():
+            offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+            np.cumsum([len(p) for p in parts], out=offsets[1:])
+            text[k] = Text(offsets, np.frombuffer(b"".join(parts), dtype=np.uint8).copy())
+        labels = {k: Labels(np.asarray(self._codes[k], dtype=np.int32), list(self._vocab[k])) for k in LABEL_COLUMNS}
+        return PropertyFactsTable(
+            np.asarray(self._lat, dtype=np.float64), np.asarray(self._lon, dtype=np.float64),
+            np.asarray(self._value, dtype=np.float64).reshape(len(FIELDS), -1),
+            np.asarray(self._conf, dtype=np.float32).reshape(len(FIELDS), -1),
+            np.asarray(self._source, dtype=np.int8).reshape(len(FIELDS), -1),
+            labels, text,
+        )
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ScenarioInputs(BaseModel):
+    price: float
+    deposit_pct: float = 20.0
+    state: str = "NSW"
+    owner_occ: bool = False
+    years: int = 30
+    interest_only_years: int = 0
+    horizon_years: Optional[int] = None  # defaults to the loan term
+    # Variable rate: mean-reverting around its long-run level
+    rate: float = 0.0625
+    rate_long_run: Optional[float] = None  # defaults to rate
+    rate_reversion: float = 0.25  # per year
+    rate_vol: float = 0.01  # annual standard deviation, in rate points
+    rate_floor: float = 0.01
+    fixed_rate: Optional[float] = None
+    fixed_years: int = 0
+    # Rent, vacancy and running costs, all per month unless noted
+    rent_week: float = 0.0
+    rent_growth: float = 0.03  # per year
+    rent_growth_vol: float = 0.03
+    vacancy_rate: float = 0.03  # share of months vacant
+    pm_fee_pct: float = 6.0
+    outgoings_month: float = 0.0
+    expense_inflation: float = 0.03
+    expense_inflation_vol: float = 0.01
@@ -0,0 +1,156 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core import store
+from core.single_flight import SingleFlight
+from models.facts import AddressResolved
+from providers.geocode_local import search_addresses
+
+MIN_CHARS = 4
+RESULT_LIMIT = 5  # Nominatim limit used by search_addresses
+TTL_SEC = 7 * 24 * 3600.0
+MAX_ENTRIES = 4096
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+Entry = Tuple[float, List[AddressResolved]]
+
+
+def normalise_query(query: str) -> str:
+    return _SPACE.sub(" ", _PUNCT.sub(" ", query.lower())).strip()
+
+
+def _matches(address: AddressResolved, tokens: List[str]) -> bool:
+    words = normalise_query(address.display_name).split()
+    # Every token but the last must be a whole word; the last may still be being typed
+    for t in tokens[:-1]:
+        if t not in words:
+            return False
+    return any(w.startswith(tokens[-1]) for w in words)
+
+
+class AutocompleteStats:
+    __slots__ = ("lookups", "hits", "prefix_hits", "misses", "coalesced")
+
+    def __init__(self):
+        for k in self.__slots__:
+            setattr(self, k, 0)
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.hits + self.prefix_hits) / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        out: Dict[str, float] = {k: getattr(self, k) for k in self.__slots__}
+        out["hit_rate"] = round(self.hit_rate, 4)
+        return out
+
+
+class AddressAutocomplete:
+    """Suggestions for a typed address, cached by normalised query.
+
+    Lookups try, in order: an exact cached query; a cached shorter prefix whose
+    results still match the longer query; then the upstream geocoder. Concurrent
+    identical misses share one upstream call. Entries live in a bounded in-process
+    LRU backed by a SQLite table shared across sessions and processes.
+    """
+
+    def __init__(self, upstream: Callable[[str], List[AddressResolved]] = search_addresses,
+                 path: str = store.MEMORY, ttl: float = TTL_SEC, max_entries: int = MAX_ENTRIES,
+                 clock: Callable[[], float] = time.time):
+        self.upstream = upstream
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = AutocompleteStats()
+        self._mem: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._conn = store.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS autocomplete (query TEXT PRIMARY KEY, results TEXT, fetched_at REAL)"
+        )
+
+    def _get(self, key: str) -> Optional[List[AddressResolved]]:
+        now = self.clock()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._mem.move_to_end(key)
+                    return entry[1]
+                del self._mem[key]
+            row = self._conn.execute(
+                "SELECT results, fetched_at FROM autocomplete WHERE query = ?", (key,)
+            ).fetchone()
+        if row is None or now - row[1] >= self.ttl:
+            return None
+        results = [AddressResolved(**d) for d in json.loads(row[0])]
+        self._remember(key, row[1], results)
+        return results
+
+    def _remember(self, key: str, fetched_at: float, results: List[AddressResolved]) -> None:
+        with self._lock:
+            self._mem[key] = (fetched_at, results)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def _put(self, key: str, results: List[AddressResolved]) -> None:
+        now = self.clock()
+        self._remember(key, now, results)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO autocomplete VALUES (?, ?, ?)",
+                (key, json.dumps([r.model_dump() for r in results]), now),
+            )
+
+    def _from_prefix(self, key: str, query: str) -> Optional[List[AddressResolved]]:
+        tokens = key.split()
+        for end in range(len(key) - 1, MIN_CHARS - 1, -1):
+            cached = self._get(key[:end].rstrip())
+            # A full page of results may have cut off the address we want, and an
+            # empty one says nothing since Nominatim does not match prefixes
+            if not cached or len(cached) >= RESULT_LIMIT:
+                continue
+            hits = [a.model_copy(update={"query": query}) for a in cached if _matches(a, tokens)]
+            if hits:
+                return hits
+        return None
+
+    def suggest(self, query: str) -> List[AddressResolved]:
+        key = normalise_query(query)
+        if len(key) < MIN_CHARS:
+            return []
+        self.stats.lookups += 1
+        cached = self._get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+        narrowed = self._from_prefix(key, query)
+        if narrowed is not None:
+            self.stats.prefix_hits += 1
+            return narrowed
+
+        def fetch() -> List[AddressResolved]:
+            results = self.upstream(query)
+            self._put(key, results)
+            return results
+
+        self.stats.misses += 1
+        results, shared = self._flight.do(key, fetch)
+        if shared:
+            self.stats.coalesced += 1
+        return results
+
+
+AUTOCOMPLETE = AddressAutocomplete(path=store.db_path("autocomplete.sqlite"))
+
+
+def suggest_addresses(query: str) -> List[AddressResolved]:
+    return AUTOCOMPLETE.suggest(query)
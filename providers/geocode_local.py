@@ -0,0 +1,214 @@
+"""Offline address lookup over a local SQLite FTS5 index built from a bulk CSV
+(for example a flattened G-NAF extract). Falls back to Nominatim on a miss.
+
+    python -m providers.geocode_local build addresses.csv addresses.sqlite
+    python -m providers.geocode_local query addresses.sqlite "130 alex ave scho"
+"""
+import argparse
+import csv
+import difflib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from models.facts import AddressResolved
+from providers import geocode_osm
+from providers.lga_resolver import fill_lga
+
+INDEX_PATH = os.getenv("PROPLENS_ADDRESS_INDEX")
+MMAP_BYTES = 1 << 30
+CANDIDATES = 50
+NARROW_CANDIDATES = 1000
+BATCH = 50_000
+
+_WORD = re.compile(r"\w+")
+
+# Column names tried in order when reading the CSV
+_COLS: Dict[str, Sequence[str]] = {
+    "display_name": ("display_name", "address", "full_address"),
+    "number": ("number_first", "number", "house_number"),
+    "street": ("street_name", "street"),
+    "street_type": ("street_type_code", "street_type"),
+    "suburb": ("locality_name", "suburb", "locality"),
+    "state": ("state_abbreviation", "state"),
+    "postcode": ("postcode",),
+    "lat": ("latitude", "lat"),
+    "lon": ("longitude", "lon", "lng"),
+    "lga": ("lga_name", "lga"),
+}
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _pick(row: Dict[str, str], key: str) -> Optional[str]:
+    for c in _COLS[key]:
+        v = row.get(c)
+        if v:
+            return v.strip()
+    return None
+
+
+def _rows(path: str) -> Iterator[Tuple]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {k.lower(): v for k, v in row.items() if k}
+            lat, lon = _pick(row, "lat"), _pick(row, "lon")
+            if not lat or not lon:
+                continue
+            suburb, state, postcode = _pick(row, "suburb"), _pick(row, "state"), _pick(row, "postcode")
+            name = _pick(row, "display_name")
+            if not name:
+                street = " ".join(x for x in (_pick(row, "number"), _pick(row, "street"), _pick(row, "street_type")) if x)
+                name = ", ".join(x for x in (street.title(), " ".join(y for y in ((suburb or "").title(), state, postcode) if y)) if x)
+            yield name, float(lat), float(lon), suburb and suburb.title(), state, postcode, _pick(row, "lga")
+
+
+def build_index(csv_path: str, index_path: str, rows: Optional[Iterable[Tuple]] = None) -> int:
+    """Build the index from csv_path (or pre-parsed rows). Returns the address count."""
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    conn = sqlite3.connect(index_path, isolation_level=None)
+    conn.executescript(
+        """
+        PRAGMA journal_mode=OFF;
+        PRAGMA synchronous=OFF;
+        PRAGMA page_size=8192;
+        CREATE TABLE addresses (id INTEGER PRIMARY KEY, display_name TEXT, lat REAL, lon REAL,
+                                suburb TEXT, state TEXT, postcode TEXT, lga TEXT);
+        CREATE VIRTUAL TABLE addr_fts USING fts5(display_name, content='addresses', content_rowid='id',
+                                                 prefix='1 2 3', detail='column');
+        CREATE TABLE vocab (id INTEGER PRIMARY KEY, term TEXT UNIQUE);
+        CREATE VIRTUAL TABLE vocab_tri USING fts5(term, content='vocab', content_rowid='id',
+                                                  tokenize='trigram', detail='none');
+        """
+    )
+    vocab: set[str] = set()
+    n = 0
+    batch = []
+    conn.execute("BEGIN")
+    for r in rows if rows is not None else _rows(csv_path):
+        batch.append(r)
+        vocab.update(_tokens(r[0]))
+        if len(batch) >= BATCH:
+            conn.executemany("INSERT INTO addresses (display_name, lat, lon, suburb, state, postcode, lga) VALUES (?,?,?,?,?,?,?)", batch)
+            n += len(batch)
+            batch.clear()
+    if batch:
+        conn.executemany("INSERT INTO addresses (display_name, lat, lon, suburb, state, postcode, lga) VALUES (?,?,?,?,?,?,?)", batch)
+        n += len(batch)
+    conn.executemany("INSERT INTO vocab (term) VALUES (?)", ((t,) for t in sorted(vocab) if not t.isdigit()))
+    conn.execute("COMMIT")
+    conn.execute("INSERT INTO addr_fts(addr_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO vocab_tri(vocab_tri) VALUES ('rebuild')")
+    conn.execute("INSERT INTO addr_fts(addr_fts) VALUES ('optimize')")
+    conn.execute("VACUUM")
+    conn.close()
+    return n
+
+
+class LocalAddressIndex:
+    def __init__(self, path: str):
+        # Read-only and immutable: no locking, pages served straight from the mmap
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+        self._lock = threading.Lock()
+
+    def _query(self, expr: str, limit: int) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT a.display_name, a.lat, a.lon, a.suburb, a.state, a.postcode, a.lga "
+                "FROM addr_fts JOIN addresses a ON a.id = addr_fts.rowid WHERE addr_fts MATCH ? LIMIT ?",
+                (expr, limit),
+            ).fetchall()
+
+    def _match(self, tokens: List[str]) -> List[Tuple]:
+        # Every token must match; the last one may still be being typed
+        head = " ".join(f'"{t}"' for t in tokens[:-1])
+        last = tokens[-1]
+        if head:
+            # A long prefix with no prefix index expands to every term sharing it, which
+            # is slow on a big index. The complete words are usually selective enough to
+            # fetch a small candidate set and check the last word here instead.
+            rows = [r for r in self._query(head, NARROW_CANDIDATES)
+                    if any(w.startswith(last) for w in _tokens(r[0]))]
+            if rows:
+                return rows[:CANDIDATES]
+        # Abbreviations like "ave" for "avenue" only match as prefixes
+        return self._query(" ".join(f'"{t}"*' for t in tokens), CANDIDATES)
+
+    def _correct(self, token: str) -> Optional[str]:
+        if len(token) < 4 or token.isdigit():
+            return None
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM vocab WHERE term >= ? AND term < ? LIMIT 1", (token, token + "\uffff")).fetchone():
+                return None
+            grams = {token[i:i + 3] for i in range(len(token) - 2)}
+            expr = " OR ".join(f'"{g}"' for g in grams)
+            cands = [r[0] for r in self._conn.execute(
+                "SELECT term FROM vocab_tri WHERE vocab_tri MATCH ? LIMIT 200", (expr,)
+            )]
+        best = difflib.get_close_matches(token, cands, n=1, cutoff=0.7)
+        return best[0] if best else None
+
+    def search(self, query: str, limit: int = 5, fuzzy: bool = True) -> List[AddressResolved]:
+        tokens = _tokens(query)
+        if not tokens:
+            return []
+        rows = self._match(tokens)
+        if not rows and fuzzy:
+            fixed = [self._correct(t) or t for t in tokens]
+            if fixed != tokens:
+                tokens = fixed
+                rows = self._match(tokens)
+        qset = set(tokens)
+        # Prefer addresses matching more query words exactly, then the shortest
+        rows.sort(key=lambda r: (-len(qset.intersection(_tokens(r[0]))), len(r[0])))
+        return [
+            AddressResolved(query=query, display_name=r[0], lat=r[1], lon=r[2],
+                            suburb=r[3], state=r[4], postcode=r[5], lga=r[6])
+            for r in rows[:limit]
+        ]
+
+
+_index: Optional[LocalAddressIndex] = None
+if INDEX_PATH and os.path.exists(INDEX_PATH):
+    _index = LocalAddressIndex(INDEX_PATH)
+
+
+def search_addresses(query: str) -> List[AddressResolved]:
+    """Local index first, Nominatim only when the index is absent or has no match.
+    LGAs the source did not supply are filled from the boundary index, if configured."""
+    if _index is not None:
+        hits = _index.search(query)
+        if hits:
+            return fill_lga(hits)
+    return fill_lga(geocode_osm.search_addresses(query))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Build or query the offline address index.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="build an index from a CSV of addresses")
+    b.add_argument("csv")
+    b.add_argument("index")
+    q = sub.add_parser("query", help="look up an address in an index")
+    q.add_argument("index")
+    q.add_argument("text")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        n = build_index(args.csv, args.index)
+        print(f"indexed {n:,} addresses in {time.perf_counter() - t0:.1f}s -> {args.index}")
+    else:
+        for a in LocalAddressIndex(args.index).search(args.text):
+            print(f"{a.display_name}\t{a.lat:.6f}\t{a.lon:.6f}")
+
+
+if __name__ == "__main__":
+    main()
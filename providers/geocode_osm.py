@@ -1,11 +1,13 @@
-import requests
+from core import http_client, tracing
+from core.http_client import UA
+from core.rate_limit import get_limiter
 from typing import List
 from models.facts import AddressResolved
 
-UA = {"User-Agent": "PropLens/0.1 (+https://example.com)"}
-
 OSM_URL = "https://nominatim.openstreetmap.org/search"
+OSM_HOST = "nominatim.openstreetmap.org"  # paced by core.rate_limit.HOST_RATES
 
+@tracing.traced("search_addresses")
 def search_addresses(query: str) -> List[AddressResolved]:
     params = {
         "q": query,
@@ -14,7 +16,8 @@ def search_addresses(query: str) -> List[AddressResolved]:
         "limit": 5,
         "countrycodes": "au",
     }
-    r = requests.get(OSM_URL, params=params, headers=UA, timeout=20)
+    get_limiter().acquire(OSM_HOST)
+    r = http_client.get(OSM_URL, params=params, headers=UA, timeout=20)
     r.raise_for_status()
     out: List[AddressResolved] = []
     for item in r.json():
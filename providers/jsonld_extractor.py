@@ -1,7 +1,12 @@
 import json
-from typing import Any, Dict, Optional, Tuple
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from bs4 import BeautifulSoup
-from core.rate_limit import polite_get
+from core import tracing
+from core.fetch_pool import fetch_first
+from core.http_cache import CachedResponse
+from core.rate_limit import get_cache, polite_stream, ttl_for
 
 
 SCHEMA_TYPES = {
@@ -15,7 +20,105 @@ SCHEMA_TYPES = {
 }
 
 
-def _first_jsonld_block(html: str) -> Optional[Dict[str, Any]]:
+_SCRIPT_OPEN = re.compile(rb"<script\b([^>]*)>", re.I)
+_SCRIPT_CLOSE = re.compile(rb"</script\s*>", re.I)
+_LD_TYPE = re.compile(rb"""type\s*=\s*["']?\s*application/ld\+json""", re.I)
+# Longest partial "<script ...>" tag kept between chunks while looking for the next one
+_TAG_TAIL = 1024
+_CHUNK = 64 * 1024
+
+
+def _property_from(data: Any) -> Optional[Dict[str, Any]]:
+    # Handle list or graph
+    if isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict) and _is_property_schema(item):
+                return item
+    elif isinstance(data, dict):
+        if "@graph" in data and isinstance(data["@graph"], list):
+            for item in data["@graph"]:
+                if isinstance(item, dict) and _is_property_schema(item):
+                    return item
+        if _is_property_schema(data):
+            return data
+    return None
+
+
+def _loads_block(raw: bytes) -> Any:
+    txt = raw.decode("utf-8", errors="replace").strip()
+    # Some sites wrap the JSON in HTML comments or CDATA markers
+    for lead, trail in (("<!--", "-->"), ("//<![CDATA[", "//]]>"), ("<![CDATA[", "]]>")):
+        if txt.startswith(lead) and txt.endswith(trail):
+            txt = txt[len(lead):-len(trail)].strip()
+    return json.loads(txt, strict=False)
+
+
+class JsonLdScanner:
+    """Incremental scan of raw HTML bytes for a property-schema JSON-LD block.
+
+    feed() chunks as they arrive; it returns the block once one is complete. Only the
+    bytes of an open <script type="application/ld+json"> (or a short tail while
+    looking for the next tag) are kept, and nothing outside those blocks is decoded.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._in_ld = False  # inside a JSON-LD script, body starts at _buf[0]
+        self._skip = False  # inside some other script, looking for its end
+        self.result: Optional[Dict[str, Any]] = None
+        self.blocks = 0
+        self.errors = 0
+        self.bytes_seen = 0
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: bytes | memoryview) -> Optional[Dict[str, Any]]:
+        if self.result is not None:
+            return self.result
+        self.bytes_seen += len(chunk)
+        self._buf += chunk
+        buf = self._buf
+        while True:
+            if self._in_ld or self._skip:
+                m = _SCRIPT_CLOSE.search(buf)
+                if not m:
+                    if self._skip:
+                        # "</script" may straddle the chunk boundary
+                        del buf[:max(0, len(buf) - 16)]
+                    return None
+                if self._in_ld:
+                    self.blocks += 1
+                    try:
+                        self.result = _property_from(_loads_block(bytes(buf[:m.start()])))
+                    except ValueError:
+                        self.errors += 1
+                del buf[:m.end()]
+                self._in_ld = self._skip = False
+                if self.result is not None:
+                    buf.clear()
+                    return self.result
+                continue
+            m = _SCRIPT_OPEN.search(buf)
+            if not m:
+                # Keep a tail in case a tag is split across chunks
+                lt = buf.rfind(b"<", max(0, len(buf) - _TAG_TAIL))
+                del buf[:lt if lt >= 0 else len(buf)]
+                return None
+            if _LD_TYPE.search(m.group(1)):
+                self._in_ld = True
+            else:
+                self._skip = True
+            del buf[:m.end()]
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        self._buf.clear()
+        return self.result
+
+
+@tracing.traced("lxml_parse")
+def _first_jsonld_block_soup(html: str) -> Optional[Dict[str, Any]]:
     soup = BeautifulSoup(html, "lxml")
     for script in soup.find_all("script", attrs={"type": "application/ld+json"}):
         txt = script.string or script.text
@@ -25,18 +128,23 @@ def _first_jsonld_block(html: str) -> Optional[Dict[str, Any]]:
             data = json.loads(txt)
         except Exception:
             continue
-        # Handle list or graph
-        if isinstance(data, list):
-            for item in data:
-                if isinstance(item, dict) and _is_property_schema(item):
-                    return item
-        elif isinstance(data, dict):
-            if "@graph" in data and isinstance(data["@graph"], list):
-                for item in data["@graph"]:
-                    if isinstance(item, dict) and _is_property_schema(item):
-                        return item
-            if _is_property_schema(data):
-                return data
+        found = _property_from(data)
+        if found is not None:
+            return found
+    return None
+
+
+def _first_jsonld_block(html: str | bytes) -> Optional[Dict[str, Any]]:
+    raw = html.encode("utf-8") if isinstance(html, str) else html
+    scanner = JsonLdScanner()
+    view = memoryview(raw)
+    for i in range(0, len(raw), _CHUNK):
+        found = scanner.feed(view[i:i + _CHUNK])
+        if found is not None:
+            return found
+    # Markup the byte scanner could not make sense of goes through the full parser
+    if scanner.errors or (not scanner.blocks and (b"ld+json" in raw or b"LD+JSON" in raw)):
+        return _first_jsonld_block_soup(raw.decode("utf-8", errors="replace"))
     return None
 
 
@@ -47,14 +155,67 @@ def _is_property_schema(d: Dict[str, Any]) -> bool:
     return t in SCHEMA_TYPES
 
 
+JSONLD_CACHE_PREFIX = "jsonld:"
+# Pages with no block found are re-checked sooner: the listing may not be up yet, and the
+# streamed scan has no parser fallback, so a miss is less certain than a hit
+NEGATIVE_TTL_SEC = 300.0
+
+
+@tracing.traced("extract_schema_org")
 def extract_schema_org(url: str) -> Tuple[Optional[Dict[str, Any]], bool, bool]:
     """Return (jsonld, robots_allowed, fetched_ok). fetched_ok True means the page was fetched and parsed.
     If robots disallows, returns (None, False, False).
+
+    The page is streamed through JsonLdScanner and the connection closed once a
+    property block is complete. Only the extracted block (or the fact that there was
+    none, for NEGATIVE_TTL_SEC) is cached, never the page itself.
     """
-    resp, allowed = polite_get(url)
+    key = JSONLD_CACHE_PREFIX + url
+    cache = get_cache()
+    cached = cache.get(key)
+    if cached:
+        data = cached.json()
+        ttl = ttl_for(url) if data is not None else min(NEGATIVE_TTL_SEC, ttl_for(url))
+        if time.time() - cached.fetched_at < ttl:
+            return data, True, True
+
+    scanner = JsonLdScanner()
+    scan = [0.0, 0.0]  # first chunk at, seconds spent scanning
+
+    def on_chunk(chunk: bytes) -> bool:
+        if not tracing.enabled():
+            return scanner.feed(chunk) is not None
+        # Scanning is interleaved with the download; time it apart from the network
+        t0 = time.perf_counter()
+        found = scanner.feed(chunk) is not None
+        scan[0] = scan[0] or t0
+        scan[1] += time.perf_counter() - t0
+        return found
+
+    status, allowed = polite_stream(url, on_chunk)
+    if scan[0]:
+        tracing.record("jsonld_scan", scan[0], scan[1])
     if not allowed:
         return None, False, False
-    if not resp or not resp.ok:
+    if status is None or status >= 400:
         return None, True, False
-    data = _first_jsonld_block(resp.text)
-    return data, True, True
\ No newline at end of file
+    data = scanner.close()
+    body = json.dumps(data).encode()
+    cache.set(key, CachedResponse(url, status, {"Content-Type": "application/ld+json"}, body, time.time()))
+    return data, True, True
+
+
+def extract_first_schema_org(urls: Sequence[str]) -> Tuple[Optional[Dict[str, Any]], List[Tuple[str, bool, bool, float]]]:
+    """Fetch candidate pages concurrently and return (jsonld, attempts) for the first
+    page that yields a property schema. attempts holds (url, robots_allowed, fetched_ok, ts)
+    for every page that finished before the winner, the winner included.
+    """
+    winner, done = fetch_first(urls, extract_schema_org, accept=lambda r: bool(r[0]))
+    attempts: List[Tuple[str, bool, bool, float]] = []
+    for a in done:
+        if a.error is not None:
+            attempts.append((a.url, True, False, a.ts))
+        else:
+            _, allowed, fetched = a.result
+            attempts.append((a.url, allowed, fetched, a.ts))
+    return (winner.result[0] if winner else None), attempts
@@ -0,0 +1,294 @@
+"""Point-in-polygon LGA lookup over local boundary files.
+
+Boundaries are read from GeoJSON (for example the ABS LGA ASGS release converted
+with ogr2ogr) and compiled into a uniform grid:
+
+- cells no boundary edge passes through are wholly inside one LGA (or none), so
+  their owner is precomputed and those points resolve with one array lookup;
+- points in boundary cells are ray cast against only the edges that overlap
+  their grid row, vectorised over all points in the row at once.
+
+The compiled index is cached as an .npz beside the GeoJSON and reused while the
+GeoJSON's size and mtime are unchanged.
+
+    python -m providers.lga_resolver build lga.geojson
+    python -m providers.lga_resolver query lga.geojson -33.87 151.21
+"""
+import argparse
+import json
+import os
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.facts import AddressResolved
+
+BOUNDARIES_PATH = os.getenv("PROPLENS_LGA_BOUNDARIES")
+NAME_KEYS = ("LGA_NAME24", "LGA_NAME23", "LGA_NAME21", "LGA_NAME", "lga_name", "name", "NAME")
+GRID_CELLS = 512  # along the longer side of the bounding box
+PAIR_BUDGET = 4_000_000  # points x edges tested at once when ray casting a row
+INDEX_VERSION = 1
+
+Ring = np.ndarray  # (n, 2) lon, lat
+
+
+def _feature_name(props: dict) -> Optional[str]:
+    for k in NAME_KEYS:
+        if props.get(k):
+            return str(props[k])
+    return None
+
+
+def read_geojson(path: str) -> Tuple[List[str], List[List[Ring]]]:
+    """(names, rings per feature). Holes and multipolygon parts are kept as plain
+    rings: the even-odd rule over all of a feature's rings handles both."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    names, rings = [], []
+    for feat in data.get("features", []):
+        geom = feat.get("geometry") or {}
+        name = _feature_name(feat.get("properties") or {})
+        if not name or geom.get("type") not in ("Polygon", "MultiPolygon"):
+            continue
+        polys = [geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"]
+        names.append(name)
+        rings.append([np.asarray(r, dtype=float)[:, :2] for p in polys for r in p if len(r) >= 3])
+    return names, rings
+
+
+class LgaIndex:
+    def __init__(self, names: Sequence[str], edges: np.ndarray, edge_feature: np.ndarray,
+                 bounds: Tuple[float, float, float, float], shape: Tuple[int, int],
+                 cell_owner: np.ndarray, row_ptr: np.ndarray, row_edges: np.ndarray):
+        self.names = np.asarray(names, dtype=object)
+        self.edges = edges  # (m, 4) x0, y0, x1, y1
+        self.edge_feature = edge_feature  # (m,)
+        self.bounds = bounds  # min_x, min_y, max_x, max_y
+        self.shape = shape  # rows (y), cols (x)
+        self.cell_owner = cell_owner  # (rows, cols): feature id, -1 none, -2 boundary cell
+        self.row_ptr = row_ptr  # CSR over grid rows into row_edges
+        self.row_edges = row_edges
+
+    # --- building -------------------------------------------------------------------
+
+    @classmethod
+    def from_rings(cls, names: Sequence[str], rings: Sequence[Sequence[Ring]], cells: int = GRID_CELLS) -> "LgaIndex":
+        segs, feats = [], []
+        for fid, feature_rings in enumerate(rings):
+            for r in feature_rings:
+                closed = r if np.array_equal(r[0], r[-1]) else np.vstack([r, r[:1]])
+                segs.append(np.hstack([closed[:-1], closed[1:]]))
+                feats.append(np.full(len(closed) - 1, fid, dtype=np.int32))
+        edges = np.vstack(segs) if segs else np.zeros((0, 4))
+        edge_feature = np.concatenate(feats) if feats else np.zeros(0, dtype=np.int32)
+
+        min_x, max_x = edges[:, [0, 2]].min(), edges[:, [0, 2]].max()
+        min_y, max_y = edges[:, [1, 3]].min(), edges[:, [1, 3]].max()
+        span = max(max_x - min_x, max_y - min_y) or 1.0
+        size = span / cells
+        nx = max(1, int(np.ceil((max_x - min_x) / size)))
+        ny = max(1, int(np.ceil((max_y - min_y) / size)))
+        bounds = (min_x, min_y, min_x + nx * size, min_y + ny * size)
+
+        def col(x):
+            return np.clip(((x - min_x) / size).astype(int), 0, nx - 1)
+
+        def row(y):
+            return np.clip(((y - min_y) / size).astype(int), 0, ny - 1)
+
+        c0, c1 = np.sort([col(edges[:, 0]), col(edges[:, 2])], axis=0)
+        r0, r1 = np.sort([row(edges[:, 1]), row(edges[:, 3])], axis=0)
+
+        # Boundary cells: every cell in an edge's bounding box, which over-marks
+        # long diagonal edges but never misses one
+        boundary = np.zeros((ny, nx), dtype=bool)
+        small = (c1 - c0 <= 1) & (r1 - r0 <= 1)
+        for dr in (0, 1):
+            for dc in (0, 1):
+                boundary[np.minimum(r0[small] + dr, r1[small]), np.minimum(c0[small] + dc, c1[small])] = True
+        for i in np.flatnonzero(~small):
+            boundary[r0[i]:r1[i] + 1, c0[i]:c1[i] + 1] = True
+
+        # Horizontal edges bound cells but never cross a horizontal ray
+        keep = edges[:, 1] != edges[:, 3]
+        edges, edge_feature, r0, r1 = edges[keep], edge_feature[keep], r0[keep], r1[keep]
+
+        # Rows each edge spans, as CSR. Edges are sorted by row span start.
+        spans = r1 - r0 + 1
+        edge_ids = np.repeat(np.arange(len(edges)), spans)
+        rows_of = np.repeat(r0, spans) + (np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans))
+        order = np.argsort(rows_of, kind="stable")
+        row_edges = edge_ids[order].astype(np.int32)
+        row_ptr = np.concatenate([[0], np.cumsum(np.bincount(rows_of, minlength=ny))])
+
+        index = cls(list(names), edges, edge_feature, bounds, (ny, nx),
+                    np.full((ny, nx), -2, dtype=np.int32), row_ptr, row_edges)
+        cy, cx = np.nonzero(~boundary)
+        centres_x = min_x + (cx + 0.5) * size
+        centres_y = min_y + (cy + 0.5) * size
+        index.cell_owner[cy, cx] = index._ray_cast(centres_x, centres_y, cy)
+        return index
+
+    @classmethod
+    def from_geojson(cls, path: str, cells: int = GRID_CELLS) -> "LgaIndex":
+        names, rings = read_geojson(path)
+        return cls.from_rings(names, rings, cells)
+
+    # --- persistence ----------------------------------------------------------------
+
+    def save(self, path: str, fingerprint: Tuple = ()) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, names=self.names.astype(str), edges=self.edges, edge_feature=self.edge_feature,
+                 bounds=np.asarray(self.bounds), shape=np.asarray(self.shape), cell_owner=self.cell_owner,
+                 row_ptr=self.row_ptr, row_edges=self.row_edges,
+                 fingerprint=np.asarray((INDEX_VERSION,) + tuple(fingerprint), dtype=float))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["LgaIndex", Tuple]:
+        with np.load(path) as z:
+            index = cls(z["names"].tolist(), z["edges"], z["edge_feature"], tuple(z["bounds"].tolist()),
+                        tuple(int(v) for v in z["shape"]), z["cell_owner"], z["row_ptr"], z["row_edges"])
+            return index, tuple(z["fingerprint"].tolist())
+
+    # --- lookup ---------------------------------------------------------------------
+
+    def _ray_cast(self, x: np.ndarray, y: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Feature id per point by even-odd ray casting to +x, testing only the
+        edges that overlap each point's grid row. -1 where no feature contains it."""
+        out = np.full(len(x), -1, dtype=np.int32)
+        order = np.argsort(rows, kind="stable")
+        bounds = np.searchsorted(rows[order], np.arange(self.shape[0] + 1))
+        for r in np.flatnonzero(np.diff(bounds)):
+            ids = self.row_edges[self.row_ptr[r]:self.row_ptr[r + 1]]
+            if not len(ids):
+                continue
+            x0, y0, x1, y1 = self.edges[ids].T
+            feats, local = np.unique(self.edge_feature[ids], return_inverse=True)
+            onehot = np.zeros((len(ids), len(feats)), dtype=np.float32)
+            onehot[np.arange(len(ids)), local] = 1.0
+            slope = (x1 - x0) / (y1 - y0)
+            pts = order[bounds[r]:bounds[r + 1]]
+            step = max(1, PAIR_BUDGET // len(ids))
+            for s in range(0, len(pts), step):
+                p = pts[s:s + step]
+                px, py = x[p, None], y[p, None]
+                crosses = ((y0 > py) != (y1 > py)) & (px < x0 + (py - y0) * slope)
+                odd = (crosses.astype(np.float32) @ onehot).astype(np.int32) & 1
+                hit = odd.any(axis=1)
+                out[p[hit]] = feats[np.argmax(odd[hit], axis=1)]
+        return out
+
+    def lookup_ids(self, lat, lon) -> np.ndarray:
+        """Feature id per point, -1 outside every boundary."""
+        x = np.atleast_1d(np.asarray(lon, dtype=float))
+        y = np.atleast_1d(np.asarray(lat, dtype=float))
+        min_x, min_y, max_x, max_y = self.bounds
+        ny, nx = self.shape
+        inside = (x >= min_x) & (x < max_x) & (y >= min_y) & (y < max_y)
+        cols = np.clip(((x - min_x) / (max_x - min_x) * nx).astype(int), 0, nx - 1)
+        rows = np.clip(((y - min_y) / (max_y - min_y) * ny).astype(int), 0, ny - 1)
+        ids = np.where(inside, self.cell_owner[rows, cols], -1)
+        slow = np.flatnonzero(ids == -2)
+        if len(slow):
+            ids[slow] = self._ray_cast(x[slow], y[slow], rows[slow])
+        return ids
+
+    def lookup(self, lat, lon) -> np.ndarray:
+        """LGA name per point (object array), None outside every boundary."""
+        ids = self.lookup_ids(lat, lon)
+        return np.where(ids >= 0, self.names[np.maximum(ids, 0)], None)
+
+    def lga_at(self, lat: float, lon: float) -> Optional[str]:
+        return self.lookup(lat, lon)[0]
+
+
+def _fingerprint(path: str) -> Tuple:
+    st = os.stat(path)
+    return (float(st.st_size), float(st.st_mtime_ns))
+
+
+def load_index(geojson_path: str, cells: int = GRID_CELLS) -> LgaIndex:
+    """Compiled index for a boundary file, from its .lgaidx.npz cache when fresh."""
+    cache = geojson_path + ".lgaidx.npz"
+    fp = _fingerprint(geojson_path)
+    try:
+        index, cached_fp = LgaIndex.load(cache)
+        if cached_fp == (float(INDEX_VERSION),) + fp:
+            return index
+    except (OSError, KeyError, ValueError):
+        pass
+    index = LgaIndex.from_geojson(geojson_path, cells)
+    try:
+        index.save(cache, fp)
+    except OSError:
+        pass
+    return index
+
+
+_index: Optional[LgaIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[LgaIndex]:
+    """The index for PROPLENS_LGA_BOUNDARIES, loaded on first use; None when unset."""
+    global _index
+    if _index is None and BOUNDARIES_PATH and os.path.exists(BOUNDARIES_PATH):
+        with _index_lock:
+            if _index is None:
+                _index = load_index(BOUNDARIES_PATH)
+    return _index
+
+
+def set_index(index: Optional[LgaIndex]) -> None:
+    global _index
+    _index = index
+
+
+def resolve_lga(lat: float, lon: float) -> Optional[str]:
+    index = get_index()
+    return index.lga_at(lat, lon) if index is not None else None
+
+
+def resolve_lga_batch(lat, lon) -> np.ndarray:
+    index = get_index()
+    if index is None:
+        return np.full(np.shape(np.atleast_1d(lat)), None, dtype=object)
+    return index.lookup(lat, lon)
+
+
+def fill_lga(addresses: Iterable[AddressResolved]) -> List[AddressResolved]:
+    """Addresses with lga filled from their coordinates where the geocoder left it empty."""
+    addresses = list(addresses)
+    if get_index() is None:
+        return addresses
+    missing = [a for a in addresses if not a.lga]
+    if not missing:
+        return addresses
+    names = resolve_lga_batch([a.lat for a in missing], [a.lon for a in missing])
+    found = {id(a): n for a, n in zip(missing, names) if n}
+    return [a.model_copy(update={"lga": found[id(a)]}) if id(a) in found else a for a in addresses]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Build or query the LGA boundary index.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="compile a GeoJSON boundary file")
+    b.add_argument("geojson")
+    q = sub.add_parser("query", help="LGA at a point")
+    q.add_argument("geojson")
+    q.add_argument("lat", type=float)
+    q.add_argument("lon", type=float)
+    args = ap.parse_args(argv)
+
+    index = load_index(args.geojson)
+    if args.cmd == "build":
+        print(f"{len(index.names)} LGAs, {len(index.edges):,} edges, grid {index.shape[1]}x{index.shape[0]}, "
+              f"{(index.cell_owner == -2).mean():.1%} boundary cells")
+    else:
+        print(index.lga_at(args.lat, args.lon) or "-")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from typing import Optional, Dict
-from models.facts import AddressResolved
+from models.facts import AddressResolved, state_code
 
 # Safe stub. Replace with confirmed anonymous open endpoints if available.
 
@@ -8,7 +8,7 @@ def try_open_parcel(address: AddressResolved) -> Optional[Dict]:
     """Attempt open data lookups for NSW parcel size, flood, bushfire. No keys, safe only.
     Returns dict like {"land_sqm": 450.0, "source": "open_data", "confidence": 0.6} or None.
     """
-    if address.state and "NSW" in address.state.upper():
+    if state_code(address.state) == "NSW":
         # Conservative: suggest a modest suburban parcel when suburb present
         if address.suburb and address.postcode:
             return {"land_sqm": 420.0, "source": "open_data", "confidence": 0.6}
@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Optional, Protocol, Sequence
 from models.facts import AddressResolved
+from core import tracing
 from core.rate_limit import polite_get
 from bs4 import BeautifulSoup
 import urllib.parse
@@ -15,38 +16,94 @@ SITES = [
 
 DUCK_URL = "https://duckduckgo.com/html/"
 
+MAX_RESULTS = 8
+ENOUGH_RESULTS = 6
 
-def _duckduckgo_search(query: str) -> list[str]:
-    # Build a simple DuckDuckGo HTML request
-    params = {"q": query}
-    url = DUCK_URL + "?" + urllib.parse.urlencode(params)
-    resp, allowed = polite_get(url)
-    if not allowed or not resp or not resp.ok:
-        return []
-    soup = BeautifulSoup(resp.text, "lxml")
-    out: list[str] = []
-    for a in soup.select("a.result__a"):
-        href = a.get("href")
-        if href:
-            out.append(href)
-    return out
-
-
-def find_candidate_urls(address: AddressResolved) -> List[str]:
-    queries = []
+
+class SearchBackend(Protocol):
+    def search(self, query: str) -> list[str]: ...
+
+
+class DuckDuckGoBackend:
+    def __init__(self, url: str = DUCK_URL):
+        self.url = url
+
+    def search(self, query: str) -> list[str]:
+        # Build a simple DuckDuckGo HTML request
+        params = {"q": query}
+        url = self.url + "?" + urllib.parse.urlencode(params)
+        resp, allowed = polite_get(url)
+        if not allowed or not resp or not resp.ok:
+            return []
+        soup = BeautifulSoup(resp.text, "lxml")
+        out: list[str] = []
+        for a in soup.select("a.result__a"):
+            href = a.get("href")
+            if href:
+                out.append(href)
+        return out
+
+
+class LocalIndexBackend:
+    """Stand-in search over a fixed list of URLs. Honours `site:` filters, including
+    OR-combined ones, and matches the remaining query words against the URL path.
+    """
+
+    def __init__(self, urls: Sequence[str]):
+        self.urls = list(urls)
+        self.queries: list[str] = []
+
+    def search(self, query: str) -> list[str]:
+        self.queries.append(query)
+        sites = [t[5:] for t in query.split() if t.startswith("site:")]
+        words = [t.lower().strip(",") for t in query.split() if not t.startswith("site:") and t != "OR"]
+        out = []
+        for u in self.urls:
+            if sites and not any(s in u for s in sites):
+                continue
+            path = urllib.parse.urlparse(u).path.lower()
+            if words and not any(w in path for w in words):
+                continue
+            out.append(u)
+        return out
+
+
+_default_backend: SearchBackend = DuckDuckGoBackend()
+
+
+def set_search_backend(backend: SearchBackend) -> None:
+    global _default_backend
+    _default_backend = backend
+
+
+def _site_filter(sites: Sequence[str]) -> str:
+    return " OR ".join(f"site:{s}" for s in sites)
+
+
+@tracing.traced("find_candidate_urls")
+def find_candidate_urls(address: AddressResolved, backend: Optional[SearchBackend] = None, batched: bool = True) -> List[str]:
+    """Search the portals in SITES for the address.
+
+    batched=True sends one combined `site:a OR site:b ...` query, which costs a single
+    round-trip to the search host. No hits there means no listing, so it is not
+    retried per site. batched=False sends one query per site instead, stopping once
+    ENOUGH_RESULTS portal links have been collected.
+    """
+    backend = backend or _default_backend
     line = address.display_name
-    for site in SITES:
-        q = f"{line} site:{site}"
-        queries.append(q)
 
     results: list[str] = []
-    for q in queries:
-        links = _duckduckgo_search(q)
-        for L in links:
+    if batched:
+        for L in backend.search(f"{line} {_site_filter(SITES)}"):
             if any(s in L for s in SITES):
                 results.append(L)
-        if len(results) >= 6:
-            break
+    else:
+        for site in SITES:
+            for L in backend.search(f"{line} site:{site}"):
+                if any(s in L for s in SITES):
+                    results.append(L)
+            if len(results) >= ENOUGH_RESULTS:
+                break
 
     # Deduplicate
     seen = set()
@@ -55,4 +112,4 @@ def find_candidate_urls(address: AddressResolved) -> List[str]:
         if u not in seen:
             uniq.append(u)
             seen.add(u)
-    return uniq[:8]
\ No newline at end of file
+    return uniq[:MAX_RESULTS]
@@ -3,22 +3,16 @@ import time
 import streamlit as st
 from typing import Optional
 
-from providers.geocode_osm import search_addresses
-from providers.portal_finders import find_candidate_urls
-from providers.jsonld_extractor import extract_schema_org
-from providers.nsw_open_data import try_open_parcel
-from core.normalise import (
-    normalise_jsonld,
-    estimate_from_heuristics,
-    merge_facts,
-)
+from core import tracing
+from providers.address_autocomplete import suggest_addresses
+from core.enrich import build_facts, enrich_address_cached
+from core.prefetch import PREFETCH, PREFETCHER
 from models.facts import AddressResolved, PropertyFacts, FieldValue
-from calculators.stamp_duty import calc_stamp_duty
-from calculators.council_rates import calc_council_rates
-from calculators.insurance import estimate_sum_insured, premium_from_risk
-from calculators.repayments import calc_repayments, pick_active_rate
-from calculators.cashflow import calc_cashflow
-from utils.pdf_export import generate_pdf
+from calculators.expenses import expenses_graph
+from calculators.lga_tables import yield_for
+from calculators.scenarios import simulate
+from models.scenario import ScenarioInputs
+from utils.pdf_export import FILE_NAME, render_pdf
 
 # Feature flag
 ALLOW_WEB_FETCH = os.getenv("ALLOW_WEB_FETCH", "true").lower() == "true"
@@ -32,21 +26,34 @@ st.caption("Auto-loads a default address, lets you override property facts and f
 # Session init
 if "_init_done" not in st.session_state:
     st.session_state._init_done = False
-if "_last_query_time" not in st.session_state:
-    st.session_state._last_query_time = 0.0
 if "selected_address" not in st.session_state:
     st.session_state.selected_address = None
+if "enriched" not in st.session_state:
+    # display_name -> (PropertyFacts, cache status, fetched_at, ms); never refetched on rerun
+    st.session_state.enriched = {}
+if "traces" not in st.session_state:
+    # display_name -> tracing.Trace of its enrichment, when PROPLENS_TRACE is on
+    st.session_state.traces = {}
+if "expenses" not in st.session_state:
+    st.session_state.expenses = expenses_graph()
+if PREFETCH and "_prefetch_started" not in st.session_state:
+    # One worker per process; each new session re-queues the default address unless it was warmed recently
+    st.session_state._prefetch_started = True
+    if not ALLOW_WEB_FETCH:
+        PREFETCHER.enrich = None  # geocode only, as the app will
+    PREFETCHER.start([DEFAULT_ADDRESS])
 
 with st.sidebar:
     st.header("Property Search")
     query = st.text_input("Enter Australian address", value=DEFAULT_ADDRESS)
 
-    suggestions = []
-    if query and len(query) >= 4:
-        now = time.time()
-        if now - st.session_state._last_query_time > 0.4:
-            suggestions = search_addresses(query)
-            st.session_state._last_query_time = now
+    # Cached and prefix-aware, so longer queries rarely reach Nominatim; reruns with
+    # the same query skip the lookup altogether
+    if st.session_state.get("_suggest_query") != query:
+        st.session_state._suggest_query = query
+        with PREFETCHER.interactive():
+            st.session_state._suggestions = suggest_addresses(query) if query else []
+    suggestions = st.session_state._suggestions
 
     selected = None
     if suggestions:
@@ -64,44 +71,34 @@ if not st.session_state._init_done and suggestions:
 
 col_left, col_right = st.columns([2, 1])
 
-if run and selected:
+# Keep showing an address once it has been enriched, so widget reruns keep the panel
+if selected and (run or selected.display_name in st.session_state.enriched):
     with col_left:
         st.subheader("Property details")
         st.write(
             f"**Address:** {selected.display_name}\n\n**Suburb:** {selected.suburb or '-'} | **State:** {selected.state or '-'} | **Postcode:** {selected.postcode or '-'}"
         )
 
-        source_urls: list[str] = []
-        facts_jsonld = {}
-
-        if ALLOW_WEB_FETCH:
-            urls = find_candidate_urls(selected)
-            for u in urls:
-                data, allowed, fetched = extract_schema_org(u)
-                ts = time.strftime("%Y-%m-%d %H:%M:%S")
-                if allowed and fetched:
-                    source_urls.append(f"{u} [robots: allowed] [ts: {ts}]")
-                elif not allowed:
-                    source_urls.append(f"{u} [robots: disallowed] [ts: {ts}]")
-                else:
-                    source_urls.append(f"{u} [robots: allowed, no JSON-LD] [ts: {ts}]")
-                if data:
-                    facts_jsonld = normalise_jsonld(data)
-                    break
-        else:
+        if not ALLOW_WEB_FETCH:
             st.warning("Web fetch disabled by ALLOW_WEB_FETCH flag. Using open data and estimates only.")
 
-        open_parcel = try_open_parcel(selected)
-        land_hint = float(open_parcel["land_sqm"]) if open_parcel and open_parcel.get("land_sqm") else None
-        est = estimate_from_heuristics(selected, land_hint)
-
-        prop: PropertyFacts = merge_facts(
-            address=selected,
-            jsonld_map=facts_jsonld,
-            open_data=open_parcel,
-            estimated_map=est,
-            source_urls=source_urls,
-        )
+        enrich_cached = selected.display_name in st.session_state.enriched
+        if not enrich_cached:
+            t0 = time.perf_counter()
+            with PREFETCHER.interactive(), tracing.trace("lookup") as lookup_trace:
+                if ALLOW_WEB_FETCH:
+                    # Shared across sessions and workers; stale entries come back at once and refresh behind
+                    facts, facts_status, facts_ts = enrich_address_cached(selected)
+                else:
+                    facts, facts_status, facts_ts = build_facts(selected, {}, []), "local", time.time()
+            st.session_state.enriched[selected.display_name] = (facts, facts_status, facts_ts, (time.perf_counter() - t0) * 1000)
+            if lookup_trace is not None:
+                st.session_state.traces[selected.display_name] = lookup_trace
+            PREFETCHER.remember(selected)
+        facts, facts_status, facts_ts, enrich_ms = st.session_state.enriched[selected.display_name]
+        source_urls = facts.source_urls
+        # Overrides below edit the facts in place, so work on a copy
+        prop: PropertyFacts = facts.model_copy(deep=True)
 
         # --- Property Facts Overrides ---
         st.markdown("### Property facts (override any)")
@@ -133,7 +130,13 @@ if run and selected:
                 value=int(float(getattr(prop.last_sold_price or FieldValue(value=0, source='estimated', confidence=0.1), 'value') or 0))
             )
 
-            owner_occ = st.checkbox("Owner occupier", value=True)
+            colO1, colO2, colO3 = st.columns(3)
+            with colO1:
+                owner_occ = st.checkbox("Owner occupier", value=True)
+            with colO2:
+                first_home = st.checkbox("First home buyer", value=False)
+            with colO3:
+                foreign = st.checkbox("Foreign purchaser", value=False)
 
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -148,61 +151,138 @@ if run and selected:
 
             io_years = st.slider("Interest-only period (years, if IO)", 0, 10, 0)
             years = st.slider("Loan term (years)", 5, 35, 30)
+            col4, col5 = st.columns(2)
+            with col4:
+                extra_monthly = st.number_input("Extra repayment per month", min_value=0.0, value=0.0, step=100.0)
+            with col5:
+                offset_balance = st.number_input("Offset account balance", min_value=0.0, value=0.0, step=1000.0)
 
-            loan_amount = max(0.0, price_input * (1 - deposit_pct / 100))
-            active_rate = pick_active_rate(rate_type, variable_rate_pct, fixed_rate_pct, fixed_years)
-
-            # stamp duty and council
-            stamp = calc_stamp_duty(price_input, state=(prop.address.state or "NSW"), owner_occ=owner_occ)
-            council = calc_council_rates(prop.address.lga or "Default LGA", land_sqm=float(getattr(prop.land_sqm, 'value', 0) or 0))
-
-            # insurance
-            sum_insured = estimate_sum_insured(build_sqm=float(getattr(prop.build_sqm, 'value', 0) or 180.0))
+            fixed = rate_type.lower().startswith("fixed")
             risk = st.select_slider("Risk band (insurance)", options=["low", "medium", "high"], value="medium")
-            premium = premium_from_risk(sum_insured, risk)
-
-            # mortgage repayment
-            monthly_repay = calc_repayments(
-                loan_amount,
-                annual_rate=active_rate,
-                years=years,
-                repayment_type=("IO" if repayment_type.startswith("Interest") else "P&I"),
-                interest_only_years=io_years
-            )
 
             # rent and PM fee
-            lga_yield_band = 0.036
+            lga_yield_band = yield_for(prop.address.lga)
             est_rent_week = price_input * lga_yield_band / 52 if price_input > 0 else 550
             rent_week = st.number_input("Weekly rent estimate", min_value=0.0, value=float(round(est_rent_week,2)))
             pm_fee_pct = st.slider("Property manager fee percent", 0.0, 12.0, 6.0, 0.5)
 
-            # monthly cashflow
-            outgoings_month = (council/12.0) + (premium/12.0)
-            inflow_month = (0 if owner_occ else rent_week * 52 / 12 * (1 - pm_fee_pct/100))
-            verdict = calc_cashflow(inflow_month, monthly_repay, outgoings_month)
+            # Only the nodes downstream of a changed input recompute on this rerun
+            graph = st.session_state.expenses
+            graph.begin()
+            io_period = (io_years or years) if repayment_type.startswith("Interest") else 0  # IO with no period = whole term
+            graph.set(
+                price=float(price_input), state=(prop.address.state or "NSW"), owner_occ=owner_occ,
+                first_home=first_home, foreign=foreign,
+                lga=(prop.address.lga or "Default LGA"), land_sqm=float(getattr(prop.land_sqm, 'value', 0) or 0),
+                build_sqm=float(getattr(prop.build_sqm, 'value', 0) or 180.0), risk=risk,
+                deposit_pct=deposit_pct, variable_rate=variable_rate_pct / 100.0, fixed_rate=fixed_rate_pct / 100.0,
+                fixed=fixed, fixed_years=fixed_years, years=years, io_years=io_period,
+                extra_monthly=extra_monthly, offset=offset_balance, rent_week=rent_week, pm_fee_pct=pm_fee_pct,
+            )
+            stamp = graph["stamp_duty"]
+            council = graph["council"]
+            sum_insured = graph["sum_insured"]
+            premium = graph["premium"]
+            schedule = graph["schedule"]
+            loan_summary = graph["loan_summary"]
+            monthly_repay = graph["monthly_repay"]
+            outgoings_month = graph["outgoings_month"]
+            verdict = graph["cashflow"]
 
             st.write(f"**Stamp duty:** ${stamp:,.0f}")
             st.write(f"**Council rates (annual):** ${council:,.0f}")
             st.write(f"**Insurance premium (annual):** ${premium:,.0f} for sum insured ${sum_insured:,.0f}")
             st.write(f"**Monthly repayment:** ${monthly_repay:,.0f}")
+            with st.expander("Repayment schedule"):
+                payments = schedule["interest"][0] + schedule["principal"][0]
+                changes = [0] + [m for m in range(1, len(payments)) if abs(payments[m] - payments[m - 1]) >= 1]
+                for start, end in zip(changes, changes[1:] + [int(loan_summary["months"])]):
+                    if end > start:
+                        st.write(f"Months {start + 1}-{end}: ${payments[start]:,.0f} per month")
+                st.write(f"**Total interest:** ${loan_summary['total_interest']:,.0f}")
+                st.write(f"**Paid off after:** {loan_summary['months'] / 12:.1f} years")
+                st.line_chart({"Balance": schedule["balance"][0]})
             st.write(f"**Net monthly cashflow:** ${verdict:,.0f} {'(positive)' if verdict >= 0 else '(negative)'}")
 
+            with st.expander("Rate and rent scenarios"):
+                sc1, sc2 = st.columns(2)
+                with sc1:
+                    rate_vol = st.slider("Rate volatility (points p.a.)", 0.0, 3.0, 1.0, 0.25)
+                    vacancy_pct = st.slider("Vacancy (% of months)", 0.0, 15.0, 3.0, 0.5)
+                with sc2:
+                    rent_growth_pct = st.slider("Rent growth % p.a.", -2.0, 8.0, 3.0, 0.5)
+                    horizon = st.slider("Horizon (years)", 1, years, min(10, years))
+                if st.button("Run 20,000 scenarios"):
+                    scenario = ScenarioInputs(
+                        price=price_input, deposit_pct=deposit_pct, state=(prop.address.state or "NSW"),
+                        owner_occ=owner_occ, years=years, interest_only_years=io_period, horizon_years=horizon,
+                        rate=variable_rate_pct / 100.0, rate_vol=rate_vol / 100.0,
+                        fixed_rate=(fixed_rate_pct / 100.0 if fixed else None), fixed_years=(fixed_years or years) if fixed else 0,
+                        rent_week=rent_week, rent_growth=rent_growth_pct / 100.0, vacancy_rate=vacancy_pct / 100.0,
+                        pm_fee_pct=pm_fee_pct, outgoings_month=outgoings_month,
+                    )
+                    summary = simulate(scenario, paths=20_000).summary()
+                    st.line_chart({f"P{p}": row for p, row in summary["monthly_cashflow_by_year"].items()})
+                    st.caption("Average monthly cashflow in each year, by percentile")
+                    st.write(f"**Cumulative cost over {horizon} years:** "
+                             + ", ".join(f"P{p} ${v:,.0f}" for p, v in summary["cumulative_cost"].items()))
+                    st.write(f"**Chance of negative cashflow in year 1:** {summary['prob_negative_year1']:.0%}")
+
         with st.expander("Sources and timestamps"):
+            if facts_status in ("fresh", "stale"):
+                st.caption(f"Facts cached {time.strftime('%Y-%m-%d %H:%M', time.localtime(facts_ts))}"
+                           + (", refreshing in the background." if facts_status == "stale" else "."))
             if source_urls:
                 for u in source_urls:
                     st.write(u)
             else:
                 st.caption("No third-party fetches used or all were disallowed.")
+            st.dataframe(
+                [{"field": k, "value": fv.value, "confidence": fv.confidence, "from": ", ".join(fv.provenance)}
+                 for k in ("dwelling_type", "beds", "baths", "cars", "land_sqm", "build_sqm")
+                 for fv in [getattr(facts, k)]],
+                hide_index=True,
+            )
 
         if st.button("Export summary to PDF"):
-            path = generate_pdf(prop, stamp, council, premium, monthly_repay)
-            with open(path, "rb") as f:
-                st.download_button("Download PDF", f, file_name="proplens_summary.pdf", mime="application/pdf")
+            # Rendered in memory per session; nothing is written to the working directory
+            pdf = render_pdf(prop, stamp, council, premium, monthly_repay)
+            st.download_button("Download PDF", pdf, file_name=FILE_NAME, mime="application/pdf")
 
     with col_right:
         st.subheader("Helpers")
         st.select_slider("Buyer Sentiment", ["Very Low", "Low", "Neutral", "High", "Very High"], value="Neutral")
         st.select_slider("Growth Sentiment", ["Weak", "OK", "Strong"], value="OK")
 
+        with st.expander("Debug: recompute timings"):
+            st.write(f"**Enrichment:** {enrich_ms:,.0f} ms, facts cache {facts_status}"
+                     + (" (from session, not refetched)" if enrich_cached else ""))
+            st.dataframe(graph.timings(), hide_index=True)
+            if PREFETCH:
+                st.caption("Prefetch: " + ", ".join(f"{k} {v}" for k, v in PREFETCHER.stats.as_dict().items()))
+
+        if tracing.enabled():
+            with st.expander("Debug: lookup trace"):
+                lookup_trace = st.session_state.traces.get(selected.display_name)
+                if lookup_trace is not None:
+                    import altair as alt
+
+                    rows = lookup_trace.waterfall()
+                    for i, r in enumerate(rows):
+                        r["label"] = f"{i:02d} {'. ' * r['depth']}{r['span']}"
+                        r["end_ms"] = r["start_ms"] + r["ms"]
+                    st.altair_chart(
+                        alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+                            x=alt.X("start_ms:Q", title="ms since lookup start"), x2="end_ms:Q",
+                            y=alt.Y("label:N", sort=None, title=None),
+                            tooltip=["span:N", "ms:Q", "thread:N"],
+                        ),
+                        use_container_width=True,
+                    )
+                else:
+                    st.caption("No trace for this address yet; it was enriched before tracing started.")
+                st.caption("All lookups in this process, per stage")
+                st.dataframe(tracing.snapshot(), hide_index=True)
+
 else:
     st.info("Enter an address on the left. After 4 characters, suggestions will appear.")
@@ -0,0 +1,59 @@
+import threading
+import time
+from models.facts import AddressResolved
+from providers.address_autocomplete import AddressAutocomplete, normalise_query
+
+
+def _addr(name):
+    return AddressResolved(query="", display_name=name, lat=0.0, lon=0.0, suburb=None, state="NSW", postcode=None, lga=None)
+
+
+class Upstream:
+    def __init__(self, results, delay=0.0):
+        self.results = results
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, q):
+        self.calls.append(q)
+        time.sleep(self.delay)
+        return self.results
+
+
+def test_normalise_query():
+    assert normalise_query("  130 Alex  Ave,  Schofields ") == "130 alex ave schofields"
+
+
+def test_exact_and_prefix_hits():
+    up = Upstream([_addr("130 Alex Avenue, Schofields NSW 2762"), _addr("13 Alexander St, Manly NSW")])
+    ac = AddressAutocomplete(upstream=up)
+    ac.suggest("130 Ale")
+    assert ac.suggest("130 ale") and len(up.calls) == 1
+    narrowed = ac.suggest("130 Alex Avenue, Scho")
+    assert [a.display_name for a in narrowed] == ["130 Alex Avenue, Schofields NSW 2762"]
+    assert narrowed[0].query == "130 Alex Avenue, Scho"
+    assert len(up.calls) == 1
+    assert ac.stats.as_dict()["hit_rate"] == round(2 / 3, 4)
+
+
+def test_no_prefix_answer_from_empty_or_full_pages():
+    up = Upstream([])
+    ac = AddressAutocomplete(upstream=up)
+    ac.suggest("130 Ale")
+    ac.suggest("130 Alex")
+    assert len(up.calls) == 2
+
+
+def test_concurrent_misses_coalesce_and_store_is_shared(tmp_path):
+    up = Upstream([_addr("1 Main St, Town NSW")], delay=0.1)
+    path = str(tmp_path / "ac.sqlite")
+    ac = AddressAutocomplete(upstream=up, path=path)
+    threads = [threading.Thread(target=ac.suggest, args=("1 Main St",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(up.calls) == 1
+    other = AddressAutocomplete(upstream=up, path=path)
+    assert other.suggest("1 main st")[0].display_name == "1 Main St, Town NSW"
+    assert len(up.calls) == 1
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from calculators.amortisation import COMPACT_DTYPE, amortise, rate_path, summarise
+from calculators.repayments import _pni_monthly, calc_repayments, pick_active_rate
+
+
+def _payments(s):
+    return s["interest"] + s["principal"]
+
+
+def test_plain_pni_matches_scalar_and_pays_off():
+    s = amortise(500_000, 0.06, 30)
+    assert s.shape == (1, 360)
+    assert _payments(s)[0] == pytest.approx(_pni_monthly(500_000, 0.06, 30), rel=1e-9)
+    assert s["balance"][0, -1] == 0.0
+    assert summarise(s)["months"][0] == 360
+
+
+def test_interest_only_then_pni_over_remaining_term():
+    p = _payments(amortise(500_000, 0.06, 30, interest_only_years=5))[0]
+    assert p[:60] == pytest.approx(2500.0)
+    assert p[60:] == pytest.approx(_pni_monthly(500_000, 0.06, 25), rel=1e-9)
+
+
+def test_fixed_period_reverts_to_variable_and_change_schedule_applies():
+    path = rate_path(0.065, 360, fixed_rate=0.0585, fixed_years=3, changes=[(120, 0.07)])
+    assert path[0, 0] == 0.0585 and path[0, 36] == 0.065 and path[0, 120] == 0.07
+    s = amortise(500_000, path, 30)
+    p = _payments(s)[0]
+    assert p[0] == pytest.approx(_pni_monthly(500_000, 0.0585, 30), rel=1e-9)
+    assert p[36] == pytest.approx(_pni_monthly(s["balance"][0, 35], 0.065, 27), rel=1e-9)
+    assert p[119] < p[120] and s["balance"][0, -1] == 0.0
+
+
+def test_extra_repayments_and_offset_shorten_the_loan():
+    base = summarise(amortise(500_000, 0.06, 30))
+    extra = summarise(amortise(500_000, 0.06, 30, extra_monthly=500))
+    offset = summarise(amortise(500_000, 0.06, 30, offset=100_000))
+    s = amortise(500_000, 0.06, 30, offset=100_000)
+    assert s["interest"][0, 0] == pytest.approx(400_000 * 0.005)
+    for other in (extra, offset):
+        assert other["months"][0] < 360
+        assert other["total_interest"][0] < base["total_interest"][0]
+    assert extra["first_payment"][0] == pytest.approx(base["first_payment"][0] + 500)
+
+
+def test_batch_rows_equal_single_loan_schedules():
+    loans = np.array([300_000.0, 750_000.0, 1_200_000.0])
+    rates = np.array([0.055, 0.061, 0.068])
+    years = np.array([25, 30, 20])
+    io = np.array([0, 3, 5])
+    offsets = np.array([0.0, 20_000.0, 150_000.0])
+    batch = amortise(loans, rates, years, io, 250.0, offsets)
+    assert batch.shape == (3, 360)
+    for i in range(3):
+        one = amortise(loans[i], rates[i], years[i], io[i], 250.0, offsets[i])
+        np.testing.assert_array_equal(batch[i, : years[i] * 12], one[0])
+        assert not batch["interest"][i, years[i] * 12:].any()
+
+
+def test_compact_dtype_stays_within_a_few_cents():
+    full = amortise(600_000, 0.06, 30)
+    small = amortise(600_000, 0.06, 30, dtype=COMPACT_DTYPE)
+    assert small.nbytes * 2 == full.nbytes
+    np.testing.assert_allclose(small["balance"], full["balance"], atol=0.05)
+
+
+def test_scalar_repayment_and_rate_agree_with_the_schedule():
+    for kind, io_years in [("P&I", 0), ("P&I", 5), ("IO", 0), ("IO", 3)]:
+        io_period = io_years or (30 if kind == "IO" else 0)
+        first = amortise(650_000, 0.062, 30, io_period, months=1)[0, 0]
+        want = first["interest"] + first["principal"]
+        assert calc_repayments(650_000, 0.062, 30, kind, io_years) == pytest.approx(want, rel=1e-12)
+    path = rate_path(0.065, 360, fixed_rate=0.055, fixed_years=3)[0]
+    assert [pick_active_rate("Fixed", 6.5, 5.5, 3, m) for m in (0, 35, 36)] == pytest.approx(path[[0, 35, 36]])
+    assert pick_active_rate("Fixed", 6.5, 5.5, 0, 359) == pytest.approx(0.055)
+    assert pick_active_rate("Variable", 6.5, 5.5, 3) == pytest.approx(0.065)
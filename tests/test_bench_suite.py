@@ -0,0 +1,34 @@
+from benchmarks.replay import Replay
+from benchmarks.run import compare
+from core import rate_limit
+from core.enrich import enrich_address
+from core.http_cache import CachedResponse
+from providers.geocode_osm import OSM_URL, search_addresses
+
+
+def test_replayed_lookup_needs_no_network():
+    shared = rate_limit.get_cache(), rate_limit.get_robots(), rate_limit.get_limiter()
+    shared[0].set("https://kept.example/", CachedResponse("https://kept.example/", 200, {}, b"x", 0.0))
+    with Replay() as replay:
+        assert rate_limit.get_cache() is replay.cache and rate_limit.get_robots() is replay.robots
+        facts = enrich_address(search_addresses(replay.query)[0])
+        assert facts.address.suburb == "Schofields"
+        assert (facts.beds.value, facts.build_sqm.value) == (4, 210.0) and len(facts.beds.provenance) == 2
+        assert any("[robots: disallowed]" in s for s in facts.source_urls)
+        assert all(s.hits for s in replay.servers.values())
+    from providers import geocode_osm
+    assert geocode_osm.OSM_URL == OSM_URL  # restored on exit
+    assert (rate_limit.get_cache(), rate_limit.get_robots(), rate_limit.get_limiter()) == shared
+    assert shared[0].get("https://kept.example/") is not None  # the shared cache was never cleared
+    shared[0].delete("https://kept.example/")
+
+
+def test_compare_flags_regressions_by_direction():
+    def results(**values):
+        return {"meta": {}, "metrics": {k.replace("_", "."): {"value": v, "unit": "", "better": "lower" if k.endswith("ms") else "higher"}
+                                        for k, v in values.items()}}
+
+    base = results(lookup_ms=10.0, extract_per_sec=100.0, calc_per_sec=100.0)
+    new = results(lookup_ms=12.0, extract_per_sec=50.0, calc_per_sec=200.0)
+    assert {r["metric"] for r in compare(base, new, 0.15) if r["regressed"]} == {"lookup.ms", "extract.per.sec"}
+    assert not any(r["regressed"] for r in compare(new, base, 0.5))
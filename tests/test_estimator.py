@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+
+from core.estimator import LocalityEstimator
+from core.normalise import estimate_from_heuristics, merge_facts
+from models.facts import AddressResolved, FieldValue
+
+
+def _addr(postcode, suburb, state="NSW"):
+    return AddressResolved(query="q", display_name="q", lat=-33.8, lon=151.2, suburb=suburb, state=state,
+                           postcode=postcode, lga=None)
+
+
+def _facts(address, dtype, beds, baths, cars, build, land=None):
+    jsonld = {"dwelling_type": FieldValue(value=dtype, source="jsonld", confidence=0.85),
+              "beds": FieldValue(value=beds, source="jsonld", confidence=0.9),
+              "baths": FieldValue(value=baths, source="jsonld", confidence=0.9),
+              "cars": FieldValue(value=cars, source="jsonld", confidence=0.7),
+              "build_sqm": FieldValue(value=build, source="jsonld", confidence=0.75)}
+    return merge_facts(address=address, jsonld_map=jsonld, open_data={"land_sqm": land} if land else None,
+                       estimated_map={}, source_urls=[])
+
+
+def _history(rng, n=400):
+    city, west = _addr("2000", "Sydney"), _addr("2765", "Riverstone")
+    out = []
+    for _ in range(n):
+        beds = int(rng.choice([1, 2, 2, 3]))
+        out.append(_facts(city, "Apartment", beds, 1, 1, 45.0 + 25 * beds))
+        beds = int(rng.choice([3, 4, 4, 4, 5]))
+        out.append(_facts(west, "House", beds, 2, 2, 60.0 + 40 * beds, land=500))
+    return out
+
+
+def test_estimates_follow_the_locality_and_fall_back_to_heuristics():
+    est = LocalityEstimator()
+    est.add(_history(np.random.default_rng(0)))
+
+    city = est.estimate(_addr("2000", "Sydney"), None)
+    assert city["dwelling_type"].value == "Apartment" and city["beds"].value == 2
+    west = est.estimate(_addr("2765", "Riverstone"), 500.0)
+    assert west["dwelling_type"].value == "House" and west["beds"].value == 4 and west["cars"].value == 2
+    assert 0.5 < west["beds"].confidence < 0.7  # about 3 in 5 Riverstone houses have 4 beds
+    assert all(west[k].source == "estimated" for k in ("dwelling_type", "beds", "baths", "cars", "build_sqm"))
+    assert 160 <= west["build_sqm"].value <= 260
+    # Geocoders spell the state out; the suburb row is still found (the postcode is unknown)
+    named, coded = (est.estimate(_addr(pc, "Riverstone", state=st), None) for pc, st in (("2999", "New South Wales"), ("2765", "NSW")))
+    assert named["dwelling_type"].confidence > 0.9
+    assert {k: (v.value, v.confidence) for k, v in named.items()} == {k: (v.value, v.confidence) for k, v in coded.items()}
+
+    # Unknown postcode in a known state: state-level rows; land hint selects the band
+    assert est.estimate(_addr("2100", None), 600.0)["dwelling_type"].value == "House"
+    empty = LocalityEstimator().estimate(_addr("2000", "Sydney"), 300.0)
+    heuristic = estimate_from_heuristics(_addr("2000", "Sydney"), 300.0)
+    assert {k: v.value for k, v in empty.items()} == {k: v.value for k, v in heuristic.items()}
+
+
+def test_confidence_is_calibrated_against_held_out_facts():
+    rng = np.random.default_rng(1)
+    train, test = _history(rng, 2000), _history(rng, 500)
+    est = LocalityEstimator()
+    est.add(train)
+    for field in ("beds", "baths", "dwelling_type"):
+        conf, hits = [], []
+        for f in test:
+            guess = est.estimate(f.address, f.land_sqm.value)[field]
+            conf.append(guess.confidence)
+            hits.append(guess.value == getattr(f, field).value)
+        assert abs(np.mean(conf) - np.mean(hits)) < 0.08
+
+
+def test_jsonl_is_ingested_incrementally_and_tables_reload_memory_mapped(tmp_path):
+    rng = np.random.default_rng(2)
+    history = _history(rng, 60)
+    src = tmp_path / "facts.jsonl"
+    with open(src, "w") as f:
+        for i, facts in enumerate(history[:60]):
+            f.write(json.dumps({"key": str(i), **facts.model_dump()}) + "\n")
+
+    est = LocalityEstimator(str(tmp_path / "est"))
+    assert est.ingest_jsonl(str(src)) == 60
+    est.save()
+    assert est.ingest_jsonl(str(src)) == 0  # nothing new
+
+    with open(src, "a") as f:
+        for i, facts in enumerate(history[60:], start=60):
+            f.write(json.dumps({"key": str(i), **facts.model_dump()}) + "\n")
+        f.write('{"key": "partial"')  # still being written
+    reopened = LocalityEstimator(str(tmp_path / "est"))
+    assert isinstance(reopened.table, np.memmap)
+    assert reopened.ingest_jsonl(str(src)) == 60
+    reopened.save()
+
+    loaded = LocalityEstimator(str(tmp_path / "est"))
+    assert loaded.stats("*|*", "beds")["n"] == 120
+    assert loaded.stats("pc:2765|House", "beds")["n"] == 60
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from core.facts_cache import FRESH, MISS, STALE, FactsCache, facts_key
+from core.normalise import merge_facts
+from models.facts import AddressResolved
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def _addr(query="130 Alex Ave Schofields", lat=-33.70412, lon=150.87001):
+    return AddressResolved(query=query, display_name=query, lat=lat, lon=lon, suburb="Schofields",
+                           state="NSW", postcode="2762", lga=None)
+
+
+def _enricher(calls, beds=3, delay=0.0):
+    def enrich(address):
+        calls.append(address.query)
+        time.sleep(delay)
+        return merge_facts(address=address, jsonld_map={}, open_data={"beds": beds}, estimated_map={},
+                           source_urls=["https://portal.example/1 [robots: allowed] [ts: 2026-01-01 10:00:00]"])
+    return enrich
+
+
+def test_key_rounds_coordinates_and_shares_spellings(tmp_path):
+    assert facts_key(_addr(lat=-33.70412)) == facts_key(_addr("130 Alex Avenue, Schofields", lat=-33.704118))
+    calls = []
+    cache = FactsCache(str(tmp_path / "facts.sqlite"), clock=_Clock())
+    cache.get(_addr(), _enricher(calls))
+    facts, status, _ = FactsCache(str(tmp_path / "facts.sqlite"), clock=_Clock()).get(
+        _addr("130 Alex Avenue, Schofields", lat=-33.704118), _enricher(calls))
+    assert status == FRESH and calls == ["130 Alex Ave Schofields"]
+    assert facts.address.query == "130 Alex Avenue, Schofields"
+    assert facts.source_urls[0].endswith("[ts: 2026-01-01 10:00:00]")
+
+
+def test_stale_served_at_once_and_refreshed_once_in_background():
+    clock = _Clock()
+    calls = []
+    cache = FactsCache(clock=clock, fresh_sec=60, max_age_sec=3600)
+    cache.get(_addr(), _enricher(calls, beds=3))
+    clock.t += 120
+    slow = _enricher(calls, beds=4, delay=0.2)
+    t0 = time.perf_counter()
+    results = [cache.get(_addr(), slow) for _ in range(3)]
+    assert time.perf_counter() - t0 < 0.1
+    assert {r[1] for r in results} == {STALE} and results[0][0].beds.value == 3
+    cache._pool.shutdown(wait=True)
+    assert len(calls) == 2 and cache.stats.refreshes == 1
+    facts, status, _ = cache.get(_addr(), slow)
+    assert status == FRESH and facts.beds.value == 4
+
+    clock.t += 7200  # past max age: a plain miss
+    assert cache.get(_addr(), _enricher(calls))[1] == MISS
+
+
+def test_concurrent_misses_share_one_enrichment_and_size_is_bounded():
+    calls = []
+    cache = FactsCache(max_entries=2)
+    enrich = _enricher(calls, delay=0.1)
+    threads = [threading.Thread(target=cache.get, args=(_addr(), enrich)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and cache.stats.coalesced == 3
+    for i in range(3):
+        cache.get(_addr(lat=-33.0 - i), _enricher(calls))
+    assert cache._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0] == 2
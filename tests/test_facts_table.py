@@ -0,0 +1,58 @@
+import numpy as np
+
+from calculators.council_rates import calc_council_rates_batch
+from calculators.insurance import estimate_sum_insured_batch
+from calculators.stamp_duty import calc_stamp_duty_batch
+from core.normalise import merge_facts
+from models.facts import AddressResolved, FieldValue
+from models.facts_table import FactsTableBuilder, PropertyFactsTable
+from utils.pdf_export import render_pdf, report_values
+
+
+def _facts(i):
+    addr = AddressResolved(query=f"{i} Main St", display_name=f"{i} Main St, Suburb {i % 3}", lat=-33.0 - i / 100,
+                           lon=151.0, suburb=f"Suburb {i % 3}", state=["NSW", "VIC", None][i % 3],
+                           postcode=str(2000 + i % 3), lga=["City of Sydney", "Blacktown", None][i % 3])
+    jsonld = {"beds": FieldValue(value=1 + i % 4, source="jsonld", confidence=0.9, provenance=[f"https://a/{i}", "https://b"]),
+              "dwelling_type": FieldValue(value="House" if i % 2 else "Apartment", source="jsonld", confidence=0.85)}
+    if i % 2:
+        jsonld["last_sold_price"] = FieldValue(value=800_000.0 + i, source="jsonld", confidence=0.5)
+    return merge_facts(address=addr, jsonld_map=jsonld, open_data={"land_sqm": 300.0 + i}, estimated_map={},
+                       source_urls=[f"https://a/{i} [robots: allowed]"] if i % 2 else [])
+
+
+def test_round_trip_slicing_and_memory_mapped_persistence(tmp_path):
+    models = [_facts(i) for i in range(12)]
+    table = PropertyFactsTable.from_models(models)
+    assert table.to_models() == models
+
+    part = table[3:9]
+    assert np.shares_memory(part.value, table.value) and part.text["display_name"].data is table.text["display_name"].data
+    assert part[0].to_model() == models[3] and part.row(-1).to_model() == models[8]
+    picked = table[table.column("beds") >= 3]
+    assert picked.to_models() == [m for m in models if m.beds.value >= 3]
+
+    part.save(str(tmp_path / "facts"))
+    loaded = PropertyFactsTable.load(str(tmp_path / "facts"))
+    assert isinstance(loaded.value, np.memmap) and len(loaded) == 6
+    assert loaded.to_models() == models[3:9]
+    assert loaded[3].value("land_sqm") == 306.0 and loaded[3].label("state") == "NSW"
+    assert type(loaded[3].value("beds")) is int and type(loaded[3].value("land_sqm")) is float
+
+
+def test_batch_calculators_and_pdf_take_the_table_directly():
+    b = FactsTableBuilder()
+    for i in range(30):
+        b.add(_facts(i))
+    table = b.build()
+    prices = np.full(len(table), 900_000.0)
+    states = table.column("state").decode()
+    assert np.array_equal(calc_stamp_duty_batch(prices, table.column("state")), calc_stamp_duty_batch(prices, states))
+    land = table.column("land_sqm")
+    assert np.array_equal(calc_council_rates_batch(table.column("lga"), land),
+                          calc_council_rates_batch(table.column("lga").decode(), land))
+    assert estimate_sum_insured_batch(table.column("build_sqm")).tolist() == [0.0] * 30  # NaN build counts as none
+
+    assert render_pdf(table[1], 30_000, 1_500, 1_200, 4_000).startswith(b"%PDF")
+    assert report_values(table[1], 30_000, 1_500, 1_200, 4_000)["beds"] == "2"
+    assert report_values(table[1].to_model(), 30_000, 1_500, 1_200, 4_000)["beds"] == "2"
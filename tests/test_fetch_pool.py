@@ -0,0 +1,31 @@
+import time
+from core.fetch_pool import fetch_first
+
+
+def test_fetch_first_returns_first_accepted():
+    delays = {"http://a/1": 0.3, "http://b/1": 0.05, "http://c/1": 0.01}
+
+    def fetch(u):
+        time.sleep(delays[u])
+        return u if u != "http://c/1" else None
+
+    t0 = time.perf_counter()
+    winner, attempts = fetch_first(list(delays), fetch, accept=bool)
+    assert winner.url == "http://b/1"
+    assert [a.url for a in attempts] == ["http://c/1", "http://b/1"]
+    assert time.perf_counter() - t0 < 0.25
+
+
+def test_fetch_first_same_host_is_sequential_and_errors_recorded():
+    seen = []
+
+    def fetch(u):
+        seen.append(u)
+        if u.endswith("/1"):
+            raise RuntimeError("boom")
+        return None
+
+    winner, attempts = fetch_first(["http://a/1", "http://a/2"], fetch, accept=bool)
+    assert winner is None
+    assert seen == ["http://a/1", "http://a/2"]
+    assert isinstance(attempts[0].error, RuntimeError)
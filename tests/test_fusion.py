@@ -0,0 +1,57 @@
+import threading
+import time
+
+from core.fusion import fuse_pages, fuse_values
+from core.normalise import merge_facts
+from models.facts import AddressResolved, FieldValue
+
+
+def _fv(value, url, confidence=0.9):
+    return FieldValue(value=value, source="jsonld", confidence=confidence, provenance=[url])
+
+
+def test_voting_rejects_outliers_and_records_provenance():
+    fused = fuse_values([_fv(4, "a"), _fv(4, "b", 0.8), _fv(40, "c"), _fv(4, "d", 0.7)])
+    assert fused.value == 4 and fused.provenance == ["a", "b", "d"] and fused.confidence == 0.99
+
+    split = fuse_values([_fv(3, "a"), _fv(4, "b", 0.6)])
+    assert split.value == 3 and split.provenance == ["a"] and split.confidence < 0.9
+    sizes = fuse_values([_fv(180.0, "a"), _fv(184.0, "b"), _fv(120.0, "c", 0.5)])
+    assert sizes.value in (180.0, 184.0) and set(sizes.provenance) == {"a", "b"}
+    assert fuse_values([_fv("House", "a"), _fv("house", "b"), _fv("Apartment", "c")]).provenance == ["a", "b"]
+
+    addr = AddressResolved(query="q", display_name="q", lat=0.0, lon=0.0, suburb=None, state="NSW", postcode=None, lga=None)
+    facts = merge_facts(address=addr, jsonld_map={"beds": split}, open_data={"beds": 3, "land_sqm": 420},
+                        estimated_map={}, source_urls=[])
+    assert facts.beds.value == 3 and set(facts.beds.provenance) == {"a", "open_data"}
+    assert facts.beds.confidence > split.confidence
+    assert facts.land_sqm.provenance == ["open_data"] and facts.baths.provenance == ["estimated"]
+
+
+def test_deadline_returns_early_and_refines_in_background():
+    delays = {"http://a/1": 0.01, "http://b/1": 0.02, "http://c/1": 0.4}
+    beds = {"http://a/1": 3, "http://b/1": 4, "http://c/1": 4}
+
+    def page(url):
+        time.sleep(delays[url])
+        return {"beds": _fv(beds[url], url)}, True, True
+
+    refined, done = [], threading.Event()
+
+    def on_refined(fused, attempts):
+        refined.append((fused, attempts))
+        done.set()
+
+    t0 = time.perf_counter()
+    fused, attempts, complete = fuse_pages(list(delays), page, budget_sec=0.15, on_refined=on_refined)
+    assert time.perf_counter() - t0 < 0.3
+    assert not complete and [a.url for a in attempts] == ["http://a/1", "http://b/1"]
+    assert fused["beds"].confidence < 0.5  # one page each way
+
+    assert done.wait(2.0)
+    final, all_attempts = refined[0]
+    assert final["beds"].value == 4 and final["beds"].provenance == ["http://b/1", "http://c/1"]
+    assert len(all_attempts) == 3
+
+    fused, attempts, complete = fuse_pages(list(delays), page)
+    assert complete and fused == final
@@ -0,0 +1,35 @@
+from providers import geocode_local
+from providers.geocode_local import LocalAddressIndex, build_index
+
+CSV = """address_detail_pid,number_first,street_name,street_type_code,locality_name,state_abbreviation,postcode,latitude,longitude
+GA1,130,ALEX,AVENUE,SCHOFIELDS,NSW,2762,-33.70,150.88
+GA2,13,ALEXANDER,STREET,MANLY,NSW,2095,-33.80,151.28
+GA3,7,GEORGE,STREET,PARRAMATTA,NSW,2150,-33.81,151.00
+"""
+
+
+def _index(tmp_path):
+    src = tmp_path / "addr.csv"
+    src.write_text(CSV)
+    assert build_index(str(src), str(tmp_path / "addr.sqlite")) == 3
+    return LocalAddressIndex(str(tmp_path / "addr.sqlite"))
+
+
+def test_prefix_and_full_queries(tmp_path):
+    idx = _index(tmp_path)
+    hits = idx.search("130 alex ave scho")
+    assert [a.display_name for a in hits] == ["130 Alex Avenue, Schofields NSW 2762"]
+    assert hits[0].postcode == "2762" and hits[0].lat == -33.70
+    assert [a.suburb for a in idx.search("alex")] == ["Schofields", "Manly"]
+
+
+def test_fuzzy_query(tmp_path):
+    idx = _index(tmp_path)
+    assert idx.search("7 goerge street parramata")[0].display_name == "7 George Street, Parramatta NSW 2150"
+
+
+def test_falls_back_to_osm_on_miss(tmp_path, monkeypatch):
+    monkeypatch.setattr(geocode_local, "_index", _index(tmp_path))
+    monkeypatch.setattr(geocode_local.geocode_osm, "search_addresses", lambda q: ["osm:" + q])
+    assert geocode_local.search_addresses("1 Nowhere Rd")[0] == "osm:1 Nowhere Rd"
+    assert geocode_local.search_addresses("7 george")[0].suburb == "Parramatta"
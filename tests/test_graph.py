@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from calculators.expenses import expenses_graph
+from core.graph import ComputeGraph
+
+INPUTS = dict(
+    price=900_000.0, state="NSW", owner_occ=False, first_home=False, foreign=False, lga="Blacktown", land_sqm=450.0, build_sqm=200.0, risk="medium",
+    deposit_pct=20, variable_rate=0.0625, fixed_rate=0.0585, fixed=False, fixed_years=0, years=30, io_years=0,
+    extra_monthly=0.0, offset=0.0, rent_week=650.0, pm_fee_pct=6.0,
+)
+
+
+def _recomputed(g):
+    return {t["node"] for t in g.timings() if t["recomputed"]}
+
+
+def test_only_downstream_nodes_recompute():
+    g = expenses_graph()
+    g.set(**INPUTS)
+    g.begin()
+    first = g["cashflow"]
+    assert "schedule" in _recomputed(g)
+
+    g.begin()
+    g.set(pm_fee_pct=8.0)
+    assert g["cashflow"] > first - 100 and g["cashflow"] != first
+    assert _recomputed(g) == {"inflow_month", "cashflow"}
+
+    g.begin()
+    g.set(land_sqm=600.0)
+    g["cashflow"]
+    assert _recomputed(g) == {"council", "outgoings_month", "cashflow"}
+
+
+def test_equal_result_stops_propagation():
+    g = expenses_graph()
+    g.set(**INPUTS)
+    g["cashflow"]
+    g.begin()
+    g.set(fixed_rate=0.05)  # ignored while the loan is variable
+    g["cashflow"]
+    assert _recomputed(g) == {"rates"}
+
+
+def test_graph_handles_arrays_and_reports_cycles():
+    g = ComputeGraph()
+    calls = []
+    g.add("double", lambda a: calls.append(1) or a * 2, "a")
+    g.set(a=np.arange(3))
+    g.get("double")
+    g.set(a=np.arange(3))
+    assert g.get("double").tolist() == [0, 2, 4] and len(calls) == 1
+
+    g.add("x", lambda y: y, "y")
+    g.add("y", lambda x: x, "x")
+    with pytest.raises(ValueError, match="cycle"):
+        g.get("x")
+    with pytest.raises(ValueError):
+        g.set(double=1)
@@ -0,0 +1,91 @@
+import time
+from core import rate_limit
+from core.http_cache import CachedResponse, MemoryLRUCache, SQLiteCache
+
+
+def _resp(url, body=b"x" * 100, **headers):
+    return CachedResponse(url, 200, headers, body, time.time())
+
+
+def test_memory_lru_evicts_by_bytes():
+    c = MemoryLRUCache(max_bytes=250)
+    c.set("a", _resp("a"))
+    c.set("b", _resp("b"))
+    assert c.get("a") is not None  # a becomes most recent
+    c.set("c", _resp("c"))
+    assert c.get("b") is None
+    assert c.get("a") is not None and c.get("c") is not None
+    assert c.stats.evictions == 1
+    assert c.size_bytes() <= 250
+
+
+def test_sqlite_roundtrip_and_eviction(tmp_path):
+    c = SQLiteCache(str(tmp_path / "cache.sqlite"), max_bytes=250)
+    c.set("a", _resp("a", etag='"v1"', **{"Content-Type": "text/html; charset=latin-1"}))
+    got = SQLiteCache(str(tmp_path / "cache.sqlite")).get("a")
+    assert got.content == b"x" * 100
+    assert got.headers["etag"] == '"v1"'
+    assert got.encoding == "latin-1"
+    c.set("b", _resp("b"))
+    c.set("c", _resp("c"))
+    assert c.get("a") is None
+    assert c.stats.evictions == 1
+
+
+class _FakeResp:
+    def __init__(self, status, body=b"", headers=None):
+        self.url = "https://h/p"
+        self.status_code = status
+        self.ok = status < 400
+        self.content = body
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class _AllowAll:
+    def allowed(self, url, ua=None):
+        return True
+
+    def crawl_delay(self, url, ua=None):
+        return None
+
+
+def test_polite_get_revalidates_stale_entry(monkeypatch):
+    cache = MemoryLRUCache()
+    monkeypatch.setattr(rate_limit, "_cache", cache)
+    monkeypatch.setattr(rate_limit, "_robots", _AllowAll())
+    monkeypatch.setattr(rate_limit, "_limiter", rate_limit.HostLimiter(rate=1000.0, burst=10.0))
+    sent = []
+
+    def fake_get(url, headers, timeout):
+        sent.append(headers)
+        if "If-None-Match" in headers:
+            return _FakeResp(304)
+        return _FakeResp(200, b"<html/>", {"ETag": '"abc"'})
+
+    monkeypatch.setattr(rate_limit.http_client, "get", fake_get)
+    first, _ = rate_limit.polite_get("https://h/p")
+    cache.get("https://h/p").fetched_at -= rate_limit.CACHE_TTL_SEC + 1
+    second, _ = rate_limit.polite_get("https://h/p")
+    assert sent[1]["If-None-Match"] == '"abc"'
+    assert second.text == "<html/>"
+    assert cache.stats.revalidated == 1
+
+
+def test_polite_get_retries_server_errors_through_the_limiter(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_cache", MemoryLRUCache())
+    monkeypatch.setattr(rate_limit, "_robots", _AllowAll())
+    slept = []
+    monkeypatch.setattr(rate_limit, "_limiter", rate_limit.HostLimiter(rate=1000.0, burst=10.0, sleep=slept.append))
+    statuses = [502, 500, 200]
+
+    def fake_get(url, headers, timeout):
+        return _FakeResp(statuses.pop(0), b"<html/>")
+
+    monkeypatch.setattr(rate_limit.http_client, "get", fake_get)
+    resp, _ = rate_limit.polite_get("https://h/p")
+    assert resp.status_code == 200 and not statuses
+    # each retry waited for a fresh token, held back by the backoff
+    assert len(slept) == 2 and slept[0] >= 0.49 and slept[1] >= 0.99
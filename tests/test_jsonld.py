@@ -1,6 +1,108 @@
-from providers.jsonld_extractor import _is_property_schema
+from core import rate_limit
+from core.http_cache import MemoryLRUCache
+from providers import jsonld_extractor
+from providers.jsonld_extractor import JsonLdScanner, _first_jsonld_block, _is_property_schema, extract_schema_org
+
 
 def test_is_property_schema():
     assert _is_property_schema({"@type": "House"})
     assert _is_property_schema({"@type": ["Thing", "Apartment"]})
-    assert not _is_property_schema({"@type": "Person"})
\ No newline at end of file
+    assert not _is_property_schema({"@type": "Person"})
+
+
+PAGE = (
+    b'<html><head><script>var s = "<b>";</script>'
+    b'<script type="application/ld+json">{"@type": "Organization"}</script>'
+    b'<script type=\'application/ld+json\'>\n<!--{"@graph": [{"@type": "Person"}, '
+    b'{"@type": "House", "numberOfBedrooms": 3}]}-->\n</script>'
+    b'</head><body>' + b'<p>x</p>' * 1000 + b'</body></html>'
+)
+
+
+def test_scanner_finds_block_across_any_chunking():
+    for size in (1, 7, 64, len(PAGE)):
+        sc = JsonLdScanner()
+        found = None
+        for i in range(0, len(PAGE), size):
+            found = sc.feed(PAGE[i:i + size])
+            if found:
+                break
+        assert found == {"@type": "House", "numberOfBedrooms": 3}
+        assert sc.blocks == 2
+        assert sc.bytes_seen < len(PAGE) or size == len(PAGE)
+
+
+def test_first_block_falls_back_to_soup_on_bad_json():
+    bad = '<script type="application/ld+json">{"@type": "House",}</script>'
+    assert _first_jsonld_block(bad) is None
+    # The byte scanner gives up on the bad block and skips the entity-encoded type; the parser recovers it
+    html = bad + '<script type="application&#x2F;ld+json">{"@type": "House", "numberOfBedrooms": 4}</script>'
+    assert _first_jsonld_block(html) == {"@type": "House", "numberOfBedrooms": 4}
+    assert _first_jsonld_block(PAGE.decode())["numberOfBedrooms"] == 3
+
+
+class _StreamResp:
+    status_code = 200
+    ok = True
+    headers: dict = {}
+
+    def __init__(self, body):
+        self.body = body
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            self.chunks_read += 1
+            yield self.body[i:i + size]
+
+    def close(self):
+        self.closed = True
+
+
+class _Robots:
+    def allowed(self, url, ua=None):
+        return True
+
+    def crawl_delay(self, url, ua=None):
+        return None
+
+
+def _serve(monkeypatch, pages):
+    fetches = []
+
+    def fake_get(url, **kw):
+        fetches.append(kw)
+        return pages[url]
+
+    cache = MemoryLRUCache()
+    monkeypatch.setattr(rate_limit, "_cache", cache)
+    monkeypatch.setattr(rate_limit, "_robots", _Robots())
+    monkeypatch.setattr(rate_limit, "_limiter", rate_limit.HostLimiter(rate=1000.0, burst=10.0))
+    monkeypatch.setattr(rate_limit.http_client, "get", fake_get)
+    return cache, fetches
+
+
+def test_extract_streams_closes_early_and_caches_only_jsonld(monkeypatch):
+    url = "https://portal.example/listing/1"
+    resp = _StreamResp(PAGE + b"<p>tail</p>" * 50_000)
+    cache, fetches = _serve(monkeypatch, {url: resp})
+
+    data, allowed, fetched = extract_schema_org(url)
+    assert (data["numberOfBedrooms"], allowed, fetched) == (3, True, True)
+    assert fetches[0]["stream"] is True
+    assert resp.closed and resp.chunks_read == 1
+    assert cache.size_bytes() < 200
+
+    again, _, _ = extract_schema_org(url)
+    assert again == data and len(fetches) == 1
+
+
+def test_pages_without_jsonld_are_rechecked_after_the_negative_ttl(monkeypatch):
+    url = "https://portal.example/listing/2"
+    cache, fetches = _serve(monkeypatch, {url: _StreamResp(b"<html><body>coming soon</body></html>")})
+    assert extract_schema_org(url) == (None, True, True)
+    assert extract_schema_org(url) == (None, True, True) and len(fetches) == 1
+    cache.get(jsonld_extractor.JSONLD_CACHE_PREFIX + url).fetched_at -= jsonld_extractor.NEGATIVE_TTL_SEC + 1
+    extract_schema_org(url)
+    assert len(fetches) == 2
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+from calculators.council_rates import calc_council_rates
+from calculators.lga_tables import normalise_lga, yield_batch, yield_for
+from models.facts import AddressResolved
+from providers import lga_resolver
+from providers.lga_resolver import LgaIndex, fill_lga, load_index
+
+# West: a square with a lake (hole). East: the neighbouring square plus an island.
+WEST = [[[150.0, -34.0], [151.0, -34.0], [151.0, -33.0], [150.0, -33.0], [150.0, -34.0]],
+        [[150.4, -33.6], [150.6, -33.6], [150.6, -33.4], [150.4, -33.4], [150.4, -33.6]]]
+EAST = [[[[151.0, -34.0], [152.0, -34.0], [152.0, -33.0], [151.0, -33.0], [151.0, -34.0]]],
+        [[[152.5, -33.6], [152.8, -33.6], [152.7, -33.3], [152.5, -33.6]]]]
+
+
+def _geojson(tmp_path):
+    path = tmp_path / "lga.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"LGA_NAME24": "Blacktown"}, "geometry": {"type": "Polygon", "coordinates": WEST}},
+        {"type": "Feature", "properties": {"LGA_NAME24": "Sydney"}, "geometry": {"type": "MultiPolygon", "coordinates": EAST}},
+    ]}))
+    return str(path)
+
+
+def test_points_resolve_with_holes_islands_and_outside(tmp_path):
+    index = load_index(_geojson(tmp_path), cells=16)
+    lat = [-33.8, -33.5, -33.2, -33.5, -33.45, -35.0, -33.5]
+    lon = [150.2, 150.5, 151.5, 152.65, 152.7, 150.5, 152.3]
+    assert index.lookup(lat, lon).tolist() == ["Blacktown", None, "Sydney", "Sydney", "Sydney", None, None]
+    assert index.lga_at(-33.5, 150.95) == "Blacktown"
+
+
+def test_grid_fast_path_agrees_with_ray_casting_everywhere(tmp_path):
+    index = LgaIndex.from_geojson(_geojson(tmp_path), cells=32)
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-34.2, -32.8, 20000), rng.uniform(149.8, 153.0, 20000)
+    fast = index.lookup_ids(lat, lon)
+    min_x, min_y, max_x, max_y = index.bounds
+    rows = np.clip(((lat - min_y) / (max_y - min_y) * index.shape[0]).astype(int), 0, index.shape[0] - 1)
+    inside = (lon >= min_x) & (lon < max_x) & (lat >= min_y) & (lat < max_y)
+    slow = np.where(inside, index._ray_cast(lon, lat, rows), -1)
+    assert (fast == slow).all()
+    assert (index.cell_owner >= 0).any() and (index.cell_owner == -2).any()
+
+
+def test_compiled_index_is_cached_beside_the_geojson(tmp_path, monkeypatch):
+    path = _geojson(tmp_path)
+    load_index(path)
+    calls = []
+    monkeypatch.setattr(LgaIndex, "from_geojson", classmethod(lambda cls, p, c=0: calls.append(p)))
+    assert load_index(path).lga_at(-33.8, 150.2) == "Blacktown"
+    assert not calls
+
+
+def test_fill_lga_and_lga_tables(tmp_path):
+    lga_resolver.set_index(LgaIndex.from_geojson(_geojson(tmp_path), cells=16))
+    try:
+        a = AddressResolved(query="q", display_name="1 A St", lat=-33.2, lon=151.5, suburb=None, state="NSW",
+                            postcode=None, lga=None)
+        b = a.model_copy(update={"lga": "Penrith"})
+        filled = fill_lga([a, b])
+        assert [x.lga for x in filled] == ["Sydney", "Penrith"]
+    finally:
+        lga_resolver.set_index(None)
+
+    assert normalise_lga("Blacktown (C)") == normalise_lga("Blacktown City Council") == "blacktown"
+    assert yield_for("City of Sydney") == 0.03 and yield_for(None) == yield_for("Nowhere") == 0.036
+    assert yield_batch(["Sydney", "Blacktown (C)", ""]).tolist() == [0.03, 0.037, 0.036]
+    assert calc_council_rates("City of Sydney", 500) == pytest.approx(1.1 * calc_council_rates("Nowhere", 500))
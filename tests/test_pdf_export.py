@@ -0,0 +1,54 @@
+import re
+import zipfile
+
+import numpy as np
+from reportlab import rl_config
+
+from core.normalise import merge_facts
+from models.facts import AddressResolved, FieldValue
+from models.facts_table import PropertyFactsTable
+from utils.pdf_export import portfolio_costs, render_batch, render_pdf
+
+PAGE = re.compile(rb"/Type /Page\b(?!s)")
+
+
+def _table(rows):
+    facts = []
+    for i in range(rows):
+        addr = AddressResolved(query=f"{i} Main St", display_name=f"{i} Main St, Riverstone NSW 2765", lat=-33.68, lon=150.86,
+                               suburb="Riverstone", state="NSW", postcode="2765", lga="Blacktown")
+        facts.append(merge_facts(address=addr, open_data={"land_sqm": 400.0 + i},
+                                 jsonld_map={"beds": FieldValue(value=3, source="jsonld", confidence=0.9),
+                                             "last_sold_price": FieldValue(value=850_000.0 + i, source="jsonld", confidence=0.5)},
+                                 estimated_map={}, source_urls=[]))
+    return facts, PropertyFactsTable.from_models(facts)
+
+
+def test_single_report_is_rendered_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rl_config, "invariant", 1)  # no timestamps or random IDs, so output compares
+    facts, table = _table(1)
+    pdf = render_pdf(facts[0], 30_000, 1_500, 1_200, 4_000)
+    assert pdf.startswith(b"%PDF") and len(PAGE.findall(pdf)) == 1
+    assert render_pdf(table[0], 30_000, 1_500, 1_200, 4_000) == pdf
+    assert not list(tmp_path.iterdir())
+
+
+def test_batch_renders_a_zip_over_a_pool_and_one_multi_page_pdf(tmp_path, monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)  # inherited by the forked workers
+    _, table = _table(25)
+    costs = portfolio_costs(table)
+    assert costs["stamp_duty"].shape == (25,) and (costs["monthly_repay"] > 0).all()
+
+    stats = render_batch(table, costs, str(tmp_path / "reports.zip"), workers=2, chunk=10)
+    assert stats["pages"] == 25
+    with zipfile.ZipFile(tmp_path / "reports.zip") as z:
+        names = z.namelist()
+        assert names == [f"{i:06d}.pdf" for i in range(25)]
+        assert z.read(names[3]) == render_pdf(table[3], *(float(np.asarray(costs[k])[3]) for k in
+                                                          ("stamp_duty", "council", "premium", "monthly_repay")))
+
+    render_batch(table, costs, str(tmp_path / "reports.pdf"), workers=1)
+    pdf = (tmp_path / "reports.pdf").read_bytes()
+    assert len(PAGE.findall(pdf)) == 25
+    assert pdf.count(b"/Subtype /Form") == 1  # static drawing shared by every page
@@ -0,0 +1,85 @@
+import json
+import threading
+
+import pytest
+
+from core.pipeline import read_addresses, run_pipeline
+from models.facts import AddressResolved, FieldValue, PropertyFacts
+
+
+def _fv(v):
+    return FieldValue(value=v, source="estimated", confidence=0.5)
+
+
+def _stages(fail_on=()):
+    seen = []
+    lock = threading.Lock()
+
+    def geocode(job):
+        if job.query in fail_on:
+            raise LookupError("no geocode match")
+        with lock:
+            seen.append(job.query)
+        job.address = AddressResolved(query=job.query, display_name=job.query, lat=0, lon=0,
+                                      suburb=None, state="NSW", postcode=None, lga=None)
+
+    def merge(job):
+        job.facts = PropertyFacts(address=job.address, dwelling_type=_fv("House"), beds=_fv(3), baths=_fv(2),
+                                  cars=_fv(1), land_sqm=_fv(400), build_sqm=_fv(150), last_sold_price=None,
+                                  source_urls=[])
+
+    return [("geocode", geocode), ("merge", merge)], seen
+
+
+def test_pipeline_writes_errors_and_resumes(tmp_path):
+    src = tmp_path / "in.csv"
+    src.write_text("id,address\n" + "".join(f"{i},{i} Main St\n" for i in range(1, 21)))
+    out = str(tmp_path / "facts.jsonl")
+
+    stages, _ = _stages(fail_on={"3 Main St"})
+    report = run_pipeline(read_addresses(str(src)), out, workers={"geocode": 4, "merge": 2}, stages=stages, queue_size=2)
+    assert (report["written"], report["failed"]) == (19, 1)
+    assert [s["items"] for s in report["stages"]] == [20, 19]
+    lines = [json.loads(x) for x in open(out)]
+    assert len(lines) == 19 and lines[0]["beds"]["value"] == 3
+    assert "no geocode match" in open(out + ".errors.jsonl").read()
+
+    src.write_text(src.read_text() + "21,21 Main St\n")
+    stages, seen = _stages()
+    report = run_pipeline(read_addresses(str(src)), out, stages=stages)
+    assert sorted(seen) == ["21 Main St", "3 Main St"]  # the failed row is retried
+    assert (report["skipped"], report["written"], report["failed"]) == (19, 2, 0)
+    assert len(open(out).readlines()) == 21
+
+
+def test_bad_input_row_fails_the_run_instead_of_hanging(tmp_path):
+    src = tmp_path / "in.jsonl"
+    src.write_text(json.dumps({"address": "1 A St"}) + "\n" + json.dumps({"street": "2 B St"}) + "\n")
+    out = str(tmp_path / "facts.jsonl")
+    stages, seen = _stages()
+    with pytest.raises(ValueError, match="line 2"):
+        run_pipeline(read_addresses(str(src)), out, stages=stages)
+    assert seen == ["1 A St"] and len(open(out).readlines()) == 1  # rows before the bad one are kept
+    src.write_text("{not json\n")
+    with pytest.raises(ValueError, match="line 1"):
+        run_pipeline(read_addresses(str(src)), out, stages=stages)
+
+
+def test_read_jsonl_with_resolved_addresses(tmp_path):
+    src = tmp_path / "in.jsonl"
+    src.write_text(json.dumps({"address": "1 A St"}) + "\n" +
+                   json.dumps({"display_name": "2 B St", "lat": -33.0, "lon": 151.0, "state": "NSW"}) + "\n")
+    rows = list(read_addresses(str(src)))
+    assert rows[0] == ("0", "1 A St", None)
+    assert rows[1][2].lat == -33.0 and rows[1][2].query == "2 B St"
+
+
+def test_parquet_output(tmp_path):
+    pq = __import__("pytest").importorskip("pyarrow.parquet")
+    stages, _ = _stages()
+    rows = [(str(i), f"{i} Main St", None) for i in range(5)]
+    run_pipeline(rows, str(tmp_path / "facts.parquet"), stages=stages)
+    table = pq.read_table(str(tmp_path / "facts.parquet"))
+    assert table.num_rows == 5
+    assert table.column("beds").to_pylist() == [3.0] * 5
+    assert table.column("last_sold_price_source").to_pylist() == [None] * 5
@@ -0,0 +1,29 @@
+from models.facts import AddressResolved
+from providers.portal_finders import LocalIndexBackend, find_candidate_urls
+
+ADDR = AddressResolved(
+    query="130 alex", display_name="130 Alex Avenue Schofields", lat=-33.7, lon=150.9,
+    suburb="Schofields", state="NSW", postcode="2762", lga=None,
+)
+
+INDEX = [
+    "https://www.realestate.com.au/property/130-alex-avenue-schofields",
+    "https://www.domain.com.au/130-alex-avenue-schofields",
+    "https://example.com/alex-avenue",
+    "https://www.domain.com.au/9-other-street-riverstone",
+]
+
+
+def test_batched_search_is_one_query():
+    backend = LocalIndexBackend(INDEX)
+    urls = find_candidate_urls(ADDR, backend=backend)
+    assert urls == INDEX[:2]
+    assert len(backend.queries) == 1
+    assert "site:realestate.com.au OR site:domain.com.au" in backend.queries[0]
+
+
+def test_empty_batched_search_is_not_repeated_per_site():
+    backend = LocalIndexBackend(["https://www.onthehouse.com.au/alex"])
+    backend.search = lambda q, _s=backend.search: [] if " OR " in q else _s(q)
+    assert find_candidate_urls(ADDR, backend=backend) == []
+    assert find_candidate_urls(ADDR, backend=backend, batched=False) == ["https://www.onthehouse.com.au/alex"]
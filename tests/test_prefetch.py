@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+
+from core.prefetch import REWARM_SEC, Prefetcher
+from models.facts import AddressResolved
+
+
+def _addr(name):
+    return AddressResolved(query=name, display_name=name, lat=-33.7, lon=150.9, suburb="Schofields", state="NSW",
+                           postcode="2762", lga=None)
+
+
+def _wait(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_warms_default_then_recent_then_watchlist_once_each(tmp_path):
+    warmed, geocoded = [], []
+    p = Prefetcher(enrich=lambda a: warmed.append(a.display_name),
+                   suggest=lambda q: geocoded.append(q) or ([_addr(f"{q.title()}, Schofields")] if "nowhere" not in q else []),
+                   idle_sec=0.0, gap_sec=0.0)
+    p.remember(_addr("1 Default Ave, Schofields"))  # the default, looked up in an earlier session
+    p.remember(_addr("2 Recent Rd"))
+    watch = tmp_path / "watch.csv"
+    watch.write_text("id,address\n1,3 watched st\n2,nowhere\n3,1 default ave\n")
+    p.start(["1 default ave"], watchlist=str(watch))
+    try:
+        assert _wait(lambda: p.stats.warmed + p.stats.skipped == 5)
+    finally:
+        p.stop(1.0)
+    assert warmed == ["1 Default Ave, Schofields", "2 Recent Rd", "3 Watched St, Schofields"]
+    assert "2 Recent Rd" not in geocoded  # recent addresses are stored resolved
+    assert p.stats.as_dict() == {"queued": 5, "warmed": 3, "skipped": 2, "errors": 0, "yielded": 0}
+    assert not p.submit("1 Default Ave, Schofields") and not p.submit("1 default ave")  # warmed recently
+
+
+def test_bad_watchlist_is_logged_and_skipped(tmp_path, caplog):
+    warmed = []
+    p = Prefetcher(enrich=lambda a: warmed.append(a.display_name), suggest=lambda q: [_addr(q.title())],
+                   idle_sec=0.0, gap_sec=0.0)
+    bad, good = tmp_path / "bad.jsonl", tmp_path / "good.csv"
+    bad.write_text('{"address": "4 First St"}\n{not json\n')
+    good.write_text("id,address\n1,5 good st\n")
+    p.start([], watchlist=os.pathsep.join([str(bad), str(tmp_path / "missing.csv"), str(good)]))  # reads nothing itself
+    try:
+        assert _wait(lambda: p.stats.warmed == 2)
+    finally:
+        p.stop(1.0)
+    assert warmed == ["4 First St", "5 Good St"] and p.stats.errors == 2
+    assert "bad.jsonl" in caplog.text
+
+
+def test_warmed_keys_expire_and_are_pruned():
+    now = [0.0]
+    p = Prefetcher(enrich=None, suggest=lambda q: [_addr(q.title())], idle_sec=0.0, gap_sec=0.0, clock=lambda: now[0])
+    p.start(["1 a st"], watchlist=None)
+    try:
+        assert _wait(lambda: "1 a st" in p._warmed)
+        now[0] += REWARM_SEC
+        assert p.submit("2 b st")
+        assert _wait(lambda: p.stats.warmed == 2)
+    finally:
+        p.stop(1.0)
+    assert sorted(p._warmed) == ["2 b st"]
+
+
+def test_interactive_lookups_hold_prefetch_back():
+    warmed = []
+    p = Prefetcher(enrich=lambda a: warmed.append(time.monotonic()), suggest=lambda q: [_addr(q)],
+                   idle_sec=0.2, gap_sec=0.0)
+    with p.interactive():
+        p.start(["1 Default Ave"], watchlist=None)
+        time.sleep(0.3)
+        assert warmed == []
+    released = time.monotonic()
+    try:
+        assert _wait(lambda: warmed)
+    finally:
+        p.stop(1.0)
+    assert warmed[0] - released >= 0.19 and p.stats.yielded >= 1
+    assert not [t for t in threading.enumerate() if t.name == "prefetch"]
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from core import rate_limit
+from core.rate_limit import HostLimiter, MemoryBucketStore, SQLiteBucketStore, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self, t=0.0):
+        self.t = t
+        self.slept = []
+
+    def __call__(self):
+        return self.t
+
+    def sleep(self, s):
+        self.slept.append(s)
+
+
+def test_contended_reservations_keep_configured_rate():
+    clock = FakeClock()
+    lim = HostLimiter(rate=2.0, burst=5.0, clock=clock, sleep=clock.sleep)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(25):
+            w = lim.reserve("a.com")
+            with lock:
+                waits.append(w)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 200 requests: the burst goes immediately, the rest are spaced at 1/rate
+    assert sorted(waits) == [0.0] * 5 + [(i + 1) / 2.0 for i in range(195)]
+    assert 200 / max(waits) <= 2.0 + 5.0 / max(waits) + 1e-9
+
+
+def test_tokens_refill_with_time_and_hosts_are_independent():
+    clock = FakeClock()
+    lim = HostLimiter(rate=1.0, burst=1.0, clock=clock, sleep=clock.sleep)
+    assert lim.acquire("a.com") == 0.0
+    assert lim.acquire("a.com") == 1.0
+    assert lim.acquire("b.com") == 0.0
+    clock.t += 10
+    assert lim.acquire("a.com") == 0.0
+    assert clock.slept == [1.0]
+
+
+def test_crawl_delay_and_retry_after():
+    clock = FakeClock()
+    lim = HostLimiter(rate=1.0, burst=1.0, clock=clock, sleep=clock.sleep)
+    lim.set_crawl_delay("a.com", 5)
+    assert lim.reserve("a.com") == 0.0
+    assert lim.reserve("a.com") == 5.0
+    lim.retry_after("b.com", 30)
+    assert lim.reserve("b.com") == 30.0
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == 10.0
+
+
+def test_host_rates_apply_to_every_limiter(monkeypatch):
+    monkeypatch.setitem(rate_limit.HOST_RATES, "slow.com", (0.1, 1.0))
+    lim = HostLimiter(rate=1.0, burst=1.0)
+    assert lim.limits("slow.com") == (0.1, 1.0) and lim.limits("a.com") == (1.0, 1.0)
+    lim.host_rates["slow.com"] = (0.5, 2.0)
+    assert lim.limits("slow.com") == (0.5, 2.0)
+    assert HostLimiter(rate=0.5).limits("nominatim.openstreetmap.org") == (1.0, 1.0)
+
+
+def test_async_acquire_does_not_block_loop():
+    lim = HostLimiter(rate=50.0, burst=1.0)
+
+    async def main():
+        return await asyncio.gather(*(lim.acquire_async("a.com") for _ in range(3)))
+
+    waits = asyncio.run(main())
+    assert sorted(round(w, 2) for w in waits) == [0.0, 0.02, 0.04]
+
+
+def test_sqlite_store_shared_between_limiters(tmp_path):
+    clock = FakeClock(1000.0)
+    path = str(tmp_path / "rl.sqlite")
+    a = HostLimiter(rate=1.0, burst=1.0, store=SQLiteBucketStore(path), clock=clock, sleep=clock.sleep)
+    b = HostLimiter(rate=1.0, burst=1.0, store=SQLiteBucketStore(path), clock=clock, sleep=clock.sleep)
+    assert a.reserve("a.com") == 0.0
+    assert b.reserve("a.com") == 1.0
+    assert a.reserve("a.com") == 2.0
+    assert isinstance(HostLimiter(1.0).store, MemoryBucketStore)
@@ -0,0 +1,98 @@
+import threading
+import time
+from core import robots
+from core.robots import RobotsCache, ttl_from_headers
+
+
+class _Resp:
+    def __init__(self, status, text="", headers=None):
+        self.status_code = status
+        self.text = text
+        self.headers = headers or {}
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def _patch(monkeypatch, responses, delay=0.0):
+    calls = []
+
+    def fake_get(url, headers, timeout):
+        calls.append(headers)
+        time.sleep(delay)
+        return responses.pop(0) if len(responses) > 1 else responses[0]
+
+    monkeypatch.setattr(robots.http_client, "get", fake_get)
+    return calls
+
+
+def test_negative_cache_for_missing_robots(monkeypatch):
+    calls = _patch(monkeypatch, [_Resp(404)])
+    rc = RobotsCache()
+    for _ in range(5):
+        assert rc.allowed("https://a.com/x")
+    assert len(calls) == 1
+    assert rc.stats.fetches_saved == 4
+
+
+def test_ttl_expiry_and_conditional_refetch(monkeypatch):
+    body = "User-agent: *\nDisallow: /private\n"
+    calls = _patch(monkeypatch, [
+        _Resp(200, body, {"ETag": '"r1"', "Cache-Control": "max-age=600"}),
+        _Resp(304, headers={"Cache-Control": "max-age=600"}),
+    ])
+    clock = _Clock()
+    rc = RobotsCache(clock=clock)
+    assert not rc.allowed("https://a.com/private/1")
+    clock.t += 601
+    assert not rc.allowed("https://a.com/private/2")
+    assert rc.allowed("https://a.com/public")
+    assert calls[1]["If-None-Match"] == '"r1"'
+    assert rc.stats.not_modified == 1
+    assert len(calls) == 2
+
+
+def test_server_error_keeps_stale_rules_and_disallows_unknown_hosts(monkeypatch):
+    body = "User-agent: *\nDisallow: /private\n"
+    calls = _patch(monkeypatch, [_Resp(200, body, {"Cache-Control": "max-age=600"}), _Resp(503)])
+    clock = _Clock()
+    rc = RobotsCache(clock=clock)
+    assert not rc.allowed("https://a.com/private/1")
+    clock.t += 601
+    assert not rc.allowed("https://a.com/private/2")
+    assert rc.allowed("https://a.com/public")
+    assert len(calls) == 2
+    clock.t += robots.ERROR_TTL_SEC - 1
+    assert not rc.allowed("https://a.com/private/3")  # stale rules extended, not re-fetched
+    assert len(calls) == 2
+    assert not rc.allowed("https://b.com/public")  # 503 with nothing cached: disallow all
+
+
+def test_single_flight(monkeypatch):
+    calls = _patch(monkeypatch, [_Resp(200, "User-agent: *\nAllow: /\n")], delay=0.1)
+    rc = RobotsCache()
+    threads = [threading.Thread(target=rc.allowed, args=("https://a.com/x",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+
+
+def test_shared_store(monkeypatch, tmp_path):
+    calls = _patch(monkeypatch, [_Resp(200, "User-agent: *\nDisallow: /\n")])
+    path = str(tmp_path / "robots.sqlite")
+    assert not RobotsCache(path).allowed("https://a.com/x")
+    assert not RobotsCache(path).allowed("https://a.com/y")
+    assert len(calls) == 1
+
+
+def test_ttl_from_headers():
+    assert ttl_from_headers({"Cache-Control": "public, max-age=3600"}) == 3600
+    assert ttl_from_headers({"Cache-Control": "no-cache"}) == robots.MIN_TTL_SEC
+    assert ttl_from_headers({}) == robots.DEFAULT_TTL_SEC
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from calculators.cashflow import calc_cashflow
+from calculators.repayments import _pni_monthly
+from calculators.scenarios import simulate
+from calculators.stamp_duty import calc_stamp_duty
+from models.scenario import ScenarioInputs
+
+FLAT = dict(rate_vol=0.0, rent_growth=0.0, rent_growth_vol=0.0, vacancy_rate=0.0,
+            expense_inflation=0.0, expense_inflation_vol=0.0)
+
+
+def test_without_randomness_every_path_is_the_deterministic_cashflow():
+    inp = ScenarioInputs(price=800_000, rent_week=600, outgoings_month=300, horizon_years=5, **FLAT)
+    res = simulate(inp, paths=50, chunk=16)
+    repay = _pni_monthly(640_000, 0.0625, 30)
+    want = calc_cashflow(600 * 52 / 12 * 0.94, repay, 300)
+    assert res.yearly_cashflow.shape == (50, 5)
+    np.testing.assert_allclose(res.yearly_cashflow, want, rtol=1e-5)
+    assert res.cumulative_cost[0] == pytest.approx(calc_stamp_duty(800_000, owner_occ=False) - 60 * want, rel=1e-5)
+
+
+def test_results_are_reproducible_and_independent_of_worker_count():
+    inp = ScenarioInputs(price=900_000, rent_week=650, outgoings_month=350, horizon_years=10,
+                         fixed_rate=0.0585, fixed_years=2)
+    serial = simulate(inp, paths=3000, seed=7, chunk=1000)
+    pooled = simulate(inp, paths=3000, seed=7, chunk=1000, workers=2)
+    np.testing.assert_array_equal(serial.yearly_cashflow, pooled.yearly_cashflow)
+    np.testing.assert_array_equal(serial.cumulative_cost, pooled.cumulative_cost)
+    assert serial.yearly_cashflow.dtype == np.float32
+
+    s = serial.summary()
+    assert s["paths"] == 3000
+    lo, mid, hi = (s["cumulative_cost"][p] for p in (5, 50, 95))
+    assert lo < mid < hi
+    # Fixed for two years, so year one has no rate risk: the spread comes from rent and costs only
+    spread = np.ptp(np.percentile(serial.yearly_cashflow, [5, 95], axis=0), axis=0)
+    assert spread[0] < spread[5]
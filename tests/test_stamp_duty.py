@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from calculators import stamp_duty
+from calculators.stamp_duty import calc_stamp_duty, calc_stamp_duty_batch, load_rules, schedule_for
+
+# Worked examples from the state revenue offices' published rate tables, for the
+# schedule in force on ON. (price, state, kwargs, duty)
+ON = "2025-01-01"
+PUBLISHED = [
+    (500_000, "VIC", {}, 25_070.0),
+    (1_500_000, "VIC", {}, 82_500.0),
+    (2_500_000, "VIC", {}, 142_500.0),
+    (500_000, "VIC", {"first_home": True}, 0.0),
+    (650_000, "VIC", {"first_home": True}, 34_070.0 / 3),
+    (500_000, "VIC", {"foreign": True}, 65_070.0),
+    (500_000, "QLD", {"owner_occ": False}, 15_925.0),
+    (500_000, "QLD", {}, 8_750.0),
+    (1_200_000, "QLD", {"owner_occ": False}, 49_525.0),
+    (650_000, "QLD", {"first_home": True}, 0.0),
+    (500_000, "SA", {}, 21_330.0),
+    (1_000_000, "SA", {}, 48_830.0),
+    (500_000, "WA", {}, 17_765.0),
+    (800_000, "WA", {}, 32_315.5),
+    (500_000, "WA", {"first_home": True}, 7_505.0),
+    (500_000, "TAS", {}, 18_247.5),
+    (750_000, "TAS", {}, 28_935.0),
+    (700_000, "TAS", {"first_home": True}, 0.0),
+    (1_000_000, "NSW", {}, 39_529.0),
+    (800_000, "NSW", {"first_home": True}, 0.0),
+    (2_000, "TAS", {}, 50.0),
+]
+
+
+@pytest.mark.parametrize("price,state,kw,want", PUBLISHED)
+def test_published_examples(price, state, kw, want):
+    assert calc_stamp_duty(price, state, on=ON, **kw) == pytest.approx(want, abs=0.01)
+
+
+def test_effective_dates_pick_the_schedule_in_force():
+    assert schedule_for("NSW", "2020-01-01").effective_from.isoformat() == "2019-07-01"
+    assert schedule_for("nsw", "2024-07-01").effective_from.isoformat() == "2024-07-01"
+    assert schedule_for("NSW", "2001-01-01").effective_from.isoformat() == "2019-07-01"
+    assert calc_stamp_duty(500_000, "NSW", on="2020-01-01") == pytest.approx(10_090 + 0.045 * 184_000)
+    assert schedule_for("ACT") is None
+    assert calc_stamp_duty(500_000, "ACT") == pytest.approx(22_500.0)
+
+
+def test_batch_matches_scalar_across_states_and_flags():
+    rng = np.random.default_rng(9)
+    n = 3000
+    prices = rng.uniform(-1e4, 4e6, n)
+    states = rng.choice(["NSW", "VIC", "qld", "SA", "WA", "TAS", "ACT", "NT"], n)
+    oo, fhb, foreign = rng.random((3, n)) < 0.5
+    got = calc_stamp_duty_batch(prices, states, oo, fhb, foreign, on=ON)
+    want = [calc_stamp_duty(float(p), str(s), bool(o), bool(f), bool(x), on=ON)
+            for p, s, o, f, x in zip(prices, states, oo, fhb, foreign)]
+    np.testing.assert_allclose(got, want, rtol=1e-12)
+
+
+def test_full_state_names_use_the_state_rules():
+    assert calc_stamp_duty(1_000_000, "New South Wales") == calc_stamp_duty(1_000_000, "NSW") == 39529.0
+    assert schedule_for("victoria") is schedule_for("VIC") and schedule_for("N.S.W.") is schedule_for("NSW")
+    states = np.array(["New South Wales", "Queensland", "NSW", "Atlantis"], dtype=object)
+    got = calc_stamp_duty_batch(np.full(4, 1_000_000.0), states)
+    assert got.tolist() == [calc_stamp_duty(1_000_000, s) for s in ("NSW", "QLD", "NSW", "Atlantis")]
+    assert got[-1] == 1_000_000 * stamp_duty.FALLBACK_RATE
+
+
+def test_compiled_artefact_is_reused_until_the_json_changes(tmp_path, monkeypatch):
+    rules = tmp_path / "rules"
+    rules.mkdir()
+    (rules / "sa.json").write_text(open(f"{stamp_duty.RULES_DIR}/sa.json").read())
+    calls = []
+    real = stamp_duty.compile_rules
+    monkeypatch.setattr(stamp_duty, "compile_rules", lambda d: calls.append(d) or real(d))
+    load_rules(str(rules), str(tmp_path))
+    tables = load_rules(str(rules), str(tmp_path))
+    assert len(calls) == 1 and (tmp_path / stamp_duty.COMPILED_NAME).exists()
+    assert tables["SA"][1][0].foreign == 0.07
+    (rules / "sa.json").write_text((rules / "sa.json").read_text().replace("0.07", "0.075"))
+    assert load_rules(str(rules), str(tmp_path))["SA"][1][0].foreign == 0.075
+    assert len(calls) == 2
+    load_rules(str(rules))
+    assert sorted(os.listdir(rules)) == ["sa.json"]  # never written beside the rules
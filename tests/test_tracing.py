@@ -0,0 +1,64 @@
+import json
+import time
+
+import pytest
+
+from core import tracing
+from core.fetch_pool import FetchStream
+
+
+@pytest.fixture
+def on():
+    tracing.reset()
+    tracing.enable()
+    yield
+    tracing.enable(False)
+    tracing.reset()
+
+
+@tracing.traced("fetch")
+def _fetch(url):
+    with tracing.span("parse"):
+        time.sleep(0.01)
+    return url
+
+
+def test_off_records_nothing(monkeypatch):
+    monkeypatch.setattr(tracing, "_enabled", False)
+    tracing.reset()
+    with tracing.trace() as t:
+        assert _fetch("http://a/1") == "http://a/1"
+    assert t is None and tracing.snapshot() == []
+    assert tracing.span("x") is tracing.span("y")  # the shared no-op
+
+
+def test_trace_follows_fetch_workers_and_feeds_histograms(on, tmp_path):
+    urls = ["http://a/1", "http://a/2", "http://b/1"]
+    with tracing.trace("lookup") as t:
+        stream = FetchStream(urls, _fetch)
+        while stream.next() is not None:
+            pass
+    spans = t.waterfall()
+    assert spans[0]["span"] == "lookup" and spans[0]["depth"] == 0
+    assert sorted(s["span"] for s in spans[1:]) == ["fetch"] * 3 + ["parse"] * 3
+    assert {s["depth"] for s in spans if s["span"] == "parse"} == {2}
+    assert {s["thread"] for s in spans[1:]} != {spans[0]["thread"]}  # recorded from the pool's threads
+
+    stages = {r["stage"]: r for r in tracing.snapshot()}
+    assert stages["fetch"]["count"] == 3 and 9 < stages["parse"]["p50_ms"] < 13
+    text = tracing.prometheus()
+    assert 'proplens_stage_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'proplens_stage_quantile_seconds{stage="parse",quantile="0.99"}' in text
+    path = tracing.export(str(tmp_path / "trace.json"))
+    assert {r["stage"] for r in json.load(open(path))} == {"lookup", "fetch", "parse"}
+
+
+def test_quantiles_from_buckets():
+    h = tracing.Histogram()
+    for _ in range(90):
+        h.observe(0.001)
+    for _ in range(10):
+        h.observe(0.1)
+    assert h.quantile(0.5) == pytest.approx(0.001, rel=0.13)
+    assert h.quantile(0.99) == pytest.approx(0.1, rel=0.13)
+    assert h.quantile(1.0) == 0.1
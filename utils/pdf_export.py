@@ -1,51 +1,271 @@
+"""Summary PDF reports, rendered in memory.
+
+The page layout is a ReportTemplate, laid out once per process: label
+positions, fonts and the widths that place each value after its label. On each
+canvas the static part (title, labels, section headings, footer) is drawn once
+into a form XObject, and every page then references it and writes only the
+values. A thousand-page batch therefore carries one copy of the static
+drawing.
+
+Single reports render to bytes, with no shared file. Batches of a
+PropertyFactsTable render over a process pool into a zip of per-property PDFs,
+or into one multi-page PDF. Merging the workers' parts into one PDF needs the
+optional pypdf; without it the multi-page PDF renders in one process.
+
+    python -m utils.pdf_export facts.jsonl -o reports.zip --workers 8
+"""
+import argparse
+import io
+import json
 import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
+
+from calculators.council_rates import calc_council_rates_batch
+from calculators.insurance import estimate_sum_insured_batch, premium_from_risk_batch
+from calculators.repayments import calc_repayments_batch
+from calculators.stamp_duty import calc_stamp_duty_batch
 from models.facts import PropertyFacts
+from models.facts_table import COUNT_FIELDS, FactsRow, PropertyFactsTable
+
+FORM_NAME = "proplens-summary"
+CHUNK_ROWS = 500  # reports per pool task
+FILE_NAME = "proplens_summary.pdf"
+
+COST_KEYS = ("stamp_duty", "council", "premium", "monthly_repay")
+
+# (key, label) per line, grouped into sections
+PROPERTY_LINES = (("dwelling_type", "Dwelling type"), ("beds", "Beds"), ("baths", "Baths"), ("cars", "Car spaces"),
+                  ("land_sqm", "Land sqm"), ("build_sqm", "Build sqm"))
+COST_LINES = (("stamp_duty", "Stamp duty"), ("council", "Council (annual)"), ("premium", "Insurance (annual)"),
+              ("monthly_repay", "Monthly repayment"))
+DISCLAIMER = "Indicative only. Data may be estimated. Third-party pages fetched only if robots allowed."
+
+
+class ReportTemplate:
+    """Layout of the one-page summary: static drawing ops and value slots."""
+
+    def __init__(self, pagesize=A4, left: float = 40.0):
+        width, height = pagesize
+        self.pagesize = pagesize
+        # text, x, y, font, size, and the key of the value drawn after the text (if any)
+        self.lines: List[Tuple[str, float, float, str, float, Optional[str]]] = []
+        y = height - 50
+
+        def label(key: str, text: str) -> None:
+            nonlocal y
+            self.lines.append((f"{text}: ", left, y, "Helvetica", 10, key))
+            y -= 15
+
+        self.lines.append(("PropLens Summary", left, y, "Helvetica-Bold", 16, None))
+        y -= 30
+        label("address", "Address")
+        # Suburb, state and postcode share a line
+        x = left
+        for key, text in (("suburb", "Suburb"), ("state", "State"), ("postcode", "Postcode")):
+            self.lines.append((f"{text}: ", x, y, "Helvetica", 10, key))
+            x += stringWidth(f"{text}: ", "Helvetica", 10) + (110 if key == "suburb" else 50)
+        y -= 25
+        for key, text in PROPERTY_LINES:
+            label(key, text)
+        y -= 10
+        self.lines.append(("Costs", left, y, "Helvetica-Bold", 12, None))
+        y -= 20
+        for key, text in COST_LINES:
+            label(key, text)
+        y -= 20
+        self.lines.append((DISCLAIMER, left, y, "Helvetica", 8, None))
+        self.slots: List[Tuple[str, float, float]] = [  # values in Helvetica 10
+            (key, x + stringWidth(text, font, size), y) for text, x, y, font, size, key in self.lines if key]
+
+    @staticmethod
+    def _draw(c: canvas.Canvas, ops) -> None:
+        """(text, x, y, font, size) ops as one text object."""
+        t = c.beginText()
+        current = None
+        for text, x, y, font, size in ops:
+            if (font, size) != current:
+                t.setFont(font, size)
+                current = (font, size)
+            t.setTextOrigin(x, y)
+            t.textOut(text)
+        c.drawText(t)
+
+    def page(self, c: canvas.Canvas, values: Dict[str, str], shared: bool = True) -> None:
+        """Draw one report as the next page of c. shared=False draws each label
+        and its value as one string, which is cheaper for a one-page document."""
+        if not shared:
+            self._draw(c, [(text + values.get(key, "-") if key else text, x, y, font, size)
+                           for text, x, y, font, size, key in self.lines])
+        else:
+            if not c.hasForm(FORM_NAME):
+                c.beginForm(FORM_NAME)
+                self._draw(c, [line[:5] for line in self.lines])
+                c.endForm()
+            c.doForm(FORM_NAME)
+            self._draw(c, [(values.get(key, "-"), x, y, "Helvetica", 10) for key, x, y in self.slots])
+        c.showPage()
+
+
+TEMPLATE = ReportTemplate()
+
+
+def _fact(prop: Union[PropertyFacts, FactsRow], field: str):
+    if isinstance(prop, FactsRow):
+        return prop.value(field)
+    v = getattr(getattr(prop, field), 'value', None)
+    # FieldValue stores numbers as float; counts print as "4", not "4.0"
+    return int(v) if field in COUNT_FIELDS and isinstance(v, float) and v.is_integer() else v
+
+
+def _where(prop: Union[PropertyFacts, FactsRow]) -> tuple:
+    if isinstance(prop, FactsRow):
+        return prop.display_name, prop.label("suburb"), prop.label("state"), prop.label("postcode")
+    a = prop.address
+    return a.display_name, a.suburb, a.state, a.postcode
+
+
+def report_values(prop: Union[PropertyFacts, FactsRow], stamp_duty: float, council: float, premium: float,
+                  monthly_repay: float) -> Dict[str, str]:
+    display_name, suburb, state, postcode = _where(prop)
+    values = {"address": display_name, "suburb": suburb or "-", "state": state or "-", "postcode": postcode or "-"}
+    for key, _ in PROPERTY_LINES:
+        values[key] = str(_fact(prop, key))
+    for key, amount in zip(COST_KEYS, (stamp_duty, council, premium, monthly_repay)):
+        values[key] = f"${amount:,.0f}"
+    return values
 
 
-def generate_pdf(prop: PropertyFacts, stamp_duty: float, council: float, premium: float, monthly_repay: float) -> str:
-    path = os.path.abspath("proplens_summary.pdf")
-    c = canvas.Canvas(path, pagesize=A4)
-    width, height = A4
-    y = height - 50
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(40, y, "PropLens Summary")
-    y -= 30
-
-    c.setFont("Helvetica", 10)
-    c.drawString(40, y, f"Address: {prop.address.display_name}")
-    y -= 15
-    c.drawString(40, y, f"Suburb: {prop.address.suburb or '-'}  State: {prop.address.state or '-'}  Postcode: {prop.address.postcode or '-'}")
-    y -= 25
-
-    def line(label, value):
-        nonlocal y
-        c.drawString(40, y, f"{label}: {value}")
-        y -= 15
-
-    line("Dwelling type", str(getattr(prop.dwelling_type, 'value', None)))
-    line("Beds", str(getattr(prop.beds, 'value', None)))
-    line("Baths", str(getattr(prop.baths, 'value', None)))
-    line("Car spaces", str(getattr(prop.cars, 'value', None)))
-    line("Land sqm", str(getattr(prop.land_sqm, 'value', None)))
-    line("Build sqm", str(getattr(prop.build_sqm, 'value', None)))
-
-    y -= 10
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(40, y, "Costs")
-    y -= 20
-    c.setFont("Helvetica", 10)
-    line("Stamp duty", f"${stamp_duty:,.0f}")
-    line("Council (annual)", f"${council:,.0f}")
-    line("Insurance (annual)", f"${premium:,.0f}")
-    line("Monthly repayment", f"${monthly_repay:,.0f}")
-
-    y -= 20
-    c.setFont("Helvetica", 8)
-    c.drawString(40, y, "Indicative only. Data may be estimated. Third-party pages fetched only if robots allowed.")
-
-    c.showPage()
+def render_pages(pages: Iterable[Dict[str, str]], out=None, template: ReportTemplate = TEMPLATE):
+    """One multi-page PDF. Written to `out` (a path or binary file) if given,
+    else returned as bytes."""
+    pages = iter(pages)
+    first = next(pages, None)
+    second = next(pages, None)
+    buf = io.BytesIO() if out is None else out
+    c = canvas.Canvas(buf, pagesize=template.pagesize)
+    if first is not None:
+        shared = second is not None
+        template.page(c, first, shared)
+        if shared:
+            template.page(c, second)
+            for values in pages:
+                template.page(c, values)
     c.save()
-    return path
\ No newline at end of file
+    return buf.getvalue() if out is None else None
+
+
+def render_pdf(prop: Union[PropertyFacts, FactsRow], stamp_duty: float, council: float, premium: float,
+               monthly_repay: float) -> bytes:
+    """One summary report as PDF bytes."""
+    return render_pages([report_values(prop, stamp_duty, council, premium, monthly_repay)])
+
+
+# --- batch ------------------------------------------------------------------------
+
+def table_pages(table: PropertyFactsTable, costs: Dict[str, np.ndarray]) -> Iterator[Dict[str, str]]:
+    cols = [np.broadcast_to(np.asarray(costs[k], dtype=float), (len(table),)).tolist() for k in COST_KEYS]
+    for row, *amounts in zip(table, *cols):
+        yield report_values(row, *amounts)
+
+
+def _render_chunk(table: PropertyFactsTable, costs: Dict[str, np.ndarray], start: int, per_file: bool):
+    pages = table_pages(table, costs)
+    if per_file:
+        return [(f"{start + i:06d}.pdf", render_pages([v])) for i, v in enumerate(pages)]
+    return render_pages(pages)
+
+
+def _chunks(table: PropertyFactsTable, costs: Dict[str, np.ndarray], chunk: int):
+    n = len(table)
+    full = {k: np.broadcast_to(np.asarray(costs[k], dtype=float), (n,)) for k in COST_KEYS}
+    for start in range(0, n, chunk):
+        idx = np.arange(start, min(n, start + chunk))
+        # An index (not a slice) compacts the text columns, so a task pickles only its rows
+        yield table[idx], {k: v[idx] for k, v in full.items()}, start
+
+
+def _pypdf():
+    try:
+        import pypdf
+    except ImportError:
+        return None
+    return pypdf
+
+
+def render_batch(table: PropertyFactsTable, costs: Dict[str, np.ndarray], out_path: str,
+                 workers: Optional[int] = None, chunk: int = CHUNK_ROWS) -> Dict[str, float]:
+    """Reports for every row of table. costs maps COST_KEYS to arrays (or scalars).
+    A .zip out_path holds one PDF per row; anything else is one multi-page PDF.
+    Returns pages, seconds and pages per second."""
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    if out_path.endswith(".zip"):
+        with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_STORED) as z:  # PDF streams are already deflated
+            for files in _map(workers, _chunks(table, costs, chunk), per_file=True):
+                for name, data in files:
+                    z.writestr(name, data)
+    elif workers > 1 and len(table) > chunk and _pypdf() is not None:
+        writer = _pypdf().PdfWriter()
+        for part in _map(workers, _chunks(table, costs, chunk), per_file=False):
+            writer.append(io.BytesIO(part))
+        with open(out_path, "wb") as f:
+            writer.write(f)
+    else:
+        with open(out_path, "wb") as f:
+            render_pages(table_pages(table, costs), f)
+    sec = time.perf_counter() - t0
+    return {"pages": len(table), "sec": round(sec, 3), "pages_per_sec": round(len(table) / sec, 1) if sec else 0.0}
+
+
+def _map(workers: int, chunks, per_file: bool):
+    """_render_chunk over chunks in order, on a process pool when workers > 1."""
+    if workers <= 1:
+        for t, c, start in chunks:
+            yield _render_chunk(t, c, start, per_file)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_chunk, t, c, start, per_file) for t, c, start in chunks]
+        for f in futures:
+            yield f.result()
+
+
+def portfolio_costs(table: PropertyFactsTable, rate_pct: float = 6.25, deposit_pct: float = 20.0,
+                    years: int = 30, risk: str = "medium") -> Dict[str, np.ndarray]:
+    """Costs for every row through the batch calculators, priced at last sold price."""
+    price = np.nan_to_num(table.column("last_sold_price"))
+    land = np.nan_to_num(table.column("land_sqm"))
+    return {
+        "stamp_duty": calc_stamp_duty_batch(price, table.column("state")),
+        "council": calc_council_rates_batch(table.column("lga"), land),
+        "premium": premium_from_risk_batch(estimate_sum_insured_batch(np.nan_to_num(table.column("build_sqm"))), risk),
+        "monthly_repay": calc_repayments_batch(price * (1 - deposit_pct / 100), rate_pct / 100, years),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("facts", help="pipeline JSONL output or a saved PropertyFactsTable directory")
+    ap.add_argument("-o", "--output", required=True, help=".zip for one PDF per property, else one multi-page PDF")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--rate", type=float, default=6.25, help="interest rate, percent p.a.")
+    ap.add_argument("--deposit", type=float, default=20.0, help="deposit, percent of price")
+    args = ap.parse_args(argv)
+
+    if os.path.isdir(args.facts):
+        table = PropertyFactsTable.load(args.facts)
+    else:
+        table = PropertyFactsTable.read_jsonl(args.facts)
+    stats = render_batch(table, portfolio_costs(table, args.rate, args.deposit), args.output, args.workers)
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()